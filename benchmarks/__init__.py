@@ -0,0 +1 @@
+"""Performance benchmarks for the DSL compiler, client and CLI."""
@@ -0,0 +1,123 @@
+"""Synthetic inputs for the benchmark suite."""
+
+from __future__ import annotations
+
+from typing import Any
+
+_SHAPES = ("box", "ellipse", "diamond")
+
+
+def generate_dsl(count: int, *, columns: int = 50) -> dict[str, Any]:
+    """Build a DSL document with ``count`` elements.
+
+    Roughly 60% are shapes laid out on a grid (with a text label every
+    fifth shape) and the rest are arrows chaining neighbouring shapes.
+    """
+    shape_count = max(2, (count * 3 + 4) // 5)
+    arrow_count = max(0, count - shape_count)
+    elements: list[dict[str, Any]] = []
+    for index in range(shape_count):
+        x = (index % columns) * 160
+        y = (index // columns) * 120
+        if index % 5 == 4:
+            elements.append(
+                {"id": f"n{index}", "type": "text", "x": x, "y": y, "text": f"T{index}"}
+            )
+            continue
+        elements.append(
+            {
+                "id": f"n{index}",
+                "type": _SHAPES[index % len(_SHAPES)],
+                "x": x + 3,
+                "y": y + 7,
+                "w": 120,
+                "h": 80,
+                "style": "primary" if index % 2 else None,
+            }
+        )
+    for index in range(arrow_count):
+        source = index % (shape_count - 1)
+        elements.append(
+            {
+                "type": "arrow",
+                "from": {"ref": f"n{source}", "side": "right"},
+                "to": {"ref": f"n{source + 1}", "side": "left"},
+            }
+        )
+    return {
+        "grid": 10,
+        "styles": {"primary": {"strokeColor": "#1971c2", "backgroundColor": "#a5d8ff"}},
+        "elements": elements,
+    }
+
+
+def generate_columnar(count: int, *, columns: int = 50) -> dict[str, Any]:
+    """Columnar equivalent of ``generate_dsl`` without the text labels."""
+    shape_count = max(2, (count * 3 + 4) // 5)
+    arrow_count = max(0, count - shape_count)
+    rows = range(shape_count)
+    sources = [index % (shape_count - 1) for index in range(arrow_count)]
+    return {
+        "grid": 10,
+        "styles": {"primary": {"strokeColor": "#1971c2", "backgroundColor": "#a5d8ff"}},
+        "columns": {
+            "shapes": {
+                "id": [f"n{index}" for index in rows],
+                "type": [_SHAPES[index % len(_SHAPES)] for index in rows],
+                "x": [(index % columns) * 160 + 3 for index in rows],
+                "y": [(index // columns) * 120 + 7 for index in rows],
+                "w": [120] * shape_count,
+                "h": [80] * shape_count,
+                "style": ["primary" if index % 2 else None for index in rows],
+            },
+            "arrows": {
+                "from": sources,
+                "to": [source + 1 for source in sources],
+                "fromSide": ["right"] * arrow_count,
+                "toSide": ["left"] * arrow_count,
+            },
+        },
+    }
+
+
+def generate_components(count: int, *, columns: int = 50) -> dict[str, Any]:
+    """Build ``count`` elements as instances of a four-element component."""
+    service = [
+        {"id": "box", "type": "box", "x": 0, "y": 0, "w": 120, "h": 80},
+        {"id": "label", "type": "text", "x": 10, "y": 30, "text": "service"},
+        {"id": "health", "type": "ellipse", "x": 100, "y": -10, "w": 20, "h": 20},
+        {
+            "id": "ping",
+            "type": "arrow",
+            "from": {"ref": "box", "side": "top"},
+            "to": {"ref": "health", "side": "left"},
+        },
+    ]
+    return {
+        "grid": 10,
+        "components": {"service": {"elements": service}},
+        "elements": [
+            {
+                "type": "instance",
+                "component": "service",
+                "id": f"s{index}",
+                "x": (index % columns) * 160,
+                "y": (index // columns) * 120,
+            }
+            for index in range(max(1, count // len(service)))
+        ],
+    }
+
+
+def generate_scene(count: int) -> dict[str, Any]:
+    """Build an Excalidraw scene with ``count`` rectangles."""
+    from excalidraw_dsl import render_dsl
+
+    return render_dsl(
+        {
+            "elements": [
+                {"id": f"r{i}", "type": "box", "x": i * 10, "y": 0, "w": 8, "h": 8}
+                for i in range(count)
+            ]
+        }
+    )
@@ -0,0 +1,507 @@
+"""Benchmark runner.
+
+Usage (from the repository root):
+    python -m benchmarks.run run --output bench.json
+    python -m benchmarks.run run --quick --suite dsl
+    python -m benchmarks.run run --suite mermaid --server http://localhost:3000
+    python -m benchmarks.run compare baseline.json bench.json --threshold 0.1
+
+Every result records a value, its unit and whether lower or higher is
+better, so ``compare`` can flag regressions in either direction.
+"""
+
+from __future__ import annotations
+
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+import click
+
+from .generate import (
+    generate_columnar,
+    generate_components,
+    generate_dsl,
+    generate_scene,
+)
+
+Results = dict[str, dict[str, Any]]
+
+SUITES = ("dsl", "client", "cli", "mermaid", "startup")
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Milliseconds a fresh ``excalidraw-render`` process may take on top of bare
+# interpreter startup, about twice what a single-CPU machine measures. The
+# startup suite flags any that are exceeded; ``tests/test_startup.py`` fails
+# at twice the budget to allow for loaded CI machines.
+STARTUP_BUDGETS = {"help": 150.0, "render": 250.0}
+
+
+def _record(results: Results, name: str, value: float, unit: str, better: str) -> None:
+    results[name] = {"value": value, "unit": unit, "better": better}
+    click.echo(f"  {name:<58} {value:>14.3f} {unit}")
+
+
+def _best_of(repeat: int, func: Callable[[], object]) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _percentile(samples: list[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def bench_dsl(results: Results, sizes: list[int], repeat: int) -> None:
+    from excalidraw_dsl import Diagram, load_columnar, render_dsl, save_columnar
+
+    for size in sizes:
+        data = generate_dsl(size)
+        runs = repeat if size < 50_000 else 1
+        parse = _best_of(runs, lambda: Diagram.from_dict(data))
+        diagram = Diagram.from_dict(data)
+        compile_ = _best_of(runs, lambda: render_dsl(diagram))
+        end_to_end = _best_of(runs, lambda: render_dsl(data))
+        deterministic = _best_of(
+            runs, lambda: render_dsl(diagram, deterministic=True)
+        )
+        _record(results, f"dsl.from_dict[{size}]", parse, "s", "lower")
+        _record(results, f"dsl.compile[{size}]", compile_, "s", "lower")
+        _record(
+            results, f"dsl.compile.deterministic[{size}]", deterministic, "s", "lower"
+        )
+        _record(
+            results,
+            f"dsl.render_dsl[{size}].throughput",
+            size / end_to_end,
+            "elements/s",
+            "higher",
+        )
+        columnar = generate_columnar(size)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "diagram.dsl.bin"
+            save_columnar(columnar, path)
+            load = _best_of(runs, lambda: load_columnar(path))
+        columnar_end_to_end = _best_of(runs, lambda: render_dsl(columnar))
+        _record(results, f"dsl.load_columnar[{size}]", load, "s", "lower")
+        _record(
+            results,
+            f"dsl.render_dsl.columnar[{size}].throughput",
+            size / columnar_end_to_end,
+            "elements/s",
+            "higher",
+        )
+        components = Diagram.from_dict(generate_components(size))
+        instanced = _best_of(runs, lambda: render_dsl(components))
+        _record(
+            results,
+            f"dsl.render_dsl.components[{size}].throughput",
+            size / instanced,
+            "elements/s",
+            "higher",
+        )
+
+
+def _latencies(count: int, func: Callable[[int], object]) -> tuple[list[float], float]:
+    samples = []
+    start = time.perf_counter()
+    for index in range(count):
+        begin = time.perf_counter()
+        func(index)
+        samples.append(time.perf_counter() - begin)
+    return samples, time.perf_counter() - start
+
+
+def _record_latency(
+    results: Results, name: str, samples: list[float], elapsed: float
+) -> None:
+    _record(results, f"{name}.p50", _percentile(samples, 0.5) * 1000, "ms", "lower")
+    _record(results, f"{name}.p95", _percentile(samples, 0.95) * 1000, "ms", "lower")
+    _record(results, f"{name}.throughput", len(samples) / elapsed, "req/s", "higher")
+
+
+def bench_client(
+    results: Results,
+    requests: int,
+    latencies: list[float],
+    response_sizes: list[int],
+) -> None:
+    from excalidraw_renderer.client import render_mermaid, render_png
+    from excalidraw_renderer.session import RenderSession
+    from excalidraw_renderer.testing import StubRenderServer
+
+    scene = generate_scene(200)
+    with tempfile.TemporaryDirectory(prefix="bench-client-") as tmp:
+        scene_path = Path(tmp) / "scene.json"
+        scene_path.write_text(json.dumps(scene), encoding="utf-8")
+        out = Path(tmp) / "out.png"
+        for latency in latencies:
+            for size in response_sizes:
+                label = f"lat={latency * 1000:g}ms,size={size // 1024}KB"
+                with StubRenderServer(latency=latency, response_size=size) as server:
+                    endpoint = server.endpoint()
+                    samples, elapsed = _latencies(
+                        requests, lambda _: render_png(scene_path, out, endpoint=endpoint)
+                    )
+                    _record_latency(
+                        results, f"client.render_png[{label}]", samples, elapsed
+                    )
+
+                    with RenderSession() as session:
+                        samples, elapsed = _latencies(
+                            requests,
+                            lambda _: render_png(
+                                scene_path,
+                                out,
+                                endpoint=endpoint,
+                                session=session,
+                            ),
+                        )
+                    _record_latency(
+                        results, f"client.render_png+session[{label}]", samples, elapsed
+                    )
+
+                    samples, elapsed = _latencies(
+                        requests,
+                        lambda index: render_mermaid(
+                            f"graph TD; A{index}-->B",
+                            out,
+                            endpoint=server.endpoint("/api/render-mermaid"),
+                        ),
+                    )
+                    _record_latency(
+                        results, f"client.render_mermaid[{label}]", samples, elapsed
+                    )
+
+
+def bench_cli(results: Results, files: int, latency: float) -> None:
+    from click.testing import CliRunner
+
+    from excalidraw_renderer.testing import StubRenderServer
+    from main import main as cli
+
+    scene = json.dumps(generate_scene(200))
+    with tempfile.TemporaryDirectory(prefix="bench-cli-") as tmp:
+        input_dir = Path(tmp) / "in"
+        input_dir.mkdir()
+        for index in range(files):
+            (input_dir / f"scene{index}.json").write_text(scene, encoding="utf-8")
+
+        with StubRenderServer(latency=latency) as server:
+            start = time.perf_counter()
+            outcome = CliRunner().invoke(
+                cli,
+                [
+                    "render",
+                    str(input_dir),
+                    str(Path(tmp) / "out"),
+                    "--endpoint",
+                    server.endpoint(),
+                ],
+            )
+            elapsed = time.perf_counter() - start
+        if outcome.exit_code != 0:
+            raise click.ClickException(f"CLI benchmark failed: {outcome.output}")
+        _record(
+            results,
+            f"cli.render_dir[{files} files,lat={latency * 1000:g}ms].throughput",
+            files / elapsed,
+            "files/s",
+            "higher",
+        )
+
+
+def bench_mermaid(results: Results, repeat: int, server: str | None = None) -> None:
+    """Time native flowchart compilation of the Mermaid examples.
+
+    With ``server`` (a running render server's base URL), also time full
+    renders through the native path and through the server's converter.
+    """
+    from excalidraw_dsl import mermaid_to_scene
+    from excalidraw_renderer.client import render_mermaid, render_png
+
+    root = ROOT / "examples_mermaid"
+    for path in sorted(root.glob("*.mmd")):
+        text = path.read_text(encoding="utf-8")
+        try:
+            mermaid_to_scene(text)
+        except ValueError:
+            native = False
+        else:
+            native = True
+            seconds = _best_of(repeat, lambda: mermaid_to_scene(text))
+            _record(
+                results, f"mermaid.native[{path.name}]", seconds * 1000, "ms", "lower"
+            )
+        if server is None:
+            continue
+        seconds = _best_of(
+            3, lambda: render_mermaid(path, endpoint=f"{server}/api/render-mermaid")
+        )
+        _record(
+            results, f"mermaid.server_e2e[{path.name}]", seconds * 1000, "ms", "lower"
+        )
+        if native:
+            seconds = _best_of(
+                3,
+                lambda: render_png(
+                    mermaid_to_scene(text), endpoint=f"{server}/api/render"
+                ),
+            )
+            _record(
+                results,
+                f"mermaid.native_e2e[{path.name}]",
+                seconds * 1000,
+                "ms",
+                "lower",
+            )
+
+
+def startup_time(args: list[str], repeat: int) -> float:
+    """Best wall time in seconds of ``python *args`` run from the repository root."""
+    return _best_of(
+        repeat,
+        lambda: subprocess.run(
+            [sys.executable, *args], cwd=ROOT, check=True, capture_output=True
+        ),
+    )
+
+
+def import_times(module: str) -> dict[str, tuple[int, float]]:
+    """Profile ``import module`` with ``-X importtime``.
+
+    Returns ``{name: (depth, cumulative seconds)}`` for every module the
+    import loaded, where depth 0 is imported directly by the statement.
+    """
+    outcome = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    times: dict[str, tuple[int, float]] = {}
+    for line in outcome.stderr.splitlines():
+        fields = line.removeprefix("import time:").split("|")
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+        name = fields[2].rstrip()
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        times[name.strip()] = (depth, int(fields[1]) / 1e6)
+    return times
+
+
+def bench_startup(results: Results, repeat: int) -> None:
+    from excalidraw_renderer.testing import StubRenderServer
+
+    baseline = startup_time(["-c", "pass"], repeat)
+    _record(results, "startup.python", baseline * 1000, "ms", "lower")
+    with StubRenderServer() as server, tempfile.TemporaryDirectory(
+        prefix="bench-startup-"
+    ) as tmp:
+        scene = Path(tmp) / "scene.json"
+        scene.write_text(json.dumps(generate_scene(200)), encoding="utf-8")
+        commands = {
+            "help": ["main.py", "--help"],
+            "render": [
+                "main.py",
+                "render",
+                str(scene),
+                str(Path(tmp) / "scene.png"),
+                "--endpoint",
+                server.endpoint(),
+            ],
+        }
+        for name, args in commands.items():
+            overhead = (startup_time(args, repeat) - baseline) * 1000
+            _record(results, f"startup.cli.{name}", overhead, "ms", "lower")
+            if overhead > STARTUP_BUDGETS[name]:
+                click.echo(f"    over the {STARTUP_BUDGETS[name]:g} ms budget")
+
+    for module in ("main", "excalidraw_renderer.client", "excalidraw_dsl.renderer"):
+        try:
+            times = import_times(module)
+        except subprocess.CalledProcessError:
+            continue  # excalidraw_dsl is optional
+        _record(
+            results, f"startup.import[{module}]", times[module][1] * 1000, "ms", "lower"
+        )
+        heaviest = sorted(
+            (seconds, name)
+            for name, (depth, seconds) in times.items()
+            if depth == 1
+        )[-3:]
+        for seconds, name in reversed(heaviest):
+            click.echo(f"    {name:<56} {seconds * 1000:>14.3f} ms")
+
+
+def _int_list(value: str) -> list[int]:
+    return [int(part) for part in value.split(",") if part]
+
+
+def _float_list(value: str) -> list[float]:
+    return [float(part) for part in value.split(",") if part]
+
+
+@click.group(context_settings={"help_option_names": ["-h", "--help"]})
+def main() -> None:
+    """Run benchmarks and compare result files."""
+
+
+@main.command("run")
+@click.option(
+    "--suite",
+    "suites",
+    type=click.Choice(SUITES),
+    multiple=True,
+    help="Suites to run (default: all)",
+)
+@click.option("--quick", is_flag=True, help="Small sizes for a fast smoke run")
+@click.option("--sizes", default="100,1000,10000,100000", show_default=True)
+@click.option("--repeat", default=5, show_default=True)
+@click.option("--requests", default=200, show_default=True)
+@click.option(
+    "--latency",
+    "latencies",
+    default="0,0.005",
+    show_default=True,
+    help="Comma-separated stub server latencies in seconds",
+)
+@click.option(
+    "--response-size",
+    "response_sizes",
+    default="16384,262144",
+    show_default=True,
+    help="Comma-separated stub response sizes in bytes",
+)
+@click.option("--files", default=100, show_default=True, help="Files for the CLI suite")
+@click.option(
+    "--server",
+    help="Base URL of a running render server; the mermaid suite then also "
+    "times native and server-side renders end to end",
+)
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Write results as JSON",
+)
+def run_command(
+    suites: tuple[str, ...],
+    quick: bool,
+    sizes: str,
+    repeat: int,
+    requests: int,
+    latencies: str,
+    response_sizes: str,
+    files: int,
+    server: str | None,
+    output: Path | None,
+) -> None:
+    """Run the selected benchmark suites."""
+    selected = suites or SUITES
+    size_list = _int_list(sizes)
+    if quick:
+        size_list = [size for size in size_list if size <= 1000] or [100]
+        repeat, requests, files = min(repeat, 2), min(requests, 20), min(files, 10)
+
+    results: Results = {}
+    if "dsl" in selected:
+        click.echo("dsl")
+        bench_dsl(results, size_list, repeat)
+    if "client" in selected:
+        click.echo("client")
+        bench_client(
+            results, requests, _float_list(latencies), _int_list(response_sizes)
+        )
+    if "cli" in selected:
+        click.echo("cli")
+        bench_cli(results, files, _float_list(latencies)[-1])
+    if "mermaid" in selected:
+        click.echo("mermaid")
+        bench_mermaid(results, repeat * 10, server.rstrip("/") if server else None)
+    if "startup" in selected:
+        click.echo("startup")
+        bench_startup(results, repeat)
+
+    if output is not None:
+        document = {
+            "meta": {
+                "created": datetime.now(timezone.utc).isoformat(),
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "quick": quick,
+            },
+            "results": results,
+        }
+        output.write_text(
+            json.dumps(document, indent=2, sort_keys=True), encoding="utf-8"
+        )
+        click.echo(f"Wrote {output}")
+
+
+def compare_results(
+    baseline: Results, current: Results, threshold: float
+) -> list[tuple[str, float]]:
+    """Return ``(name, relative change)`` for results that regressed.
+
+    The change is positive when ``current`` is worse than ``baseline``.
+    """
+    regressions = []
+    for name, base in baseline.items():
+        now = current.get(name)
+        if now is None or not base["value"]:
+            continue
+        change = (now["value"] - base["value"]) / base["value"]
+        if base["better"] == "higher":
+            change = -change
+        if change > threshold:
+            regressions.append((name, change))
+    return regressions
+
+
+@main.command("compare")
+@click.argument(
+    "baseline", type=click.Path(exists=True, dir_okay=False, path_type=Path)
+)
+@click.argument(
+    "current", type=click.Path(exists=True, dir_okay=False, path_type=Path)
+)
+@click.option(
+    "--threshold",
+    default=0.1,
+    show_default=True,
+    help="Relative change treated as a regression (0.1 = 10%)",
+)
+def compare_command(baseline: Path, current: Path, threshold: float) -> None:
+    """Compare two result files and exit non-zero on regressions."""
+    base = json.loads(baseline.read_text(encoding="utf-8"))["results"]
+    now = json.loads(current.read_text(encoding="utf-8"))["results"]
+
+    for name in sorted(base.keys() & now.keys()):
+        before, after = base[name]["value"], now[name]["value"]
+        change = (after - before) / before * 100 if before else 0.0
+        click.echo(f"{name:<58} {before:>12.3f} {after:>12.3f} {change:>+7.1f}%")
+
+    regressions = compare_results(base, now, threshold)
+    if regressions:
+        click.echo(f"\n{len(regressions)} regression(s) beyond {threshold:.0%}:")
+        for name, change in regressions:
+            click.echo(f"  {name}: {change:+.1%} worse")
+        raise SystemExit(1)
+    click.echo(f"\nNo regressions beyond {threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
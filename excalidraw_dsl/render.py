@@ -5,16 +5,18 @@ from pathlib import Path
 
 import click
 
-from excalidraw_dsl import render_dsl
+from excalidraw_dsl import load_columnar, render_dsl
 
 
 @click.command(context_settings={"help_option_names": ["-h", "--help"]})
 @click.argument("input", type=click.Path(exists=True, dir_okay=False, path_type=Path))
 @click.argument("output", type=click.Path(dir_okay=False, path_type=Path))
 def main(input: Path, output: Path) -> None:
-    """Render a DSL JSON file into Excalidraw JSON."""
-    data = json.loads(input.read_text(encoding="utf-8"))
-    rendered = render_dsl(data)
+    """Render a DSL JSON file (or columnar .bin/.npz file) into Excalidraw JSON."""
+    if input.suffix in (".bin", ".npz"):
+        rendered = render_dsl(load_columnar(input))
+    else:
+        rendered = render_dsl(json.loads(input.read_text(encoding="utf-8")))
 
     output.write_text(
         json.dumps(rendered, indent=2, sort_keys=True),
@@ -1,31 +1,89 @@
 """Minimal DSL renderer for Excalidraw scenes."""
 
-from .renderer import render_dsl
-from .model import (
-    Arrow,
-    ArrowEndpoint,
-    Box,
-    Diagram,
-    Diamond,
-    Ellipse,
-    StyleOverrides,
-    StylePreset,
-    Text,
-)
-from .state import RenderState
-from .types import BBox
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .columnar import load_columnar, save_columnar
+    from .mermaid import mermaid_to_scene, parse_mermaid
+    from .model import (
+        Arrow,
+        ArrowColumns,
+        ArrowEndpoint,
+        Box,
+        Component,
+        Diagram,
+        Diamond,
+        Ellipse,
+        Instance,
+        ShapeColumns,
+        StyleOverrides,
+        StylePreset,
+        Text,
+    )
+    from .renderer import render_dsl
+    from .state import RenderState
+    from .types import BBox
+
+# Submodules load on first use: compiling a DSL file does not pay for the
+# Mermaid parser or the columnar file format, and vice versa.
+_EXPORTS = {
+    "Arrow": "model",
+    "ArrowColumns": "model",
+    "ArrowEndpoint": "model",
+    "BBox": "types",
+    "Box": "model",
+    "Component": "model",
+    "RenderState": "state",
+    "Diagram": "model",
+    "Diamond": "model",
+    "Ellipse": "model",
+    "Instance": "model",
+    "ShapeColumns": "model",
+    "StyleOverrides": "model",
+    "StylePreset": "model",
+    "Text": "model",
+    "load_columnar": "columnar",
+    "mermaid_to_scene": "mermaid",
+    "parse_mermaid": "mermaid",
+    "render_dsl": "renderer",
+    "save_columnar": "columnar",
+}
 
 __all__ = [
     "Arrow",
+    "ArrowColumns",
     "ArrowEndpoint",
     "BBox",
     "Box",
+    "Component",
     "RenderState",
     "Diagram",
     "Diamond",
     "Ellipse",
+    "Instance",
+    "ShapeColumns",
     "StyleOverrides",
     "StylePreset",
     "Text",
+    "load_columnar",
+    "mermaid_to_scene",
+    "parse_mermaid",
     "render_dsl",
+    "save_columnar",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *__all__])
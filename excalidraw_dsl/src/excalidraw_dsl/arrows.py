@@ -2,47 +2,26 @@ from __future__ import annotations
 
 from typing import Any
 
-from .model import Arrow
+from .model import Arrow, ArrowColumns, column_values
 from .styles import merge_style
 from .state import RenderState
 
 
-def render_arrow(element: Arrow, state: RenderState) -> dict[str, Any]:
-    element_id = element.id or state.next_id("arrow")
-    if not isinstance(element_id, str):
-        raise ValueError("Arrow id must be a string")
-
-    from_ref = element.from_.ref
-    to_ref = element.to.ref
-    if not isinstance(from_ref, str) or not isinstance(to_ref, str):
-        raise ValueError("Arrow refs must be strings")
-
-    if from_ref not in state.bboxes or to_ref not in state.bboxes:
-        raise ValueError("Arrow refs must point to existing elements")
-
-    from_side = element.from_.side
-    to_side = element.to.side
-    if not isinstance(from_side, str) or not isinstance(to_side, str):
-        raise ValueError("Arrow sides must be strings")
-
-    start = state.bboxes[from_ref].anchor(from_side)
-    end = state.bboxes[to_ref].anchor(to_side)
-
-    start_x = state.snap(start[0])
-    start_y = state.snap(start[1])
-    end_x = state.snap(end[0])
-    end_y = state.snap(end[1])
-
-    dx = end_x - start_x
-    dy = end_y - start_y
-
-    style = merge_style(element.style, element.style_overrides, state.styles)
-
+def _arrow_element(
+    element_id: str,
+    start: tuple[float, float],
+    end: tuple[float, float],
+    style: dict[str, Any],
+    state: RenderState,
+) -> dict[str, Any]:
+    """Excalidraw dict for a straight arrow between snapped points."""
+    dx = end[0] - start[0]
+    dy = end[1] - start[1]
     return {
         "id": element_id,
         "type": "arrow",
-        "x": start_x,
-        "y": start_y,
+        "x": start[0],
+        "y": start[1],
         "width": dx,
         "height": dy,
         "angle": 0,
@@ -65,3 +44,74 @@ def render_arrow(element: Arrow, state: RenderState) -> dict[str, Any]:
         "startArrowhead": None,
         "endArrowhead": "arrow",
     }
+
+
+def render_arrow(element: Arrow, state: RenderState) -> dict[str, Any]:
+    element_id = element.id or state.next_id("arrow")
+    if not isinstance(element_id, str):
+        raise ValueError("Arrow id must be a string")
+
+    from_ref = element.from_.ref
+    to_ref = element.to.ref
+    if not isinstance(from_ref, str) or not isinstance(to_ref, str):
+        raise ValueError("Arrow refs must be strings")
+
+    from_side = element.from_.side
+    to_side = element.to.side
+    if not isinstance(from_side, str) or not isinstance(to_side, str):
+        raise ValueError("Arrow sides must be strings")
+
+    start = state.anchor(from_ref, from_side)
+    end = state.anchor(to_ref, to_side)
+
+    style = merge_style(element.style, element.style_overrides, state.styles)
+    return _arrow_element(
+        element_id,
+        (state.snap(start[0]), state.snap(start[1])),
+        (state.snap(end[0]), state.snap(end[1])),
+        style,
+        state,
+    )
+
+
+def render_arrow_columns(
+    columns: ArrowColumns, state: RenderState
+) -> list[dict[str, Any]]:
+    """Render columnar arrows, snapping their endpoints in bulk."""
+    count = len(columns)
+    from_refs = column_values(columns.from_)
+    to_refs = column_values(columns.to)
+    from_sides = column_values(columns.from_side, count, "center")
+    to_sides = column_values(columns.to_side, count, "center")
+    ids = column_values(columns.id, count, None)
+    style_names = column_values(columns.style, count, None)
+
+    starts = [
+        state.anchor(ref, side) for ref, side in zip(from_refs, from_sides)
+    ]
+    ends = [state.anchor(ref, side) for ref, side in zip(to_refs, to_sides)]
+    start_xs = state.snap_all([point[0] for point in starts])
+    start_ys = state.snap_all([point[1] for point in starts])
+    end_xs = state.snap_all([point[0] for point in ends])
+    end_ys = state.snap_all([point[1] for point in ends])
+
+    styles: dict[str | None, dict[str, Any]] = {}
+    compiled_arrows: list[dict[str, Any]] = []
+    for row in range(count):
+        element_id = ids[row] or state.next_id("arrow")
+        if not isinstance(element_id, str):
+            raise ValueError("Arrow id must be a string")
+        style_name = style_names[row]
+        style = styles.get(style_name)
+        if style is None:
+            style = styles[style_name] = merge_style(style_name, None, state.styles)
+        compiled_arrows.append(
+            _arrow_element(
+                element_id,
+                (start_xs[row], start_ys[row]),
+                (end_xs[row], end_ys[row]),
+                style,
+                state,
+            )
+        )
+    return compiled_arrows
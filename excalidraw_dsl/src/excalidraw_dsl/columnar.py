@@ -0,0 +1,138 @@
+"""Binary files for columnar DSL diagrams.
+
+Generators that emit hundreds of thousands of shapes can skip JSON for the
+numeric columns. ``save_columnar`` writes a DSL dict whose "columns" hold
+parallel arrays (see ``render_dsl``) and ``load_columnar`` reads it back as
+a ``Diagram`` without building a Python object per row.
+
+The default format is a small header followed by raw ``array.array``
+buffers: the magic bytes, a little-endian uint32 header length, a JSON
+header with everything that is not a numeric column, then the numeric
+columns (coordinates as float64, arrow row refs as int64) back to back.
+Files ending in ``.npz`` are stored with NumPy instead, which must then be
+installed.
+"""
+
+from __future__ import annotations
+
+import json
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Any
+
+from .model import Diagram, column_values
+
+MAGIC = b"EXDSLCOL"
+
+_NUMERIC = {
+    ("shapes", "x"): "d",
+    ("shapes", "y"): "d",
+    ("shapes", "w"): "d",
+    ("shapes", "h"): "d",
+    ("arrows", "from"): "q",
+    ("arrows", "to"): "q",
+}
+_HEADER = "dsl"
+
+
+def save_columnar(data: dict[str, Any], path: str | Path) -> None:
+    """Write a columnar DSL dict to ``path``."""
+    if not isinstance(data, dict) or not isinstance(data.get("columns"), dict):
+        raise ValueError("Columnar DSL must include a 'columns' object")
+    header = {key: value for key, value in data.items() if key != "columns"}
+    header["columns"] = {}
+    arrays: dict[str, array] = {}
+    for table, columns in data["columns"].items():
+        if not isinstance(columns, dict):
+            raise ValueError(f"columns.{table} must be an object")
+        header["columns"][table] = {}
+        for name, values in columns.items():
+            typecode = _NUMERIC.get((table, name))
+            packed = _pack(values, typecode) if typecode is not None else None
+            if packed is None:
+                header["columns"][table][name] = column_values(values)
+            else:
+                arrays[f"{table}.{name}"] = packed
+
+    path = Path(path)
+    if path.suffix == ".npz":
+        numpy = _numpy()
+        stored = {
+            key: numpy.frombuffer(column, column.typecode)
+            for key, column in arrays.items()
+        }
+        numpy.savez(path, **{_HEADER: numpy.array(json.dumps(header))}, **stored)
+        return
+
+    header["arrays"] = [
+        [key, column.typecode, len(column)] for key, column in arrays.items()
+    ]
+    encoded = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    with path.open("wb") as handle:
+        handle.write(MAGIC)
+        handle.write(struct.pack("<I", len(encoded)))
+        handle.write(encoded)
+        for column in arrays.values():
+            if sys.byteorder == "big":
+                column = array(column.typecode, column)
+                column.byteswap()
+            handle.write(column.tobytes())
+
+
+def load_columnar(path: str | Path) -> Diagram:
+    """Read a file written by ``save_columnar`` into a ``Diagram``."""
+    path = Path(path)
+    if path.suffix == ".npz":
+        with _numpy().load(path, allow_pickle=False) as archive:
+            header = json.loads(str(archive[_HEADER]))
+            arrays = {key: archive[key] for key in archive.files if key != _HEADER}
+        return _diagram(header, arrays)
+
+    data = memoryview(path.read_bytes())
+    if bytes(data[: len(MAGIC)]) != MAGIC:
+        raise ValueError(f"{path} is not a columnar DSL file")
+    offset = len(MAGIC) + 4
+    (header_size,) = struct.unpack("<I", data[len(MAGIC) : offset])
+    header = json.loads(bytes(data[offset : offset + header_size]))
+    offset += header_size
+
+    arrays: dict[str, array] = {}
+    for key, typecode, length in header.pop("arrays", []):
+        column = array(typecode)
+        end = offset + length * column.itemsize
+        if end > len(data):
+            raise ValueError(f"{path} is truncated")
+        column.frombytes(data[offset:end])
+        if sys.byteorder == "big":
+            column.byteswap()
+        arrays[key] = column
+        offset = end
+    return _diagram(header, arrays)
+
+
+def _pack(values: Any, typecode: str) -> array | None:
+    if isinstance(values, array) and values.typecode == typecode:
+        return values
+    try:
+        return array(typecode, column_values(values))
+    except TypeError:
+        # Arrow refs given as ids stay in the JSON header.
+        return None
+
+
+def _diagram(header: dict[str, Any], arrays: dict[str, Any]) -> Diagram:
+    columns = header.setdefault("columns", {})
+    for key, column in arrays.items():
+        table, _, name = key.partition(".")
+        columns.setdefault(table, {})[name] = column
+    return Diagram.from_dict(header)
+
+
+def _numpy() -> Any:
+    try:
+        import numpy
+    except ImportError as exc:
+        raise RuntimeError(".npz columnar files require numpy") from exc
+    return numpy
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+from .model import Instance
+from .state import RenderState
+from .types import BBox
+
+
+@dataclass(frozen=True)
+class Template:
+    """A component compiled once at the origin, ready to be stamped out."""
+
+    elements: list[dict[str, Any]]
+    bboxes: dict[str, BBox]
+
+
+def _instance_style(instance: Instance, state: RenderState) -> dict[str, Any]:
+    style: dict[str, Any] = {}
+    if instance.style is not None:
+        preset = state.styles.get(instance.style)
+        if preset is None:
+            raise ValueError(f"Unknown style preset '{instance.style}'")
+        style.update({k: v for k, v in preset.__dict__.items() if v is not None})
+    overrides = instance.style_overrides
+    if overrides is not None:
+        style.update({k: v for k, v in overrides.__dict__.items() if v is not None})
+    return style
+
+
+def stamp_instance(
+    instance: Instance, template: Template, state: RenderState
+) -> list[dict[str, Any]]:
+    """Translate a compiled template into one grouped instance."""
+    group_id = instance.id or state.next_id(instance.component)
+    if not isinstance(group_id, str):
+        raise ValueError("Instance id must be a string")
+    prefix = instance.id_prefix if instance.id_prefix is not None else f"{group_id}-"
+    dx = state.snap(float(instance.x))
+    dy = state.snap(float(instance.y))
+    style = _instance_style(instance, state)
+
+    stamped: list[dict[str, Any]] = []
+    for compiled in template.elements:
+        element = dict(compiled)
+        element["id"] = prefix + compiled["id"]
+        element["x"] = compiled["x"] + dx
+        element["y"] = compiled["y"] + dy
+        element["groupIds"] = [*compiled["groupIds"], group_id]
+        if compiled["roundness"] is not None:
+            element["roundness"] = dict(compiled["roundness"])
+        if "points" in compiled:
+            element["points"] = [list(point) for point in compiled["points"]]
+        if style and compiled["type"] != "text":
+            element.update(style)
+        element["seed"] = state.counter
+        element["versionNonce"] = state.counter + 100
+        element["updated"] = state.timestamp()
+        stamped.append(element)
+
+    for element_id, bbox in template.bboxes.items():
+        state.bboxes[prefix + element_id] = BBox(
+            bbox.x + dx, bbox.y + dy, bbox.w, bbox.h
+        )
+    return stamped
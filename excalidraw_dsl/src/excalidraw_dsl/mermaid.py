@@ -0,0 +1,399 @@
+"""Native compiler for the Mermaid flowchart subset.
+
+Only plain ``flowchart``/``graph`` diagrams are understood: nodes with the
+common shape brackets, ``-->``/``-.->``/``==>`` edges and edge labels. Anything
+else raises ``ValueError`` so callers can fall back to the render server.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Any
+
+from .model import (
+    Arrow,
+    ArrowEndpoint,
+    Box,
+    Diagram,
+    Diamond,
+    Element,
+    Ellipse,
+    StyleOverrides,
+    Text,
+)
+from .text import estimate_text_size
+
+FONT_SIZE = 20
+LINE_HEIGHT = 1.25
+TEXT_PADDING = 6
+NODE_MIN_W = 120
+NODE_MIN_H = 60
+RANK_GAP = 80
+NODE_GAP = 60
+
+_HEADER_RE = re.compile(
+    r"^(?:flowchart|graph)(?:\s+(TD|TB|BT|LR|RL))?$", re.IGNORECASE
+)
+_ID_RE = re.compile(r"[A-Za-z0-9_]+")
+_LINK_RE = re.compile(
+    r"""
+    (?:
+        (?P<solid>-{2,}>)
+      | (?P<dotted>-\.+->)
+      | (?P<thick>={2,}>)
+      | --\s*(?P<solid_text>[^->|][^>|]*?)\s*-{2,}>
+      | -\.\s*(?P<dotted_text>[^.>|][^>|]*?)\s*\.->
+      | ==\s*(?P<thick_text>[^=>|][^>|]*?)\s*={2,}>
+    )
+    (?:\s*\|(?P<pipe_text>[^|]*)\|)?
+    """,
+    re.VERBOSE,
+)
+
+# Opening bracket -> (closing bracket, element class). Longer openers first.
+_SHAPES: list[tuple[str, str, type]] = [
+    ("((", "))", Ellipse),
+    ("([", "])", Box),
+    ("[", "]", Box),
+    ("(", ")", Box),
+    ("{", "}", Diamond),
+]
+
+# Shapes whose openers start like a supported one: cylinder, parallelograms,
+# trapezoids, subroutine, hexagon, double circle and asymmetric nodes.
+_UNSUPPORTED_OPENERS = ("[(", "[/", "[\\", "[[", "{{", "(((", ">")
+
+_KEYWORDS = {"subgraph", "end", "classDef", "class", "style", "click", "linkStyle"}
+
+_ANCHORS = {
+    "TD": ("bottom", "top"),
+    "TB": ("bottom", "top"),
+    "BT": ("top", "bottom"),
+    "LR": ("right", "left"),
+    "RL": ("left", "right"),
+}
+
+
+@dataclass
+class _Node:
+    id: str
+    label: str
+    shape: type = Box
+    w: float = 0
+    h: float = 0
+
+
+@dataclass
+class _Edge:
+    source: str
+    target: str
+    label: str | None = None
+    kind: str = "solid"
+
+
+@dataclass
+class _Graph:
+    direction: str = "TD"
+    nodes: dict[str, _Node] = field(default_factory=dict)
+    edges: list[_Edge] = field(default_factory=list)
+
+
+def parse_mermaid(text: str) -> Diagram:
+    """Parse a Mermaid flowchart into a laid-out DSL ``Diagram``.
+
+    Raises ``ValueError`` for anything outside the supported subset.
+    """
+    graph = _parse_graph(text)
+    if not graph.nodes:
+        raise ValueError("Mermaid flowchart has no nodes")
+    return _layout(graph)
+
+
+def mermaid_to_scene(text: str, *, deterministic: bool = False) -> dict[str, Any]:
+    """Compile a Mermaid flowchart straight to Excalidraw JSON."""
+    from .renderer import render_dsl
+
+    return render_dsl(parse_mermaid(text), deterministic=deterministic)
+
+
+def _statements(text: str) -> list[str]:
+    statements: list[str] = []
+    for line in text.splitlines():
+        line = line.split("%%", 1)[0].strip()
+        if not line:
+            continue
+        statements.extend(part.strip() for part in line.split(";") if part.strip())
+    return statements
+
+
+def _parse_graph(text: str) -> _Graph:
+    statements = _statements(text)
+    if not statements:
+        raise ValueError("Mermaid input is empty")
+
+    header = _HEADER_RE.match(statements[0])
+    if header is None:
+        raise ValueError("Only flowchart/graph diagrams are supported natively")
+
+    graph = _Graph(direction=(header.group(1) or "TD").upper())
+    for statement in statements[1:]:
+        _parse_statement(statement, graph)
+    return graph
+
+
+def _parse_statement(statement: str, graph: _Graph) -> None:
+    pos, previous = _parse_node(statement, 0, graph)
+    while True:
+        pos = _skip_spaces(statement, pos)
+        if pos == len(statement):
+            return
+        link = _LINK_RE.match(statement, pos)
+        if link is None:
+            raise ValueError(f"Unsupported flowchart syntax: {statement!r}")
+        kind = next(
+            name
+            for name in ("solid", "dotted", "thick")
+            if link.group(name) or link.group(f"{name}_text")
+        )
+        label = link.group("pipe_text") or link.group(f"{kind}_text")
+        pos, current = _parse_node(statement, link.end(), graph)
+        if current == previous:
+            raise ValueError("Self-referencing edges are not supported natively")
+        graph.edges.append(
+            _Edge(
+                source=previous,
+                target=current,
+                label=_clean_label(label) if label else None,
+                kind=kind,
+            )
+        )
+        previous = current
+
+
+def _parse_node(statement: str, pos: int, graph: _Graph) -> tuple[int, str]:
+    pos = _skip_spaces(statement, pos)
+    match = _ID_RE.match(statement, pos)
+    if match is None:
+        raise ValueError(f"Expected a node id in {statement!r}")
+    node_id = match.group(0)
+    if node_id in _KEYWORDS:
+        raise ValueError(f"'{node_id}' statements are not supported natively")
+    pos = match.end()
+
+    if statement.startswith(_UNSUPPORTED_OPENERS, pos):
+        raise ValueError(f"Unsupported node shape in {statement!r}")
+    for opener, closer, shape in _SHAPES:
+        if not statement.startswith(opener, pos):
+            continue
+        start = pos + len(opener)
+        if statement.startswith('"', start):
+            quote_end = statement.find('"', start + 1)
+            if quote_end == -1:
+                raise ValueError(f"Unterminated label in {statement!r}")
+            end = quote_end + 1
+        else:
+            end = start
+        close = statement.find(closer, end)
+        if close == -1:
+            raise ValueError(f"Unterminated node shape in {statement!r}")
+        label = _clean_label(statement[start:close])
+        _declare(graph, node_id, label, shape)
+        return close + len(closer), node_id
+
+    if pos < len(statement) and statement[pos] in "[({":
+        raise ValueError(f"Unsupported node shape in {statement!r}")
+    _declare(graph, node_id, None, None)
+    return pos, node_id
+
+
+def _declare(
+    graph: _Graph, node_id: str, label: str | None, shape: type | None
+) -> None:
+    node = graph.nodes.get(node_id)
+    if node is None:
+        node = _Node(id=node_id, label=node_id)
+        graph.nodes[node_id] = node
+    if label is not None:
+        node.label = label
+    if shape is not None:
+        node.shape = shape
+
+
+def _clean_label(raw: str) -> str:
+    label = raw.strip()
+    if len(label) >= 2 and label[0] == label[-1] == '"':
+        label = label[1:-1]
+    return label.replace("<br>", "\n").replace("<br/>", "\n")
+
+
+def _skip_spaces(statement: str, pos: int) -> int:
+    while pos < len(statement) and statement[pos].isspace():
+        pos += 1
+    return pos
+
+
+def _ranks(graph: _Graph) -> dict[str, int]:
+    """Longest-path layering that ignores edges closing a cycle."""
+    order = {node_id: index for index, node_id in enumerate(graph.nodes)}
+    outgoing: dict[str, list[str]] = {node_id: [] for node_id in graph.nodes}
+    for edge in graph.edges:
+        outgoing[edge.source].append(edge.target)
+
+    back_edges: set[tuple[str, str]] = set()
+    state: dict[str, int] = {}
+    for root in graph.nodes:
+        if root in state:
+            continue
+        stack = [(root, iter(outgoing[root]))]
+        state[root] = 1
+        while stack:
+            node_id, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                state[node_id] = 2
+                stack.pop()
+            elif state.get(child) == 1:
+                back_edges.add((node_id, child))
+            elif child not in state:
+                state[child] = 1
+                stack.append((child, iter(outgoing[child])))
+
+    incoming = {node_id: 0 for node_id in graph.nodes}
+    forward: dict[str, list[str]] = {node_id: [] for node_id in graph.nodes}
+    for edge in graph.edges:
+        if (edge.source, edge.target) in back_edges:
+            continue
+        forward[edge.source].append(edge.target)
+        incoming[edge.target] += 1
+
+    ranks = {node_id: 0 for node_id in graph.nodes}
+    ready = sorted((n for n, count in incoming.items() if count == 0), key=order.get)
+    while ready:
+        node_id = ready.pop(0)
+        for child in forward[node_id]:
+            ranks[child] = max(ranks[child], ranks[node_id] + 1)
+            incoming[child] -= 1
+            if incoming[child] == 0:
+                ready.append(child)
+    return ranks
+
+
+def _layers(graph: _Graph, ranks: dict[str, int]) -> list[list[str]]:
+    layers: list[list[str]] = [[] for _ in range(max(ranks.values()) + 1)]
+    for node_id in graph.nodes:
+        layers[ranks[node_id]].append(node_id)
+
+    # One barycenter sweep keeps children under their parents.
+    parents: dict[str, list[str]] = {node_id: [] for node_id in graph.nodes}
+    for edge in graph.edges:
+        if ranks[edge.source] < ranks[edge.target]:
+            parents[edge.target].append(edge.source)
+    for upper, layer in zip(layers, layers[1:]):
+        position = {node_id: index for index, node_id in enumerate(upper)}
+
+        def barycenter(node_id: str) -> float:
+            placed = [position[p] for p in parents[node_id] if p in position]
+            return sum(placed) / len(placed) if placed else float(len(upper))
+
+        layer.sort(key=barycenter)
+    return layers
+
+
+def _size(node: _Node) -> None:
+    text_w, text_h = estimate_text_size(
+        node.label, FONT_SIZE, LINE_HEIGHT, TEXT_PADDING
+    )
+    node.w = max(NODE_MIN_W, text_w + 40)
+    node.h = max(NODE_MIN_H, text_h + 20)
+    if node.shape is Diamond:
+        node.w = max(node.w, text_w * 1.6)
+        node.h = max(node.h + 20, text_h * 2)
+    elif node.shape is Ellipse:
+        node.w = max(node.w, text_w * 1.3)
+        node.h = max(node.h, text_h * 1.6)
+
+
+def _label(element_id: str, text: str, cx: float, cy: float) -> Text:
+    w, h = estimate_text_size(text, FONT_SIZE, LINE_HEIGHT, TEXT_PADDING)
+    return Text(
+        id=element_id,
+        x=cx - w / 2,
+        y=cy - h / 2,
+        w=w,
+        h=h,
+        text=text,
+        fontSize=FONT_SIZE,
+        lineHeight=LINE_HEIGHT,
+        padding=TEXT_PADDING,
+    )
+
+
+def _layout(graph: _Graph) -> Diagram:
+    for node in graph.nodes.values():
+        _size(node)
+
+    ranks = _ranks(graph)
+    layers = _layers(graph, ranks)
+    horizontal = graph.direction in {"LR", "RL"}
+    if graph.direction in {"BT", "RL"}:
+        layers.reverse()
+
+    def along(node: _Node) -> float:
+        return node.w if horizontal else node.h
+
+    def across(node: _Node) -> float:
+        return node.h if horizontal else node.w
+
+    centers: dict[str, tuple[float, float]] = {}
+    offset = 0.0
+    for layer in layers:
+        depth = max(along(graph.nodes[node_id]) for node_id in layer)
+        span = sum(across(graph.nodes[n]) for n in layer) + NODE_GAP * (len(layer) - 1)
+        cursor = -span / 2
+        for node_id in layer:
+            size = across(graph.nodes[node_id])
+            main, cross = offset + depth / 2, cursor + size / 2
+            centers[node_id] = (main, cross) if horizontal else (cross, main)
+            cursor += size + NODE_GAP
+        offset += depth + RANK_GAP
+
+    shapes: list[Element] = []
+    labels: list[Element] = []
+    for node in graph.nodes.values():
+        cx, cy = centers[node.id]
+        shapes.append(
+            node.shape(
+                id=node.id,
+                x=cx - node.w / 2,
+                y=cy - node.h / 2,
+                w=node.w,
+                h=node.h,
+            )
+        )
+        if node.label:
+            labels.append(_label(f"{node.id}__label", node.label, cx, cy))
+
+    from_side, to_side = _ANCHORS[graph.direction]
+    edges: list[Element] = []
+    for index, edge in enumerate(graph.edges, start=1):
+        overrides = None
+        if edge.kind == "dotted":
+            overrides = StyleOverrides(strokeStyle="dashed")
+        elif edge.kind == "thick":
+            overrides = StyleOverrides(strokeWidth=4)
+        edges.append(
+            Arrow(
+                id=f"edge-{index}",
+                from_=ArrowEndpoint(ref=edge.source, side=from_side),
+                to=ArrowEndpoint(ref=edge.target, side=to_side),
+                style_overrides=overrides,
+            )
+        )
+        if edge.label:
+            (sx, sy), (tx, ty) = centers[edge.source], centers[edge.target]
+            edges.append(
+                _label(f"edge-{index}__label", edge.label, (sx + tx) / 2, (sy + ty) / 2)
+            )
+
+    return Diagram(elements=shapes + labels + edges, grid=10)
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, Self
+from typing import Any, Self, Sequence
 
 
 @dataclass(frozen=True, kw_only=True)
@@ -82,7 +82,77 @@ class Arrow(BaseElement):
     to: ArrowEndpoint
 
 
-Element = Box | Ellipse | Diamond | Text | Arrow
+@dataclass(frozen=True, kw_only=True)
+class Instance(BaseElement):
+    """A copy of a named component, translated by ``x``/``y``.
+
+    Element ids become ``id_prefix`` + the template id (default: the
+    instance id and a dash) and ``id`` is used as the shared group id.
+    ``style`` and ``style_overrides`` apply on top of every non-text
+    element of the template.
+    """
+
+    component: str
+    x: float = 0
+    y: float = 0
+    id_prefix: str | None = None
+
+
+Element = Box | Ellipse | Diamond | Text | Arrow | Instance
+
+
+@dataclass(frozen=True, kw_only=True)
+class Component:
+    elements: list[Element]
+
+
+COLUMN_SHAPE_TYPES = ("box", "ellipse", "diamond")
+
+
+@dataclass(frozen=True, kw_only=True)
+class ShapeColumns:
+    """Shapes stored as parallel columns, one row per shape.
+
+    Columns may be lists, ``array.array`` or NumPy arrays. ``id`` and
+    ``style`` are optional; rows without an id get a generated one.
+    """
+
+    x: Sequence[float]
+    y: Sequence[float]
+    w: Sequence[float]
+    h: Sequence[float]
+    type: Sequence[str]
+    id: Sequence[str] | None = None
+    style: Sequence[str | None] | None = None
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+
+@dataclass(frozen=True, kw_only=True)
+class ArrowColumns:
+    """Arrows stored as parallel columns, one row per arrow.
+
+    ``from_``/``to`` hold shape ids or row numbers into the diagram's
+    ``ShapeColumns``. Sides default to ``center``.
+    """
+
+    from_: Sequence[int | str]
+    to: Sequence[int | str]
+    from_side: Sequence[str] | None = None
+    to_side: Sequence[str] | None = None
+    id: Sequence[str] | None = None
+    style: Sequence[str | None] | None = None
+
+    def __len__(self) -> int:
+        return len(self.from_)
+
+
+def column_values(values: Any, count: int = 0, default: Any = None) -> list[Any]:
+    """Column as a plain list; a missing column repeats ``default``."""
+    if values is None:
+        return [default] * count
+    return values.tolist() if hasattr(values, "tolist") else list(values)
 
 
 @dataclass(frozen=True, kw_only=True)
@@ -91,12 +161,19 @@ class Diagram:
     grid: float = 10
     styles: dict[str, StylePreset] | None = None
     fit_text: bool = False
+    deterministic: bool = False
+    shape_columns: ShapeColumns | None = None
+    arrow_columns: ArrowColumns | None = None
+    components: dict[str, Component] | None = None
 
     @classmethod
     def from_dict(cls, data: dict[str, Any]) -> "Diagram":
         if not isinstance(data, dict):
             raise ValueError("DSL root must be an object")
-        elements_raw = data.get("elements")
+        columns_raw = data.get("columns")
+        if columns_raw is not None and not isinstance(columns_raw, dict):
+            raise ValueError("columns must be an object if provided")
+        elements_raw = data.get("elements", [] if columns_raw else None)
         if not isinstance(elements_raw, list):
             raise ValueError("DSL must include an 'elements' array")
         grid = data.get("grid", 10)
@@ -112,12 +189,24 @@ class Diagram:
             for name, preset in styles_raw.items()
             if isinstance(preset, dict)
         }
+        components_raw = data.get("components", {}) or {}
+        if not isinstance(components_raw, dict):
+            raise ValueError("components must be an object if provided")
+        components = {
+            name: _component_from_dict(name, raw)
+            for name, raw in components_raw.items()
+        }
         elements = [_element_from_dict(item) for item in elements_raw]
+        columns_raw = columns_raw or {}
         return cls(
             elements=elements,
             grid=float(grid),
             styles=styles,
             fit_text=bool(data.get("fitText", False)),
+            deterministic=bool(data.get("deterministic", False)),
+            shape_columns=_shape_columns_from_dict(columns_raw.get("shapes")),
+            arrow_columns=_arrow_columns_from_dict(columns_raw.get("arrows")),
+            components=components,
         )
 
 
@@ -137,6 +226,15 @@ def _base_kwargs(raw: dict[str, Any]) -> dict[str, Any]:
     }
 
 
+def _component_from_dict(name: str, raw: dict[str, Any]) -> Component:
+    if not isinstance(raw, dict) or not isinstance(raw.get("elements"), list):
+        raise ValueError(f"Component '{name}' must include an 'elements' array")
+    elements = [_element_from_dict(item) for item in raw["elements"]]
+    if any(isinstance(element, Instance) for element in elements):
+        raise ValueError(f"Component '{name}' cannot contain instances")
+    return Component(elements=elements)
+
+
 def _element_from_dict(raw: dict[str, Any]) -> Element:
     if not isinstance(raw, dict):
         raise ValueError("Each element must be an object")
@@ -183,4 +281,71 @@ def _element_from_dict(raw: dict[str, Any]) -> Element:
             **base,
         )
 
+    if element_type == "instance":
+        component = raw.get("component")
+        if not isinstance(component, str):
+            raise ValueError("Instance must include a string 'component'")
+        x, y = raw.get("x", 0), raw.get("y", 0)
+        if not _is_number(x) or not _is_number(y):
+            raise ValueError("Instance 'x' and 'y' must be numbers")
+        return Instance(
+            component=component,
+            x=x,
+            y=y,
+            id_prefix=raw.get("idPrefix"),
+            **base,
+        )
+
     raise ValueError(f"Unsupported element type '{element_type}'")
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _columns(
+    raw: dict[str, Any],
+    table: str,
+    required: tuple[str, ...],
+    optional: tuple[str, ...],
+) -> dict[str, Any]:
+    unknown = set(raw) - set(required) - set(optional)
+    if unknown:
+        raise ValueError(f"Unknown {table} column '{sorted(unknown)[0]}'")
+    missing = [name for name in required if name not in raw]
+    if missing:
+        raise ValueError(f"{table} columns must include '{missing[0]}'")
+    columns = {name: raw[name] for name in (*required, *optional) if name in raw}
+    for name, column in columns.items():
+        if isinstance(column, (str, bytes)) or not hasattr(column, "__len__"):
+            raise ValueError(f"{table} column '{name}' must be an array")
+    if len({len(column) for column in columns.values()}) > 1:
+        raise ValueError(f"{table} columns must all have the same length")
+    return columns
+
+
+def _shape_columns_from_dict(raw: dict[str, Any] | None) -> ShapeColumns | None:
+    if raw is None:
+        return None
+    if not isinstance(raw, dict):
+        raise ValueError("columns.shapes must be an object")
+    columns = _columns(raw, "shapes", ("x", "y", "w", "h", "type"), ("id", "style"))
+    return ShapeColumns(**columns)
+
+
+def _arrow_columns_from_dict(raw: dict[str, Any] | None) -> ArrowColumns | None:
+    if raw is None:
+        return None
+    if not isinstance(raw, dict):
+        raise ValueError("columns.arrows must be an object")
+    columns = _columns(
+        raw, "arrows", ("from", "to"), ("fromSide", "toSide", "id", "style")
+    )
+    return ArrowColumns(
+        from_=columns["from"],
+        to=columns["to"],
+        from_side=columns.get("fromSide"),
+        to_side=columns.get("toSide"),
+        id=columns.get("id"),
+        style=columns.get("style"),
+    )
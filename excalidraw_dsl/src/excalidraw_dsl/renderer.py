@@ -1,14 +1,26 @@
 from __future__ import annotations
 
+import hashlib
+import json
 from typing import Any
 
-from .arrows import render_arrow
-from .model import Arrow, Diagram
-from .shapes import render_shape
+from .arrows import render_arrow, render_arrow_columns
+from .components import Template, stamp_instance
+from .model import Arrow, Diagram, Element, Instance
+from .shapes import render_shape, render_shape_columns
 from .state import RenderState
 
 
-def render_dsl(data: dict[str, Any] | Diagram) -> dict[str, Any]:
+# Base for deterministic ``updated`` timestamps (2024-01-01T00:00:00Z).
+DETERMINISTIC_EPOCH_MS = 1_704_067_200_000
+_RUNTIME_FIELDS = ("seed", "versionNonce", "updated")
+# Element dicts are built with a fixed key order, so no sort_keys is needed.
+_CONTENT_ENCODER = json.JSONEncoder(separators=(",", ":"), check_circular=False)
+
+
+def render_dsl(
+    data: dict[str, Any] | Diagram, *, deterministic: bool | None = None
+) -> dict[str, Any]:
     """Render a minimal DSL into Excalidraw JSON.
 
     Expected DSL shape:
@@ -22,6 +34,36 @@ def render_dsl(data: dict[str, Any] | Diagram) -> dict[str, Any]:
         {"type": "arrow", "from": {"ref": "a", "side": "right"}, "to": {"ref": "b", "side": "left"}},
       ]
     }
+
+    Large generated diagrams can add shapes and arrows as parallel arrays
+    under "columns" (see ``excalidraw_dsl.columnar``); they are appended
+    after "elements", shapes first:
+    {
+      "columns": {
+        "shapes": {"x": [0, 200], "y": [0, 0], "w": [120, 120], "h": [80, 80],
+                   "type": ["box", "ellipse"], "id": ["a", "b"]},
+        "arrows": {"from": [0], "to": ["b"], "fromSide": ["right"], "toSide": ["left"]}
+      }
+    }
+
+    Repeated sub-diagrams go under "components" and are placed with
+    "instance" elements. Each component is compiled once per call and its
+    elements are copied, translated and grouped for every instance:
+    {
+      "components": {"service": {"elements": [{"id": "box", "type": "box", ...}]}},
+      "elements": [
+        {"type": "instance", "component": "service", "id": "api", "x": 0, "y": 0},
+        {"type": "instance", "component": "service", "id": "db", "x": 300, "y": 0,
+         "idPrefix": "db/", "styleOverrides": {"strokeColor": "#c92a2a"}}
+      ]
+    }
+
+    With ``deterministic`` (or "deterministic": true in the DSL), each
+    element's seed, versionNonce and updated are derived from a hash of its
+    id and content instead of a counter and the clock, so the same DSL
+    always compiles to the same JSON. The result then also carries
+    "contentHash", a SHA-256 over the element hashes, which callers can
+    compare to skip unchanged diagrams.
     """
 
     diagram = data if isinstance(data, Diagram) else Diagram.from_dict(data)
@@ -31,26 +73,96 @@ def render_dsl(data: dict[str, Any] | Diagram) -> dict[str, Any]:
         styles=diagram.styles or {},
         fit_text=diagram.fit_text,
     )
+    templates: dict[str, Template] = {}
 
-    ordered: list[tuple[str, Any]] = []
-    rendered_by_id: dict[str, dict[str, Any]] = {}
+    ordered = _render_shapes(diagram, diagram.elements, state, templates)
+    column_shapes = (
+        render_shape_columns(diagram.shape_columns, state)
+        if diagram.shape_columns is not None
+        else []
+    )
+    result_elements = _render_arrows(ordered, state)
+
+    result_elements.extend(column_shapes)
+    if diagram.arrow_columns is not None:
+        result_elements.extend(render_arrow_columns(diagram.arrow_columns, state))
 
-    for element in diagram.elements:
+    if deterministic is None:
+        deterministic = diagram.deterministic
+    if deterministic:
+        return {
+            "elements": result_elements,
+            "contentHash": _derive_runtime_fields(result_elements),
+        }
+    return {"elements": result_elements}
+
+
+def _derive_runtime_fields(elements: list[dict[str, Any]]) -> str:
+    """Set seed/versionNonce/updated from each element's content; hash all."""
+    scene = hashlib.sha256()
+    for element in elements:
+        for field in _RUNTIME_FIELDS:
+            element.pop(field, None)
+        content = _CONTENT_ENCODER.encode(element)
+        digest = hashlib.sha256(content.encode("utf-8")).digest()
+        element["seed"] = int.from_bytes(digest[0:4], "big") & 0x7FFFFFFF or 1
+        element["versionNonce"] = int.from_bytes(digest[4:8], "big") & 0x7FFFFFFF
+        element["updated"] = DETERMINISTIC_EPOCH_MS + int.from_bytes(
+            digest[8:12], "big"
+        ) % (86_400_000 * 365)
+        scene.update(digest)
+    return scene.hexdigest()
+
+
+def _render_shapes(
+    diagram: Diagram,
+    elements: list[Element],
+    state: RenderState,
+    templates: dict[str, Template],
+) -> list[tuple[str, Any]]:
+    ordered: list[tuple[str, Any]] = []
+    for element in elements:
         if isinstance(element, Arrow):
             ordered.append(("arrow", element))
             continue
 
+        if isinstance(element, Instance):
+            template = templates.get(element.component)
+            if template is None:
+                template = _compile_template(diagram, element.component, state)
+                templates[element.component] = template
+            ordered.append(("instance", stamp_instance(element, template, state)))
+            continue
+
         rendered = render_shape(element, state)
-        rendered_by_id[rendered["id"]] = rendered
-        ordered.append(("shape", rendered["id"]))
+        ordered.append(("shape", rendered))
+    return ordered
+
 
+def _render_arrows(
+    ordered: list[tuple[str, Any]], state: RenderState
+) -> list[dict[str, Any]]:
     result_elements: list[dict[str, Any]] = []
     for kind, payload in ordered:
         if kind == "shape":
-            result_elements.append(rendered_by_id[payload])
-            continue
+            result_elements.append(payload)
+        elif kind == "instance":
+            result_elements.extend(payload)
+        else:
+            result_elements.append(render_arrow(payload, state))
+    return result_elements
 
-        arrow = render_arrow(payload, state)
-        result_elements.append(arrow)
 
-    return {"elements": result_elements}
+def _compile_template(diagram: Diagram, name: str, state: RenderState) -> Template:
+    component = (diagram.components or {}).get(name)
+    if component is None:
+        raise ValueError(f"Unknown component '{name}'")
+    if any(isinstance(element, Instance) for element in component.elements):
+        raise ValueError(f"Component '{name}' cannot contain instances")
+
+    template_state = RenderState(
+        grid=state.grid, styles=state.styles, fit_text=state.fit_text
+    )
+    ordered = _render_shapes(diagram, component.elements, template_state, {})
+    elements = _render_arrows(ordered, template_state)
+    return Template(elements=elements, bboxes=template_state.bboxes)
@@ -2,7 +2,15 @@ from __future__ import annotations
 
 from typing import Any
 
-from .model import Box, Diamond, Ellipse, Text
+from .model import (
+    COLUMN_SHAPE_TYPES,
+    Box,
+    Diamond,
+    Ellipse,
+    ShapeColumns,
+    Text,
+    column_values,
+)
 from .styles import TEXT_DEFAULTS, merge_style
 from .text import estimate_text_size
 from .types import BBox
@@ -19,6 +27,38 @@ def _read_box(
     return x, y, w, h
 
 
+def _shape_element(
+    element_id: str,
+    element_type: str,
+    box: tuple[float, float, float, float],
+    style: dict[str, Any],
+    state: RenderState,
+) -> dict[str, Any]:
+    """Excalidraw dict for a box, ellipse or diamond with a snapped ``box``."""
+    x, y, w, h = box
+    return {
+        "id": element_id,
+        "type": "rectangle" if element_type == "box" else element_type,
+        "x": x,
+        "y": y,
+        "width": w,
+        "height": h,
+        "angle": 0,
+        **style,
+        "groupIds": [],
+        "frameId": None,
+        "roundness": {"type": 3 if element_type == "box" else 2},
+        "seed": state.counter,
+        "version": 1,
+        "versionNonce": state.counter + 100,
+        "isDeleted": False,
+        "boundElements": None,
+        "updated": state.timestamp(),
+        "link": None,
+        "locked": False,
+    }
+
+
 def render_shape(
     element: Box | Ellipse | Diamond | Text, state: RenderState
 ) -> dict[str, Any]:
@@ -30,32 +70,9 @@ def render_shape(
     style = merge_style(element.style, element.style_overrides, state.styles)
 
     if isinstance(element, (Box, Ellipse, Diamond)):
-        x, y, w, h = _read_box(element, state)
-        excalidraw_type = "rectangle" if isinstance(element, Box) else element_type
-        roundness = {"type": 3} if isinstance(element, Box) else {"type": 2}
-
-        compiled = {
-            "id": element_id,
-            "type": excalidraw_type,
-            "x": x,
-            "y": y,
-            "width": w,
-            "height": h,
-            "angle": 0,
-            **style,
-            "groupIds": [],
-            "frameId": None,
-            "roundness": roundness,
-            "seed": state.counter,
-            "version": 1,
-            "versionNonce": state.counter + 100,
-            "isDeleted": False,
-            "boundElements": None,
-            "updated": state.timestamp(),
-            "link": None,
-            "locked": False,
-        }
-        state.bboxes[element_id] = BBox(x, y, w, h)
+        box = _read_box(element, state)
+        compiled = _shape_element(element_id, element_type, box, style, state)
+        state.bboxes[element_id] = BBox(*box)
         return compiled
 
     if isinstance(element, Text):
@@ -118,3 +135,45 @@ def render_shape(
         return compiled
 
     raise ValueError(f"Unsupported element type '{element_type}'")
+
+
+def render_shape_columns(
+    columns: ShapeColumns, state: RenderState
+) -> list[dict[str, Any]]:
+    """Render columnar shapes, snapping each coordinate column in one pass.
+
+    The snapped columns are kept on ``state.row_boxes`` for arrows to use,
+    so no per-shape model object or ``BBox`` is created.
+    """
+    xs = state.snap_all(columns.x)
+    ys = state.snap_all(columns.y)
+    ws = state.snap_all(columns.w)
+    hs = state.snap_all(columns.h)
+    count = len(xs)
+    types = column_values(columns.type)
+    ids = column_values(columns.id, count)
+    style_names = column_values(columns.style, count)
+
+    styles: dict[str | None, dict[str, Any]] = {}
+    compiled_shapes: list[dict[str, Any]] = []
+    row_ids: list[str] = []
+    for row, element_type in enumerate(types):
+        if element_type not in COLUMN_SHAPE_TYPES:
+            raise ValueError(f"Unsupported column shape type '{element_type}'")
+        element_id = ids[row] or state.next_id(element_type)
+        if not isinstance(element_id, str):
+            raise ValueError("Element id must be a string")
+        style_name = style_names[row]
+        style = styles.get(style_name)
+        if style is None:
+            style = styles[style_name] = merge_style(style_name, None, state.styles)
+
+        box = (xs[row], ys[row], ws[row], hs[row])
+        compiled_shapes.append(
+            _shape_element(element_id, element_type, box, style, state)
+        )
+        row_ids.append(element_id)
+
+    state.rows.update(zip(row_ids, range(len(row_ids))))
+    state.row_boxes = (xs, ys, ws, hs)
+    return compiled_shapes
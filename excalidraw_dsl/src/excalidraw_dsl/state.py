@@ -1,9 +1,10 @@
 from __future__ import annotations
 
+import sys
 from time import time
-from typing import Any
+from typing import Any, Sequence
 
-from .types import BBox
+from .types import BBox, anchor
 
 
 class RenderState:
@@ -14,6 +15,9 @@ class RenderState:
         self.counter = 1
         self.start_time = int(time() * 1000)
         self.bboxes: dict[str, BBox] = {}
+        # Columnar shapes keep their boxes as parallel lists instead of BBoxes.
+        self.rows: dict[str, int] = {}
+        self.row_boxes: tuple[list[float], ...] = ([], [], [], [])
 
     def next_id(self, prefix: str) -> str:
         value = f"{prefix}-{self.counter}"
@@ -29,3 +33,36 @@ class RenderState:
         if self.grid == 0:
             return value
         return round(value / self.grid) * self.grid
+
+    def snap_all(self, values: Sequence[float]) -> list[float]:
+        """Snap a whole column, vectorised when it is a NumPy array."""
+        grid = self.grid
+        numpy = sys.modules.get("numpy")
+        if numpy is not None and isinstance(values, numpy.ndarray):
+            snapped = values.astype(float)
+            if grid != 0:
+                snapped = numpy.round(snapped / grid) * grid
+            return snapped.tolist()
+        if grid == 0:
+            return [float(value) for value in values]
+        return [round(value / grid) * grid for value in values]
+
+    def anchor(self, ref: str | int, side: str) -> tuple[float, float]:
+        """Anchor point on a shape given by id or columnar row number."""
+        if not isinstance(side, str):
+            raise ValueError("Arrow sides must be strings")
+        if isinstance(ref, str):
+            bbox = self.bboxes.get(ref)
+            if bbox is not None:
+                return bbox.anchor(side)
+            row = self.rows.get(ref)
+            if row is None:
+                raise ValueError("Arrow refs must point to existing elements")
+        elif type(ref) is int:
+            row = ref
+            if not 0 <= row < len(self.row_boxes[0]):
+                raise ValueError(f"Arrow row ref {row} is out of range")
+        else:
+            raise ValueError("Arrow refs must be element ids or integer row numbers")
+        xs, ys, ws, hs = self.row_boxes
+        return anchor(xs[row], ys[row], ws[row], hs[row], side)
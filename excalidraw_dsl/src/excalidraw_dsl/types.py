@@ -3,6 +3,21 @@ from __future__ import annotations
 from dataclasses import dataclass
 
 
+def anchor(x: float, y: float, w: float, h: float, side: str) -> tuple[float, float]:
+    side = side.lower()
+    if side == "left":
+        return x, y + h / 2
+    if side == "right":
+        return x + w, y + h / 2
+    if side == "top":
+        return x + w / 2, y
+    if side == "bottom":
+        return x + w / 2, y + h
+    if side == "center":
+        return x + w / 2, y + h / 2
+    raise ValueError(f"Unknown side '{side}'")
+
+
 @dataclass
 class BBox:
     x: float
@@ -11,15 +26,4 @@ class BBox:
     h: float
 
     def anchor(self, side: str) -> tuple[float, float]:
-        side = side.lower()
-        if side == "left":
-            return self.x, self.y + self.h / 2
-        if side == "right":
-            return self.x + self.w, self.y + self.h / 2
-        if side == "top":
-            return self.x + self.w / 2, self.y
-        if side == "bottom":
-            return self.x + self.w / 2, self.y + self.h
-        if side == "center":
-            return self.x + self.w / 2, self.y + self.h / 2
-        raise ValueError(f"Unknown side '{side}'")
+        return anchor(self.x, self.y, self.w, self.h, side)
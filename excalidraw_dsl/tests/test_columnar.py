@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from array import array
+from pathlib import Path
+
+import pytest
+
+from excalidraw_dsl import load_columnar, render_dsl, save_columnar
+
+STYLES = {"primary": {"strokeColor": "#1971c2"}}
+
+COLUMNAR = {
+    "grid": 10,
+    "styles": STYLES,
+    "columns": {
+        "shapes": {
+            "id": ["a", "b", "c"],
+            "type": ["box", "ellipse", "diamond"],
+            "x": [3, 203, 403],
+            "y": [7, 7, 12],
+            "w": [120, 120, 80],
+            "h": [80, 80, 80],
+            "style": ["primary", None, None],
+        },
+        "arrows": {
+            "from": [0, "b"],
+            "to": ["b", 2],
+            "fromSide": ["right", "right"],
+            "toSide": ["left", "left"],
+        },
+    },
+}
+
+
+def _strip_runtime_fields(elements: list[dict]) -> list[dict]:
+    drop_keys = {"seed", "versionNonce", "updated"}
+    return [{k: v for k, v in el.items() if k not in drop_keys} for el in elements]
+
+
+def test_columns_render_like_elements() -> None:
+    shapes = COLUMNAR["columns"]["shapes"]
+    elements = [
+        {
+            "id": shapes["id"][row],
+            "type": shapes["type"][row],
+            "x": shapes["x"][row],
+            "y": shapes["y"][row],
+            "w": shapes["w"][row],
+            "h": shapes["h"][row],
+            "style": shapes["style"][row],
+        }
+        for row in range(3)
+    ] + [
+        {
+            "type": "arrow",
+            "from": {"ref": source, "side": "right"},
+            "to": {"ref": target, "side": "left"},
+        }
+        for source, target in (("a", "b"), ("b", "c"))
+    ]
+
+    expected = render_dsl({"grid": 10, "styles": STYLES, "elements": elements})
+    rendered = render_dsl(COLUMNAR)
+
+    assert _strip_runtime_fields(rendered["elements"]) == _strip_runtime_fields(
+        expected["elements"]
+    )
+
+
+def test_binary_round_trip(tmp_path: Path) -> None:
+    path = tmp_path / "diagram.dsl.bin"
+    save_columnar(COLUMNAR, path)
+
+    diagram = load_columnar(path)
+
+    assert isinstance(diagram.shape_columns.x, array)
+    assert diagram.arrow_columns.from_ == [0, "b"]
+    assert _strip_runtime_fields(render_dsl(diagram)["elements"]) == (
+        _strip_runtime_fields(render_dsl(COLUMNAR)["elements"])
+    )
+
+
+@pytest.mark.parametrize(
+    ("shapes", "message"),
+    [
+        ({"x": [0], "y": [0], "w": [10], "h": [10, 20], "type": ["box"]}, "length"),
+        ({"x": [0], "y": [0], "w": [10], "h": [10]}, "type"),
+        ({"x": [0], "y": [0], "w": [10], "h": [10], "type": ["text"]}, "text"),
+    ],
+)
+def test_invalid_columns(shapes: dict, message: str) -> None:
+    with pytest.raises(ValueError, match=message):
+        render_dsl({"columns": {"shapes": shapes}})
+
+
+def test_arrow_row_refs_are_bounds_checked() -> None:
+    shapes = {"x": [0], "y": [0], "w": [10], "h": [10], "type": ["box"]}
+    with pytest.raises(ValueError, match="out of range"):
+        render_dsl({"columns": {"shapes": shapes, "arrows": {"from": [0], "to": [1]}}})
+
+
+@pytest.mark.parametrize("ref", [1.0, True, None])
+def test_arrow_row_refs_must_be_ids_or_ints(ref: object) -> None:
+    shapes = {"x": [0, 20], "y": [0, 0], "w": [10, 10], "h": [10, 10]}
+    shapes["type"] = ["box", "box"]
+    arrows = {"from": [ref], "to": [0]}
+    with pytest.raises(ValueError, match="integer row numbers"):
+        render_dsl({"columns": {"shapes": shapes, "arrows": arrows}})
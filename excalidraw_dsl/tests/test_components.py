@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import pytest
+
+from excalidraw_dsl import render_dsl
+from excalidraw_dsl import renderer
+
+SERVICE = {
+    "elements": [
+        {"id": "box", "type": "box", "x": 0, "y": 0, "w": 120, "h": 80},
+        {"id": "label", "type": "text", "x": 10, "y": 30, "text": "svc"},
+        {"id": "health", "type": "ellipse", "x": 100, "y": -10, "w": 20, "h": 20},
+        {
+            "id": "ping",
+            "type": "arrow",
+            "from": {"ref": "box", "side": "top"},
+            "to": {"ref": "health", "side": "left"},
+        },
+    ]
+}
+
+SERVICE_IDS = ("box", "label", "health", "ping")
+
+
+def _diagram() -> dict:
+    return {
+        "grid": 10,
+        "components": {"service": SERVICE},
+        "elements": [
+            {"type": "instance", "component": "service", "id": "api"},
+            {
+                "type": "instance",
+                "component": "service",
+                "id": "db",
+                "idPrefix": "db/",
+                "x": 300,
+                "y": 200,
+                "styleOverrides": {"strokeColor": "#c92a2a"},
+            },
+            {
+                "id": "calls",
+                "type": "arrow",
+                "from": {"ref": "api-box", "side": "right"},
+                "to": {"ref": "db/box", "side": "left"},
+            },
+        ],
+    }
+
+
+def test_instances_are_translated_prefixed_and_grouped() -> None:
+    by_id = {el["id"]: el for el in render_dsl(_diagram())["elements"]}
+
+    assert set(by_id) == {
+        "api-box",
+        "api-label",
+        "api-health",
+        "api-ping",
+        "db/box",
+        "db/label",
+        "db/health",
+        "db/ping",
+        "calls",
+    }
+    assert (by_id["db/box"]["x"], by_id["db/box"]["y"]) == (300, 200)
+    assert by_id["db/ping"]["points"] == by_id["api-ping"]["points"]
+    assert by_id["db/ping"]["points"] is not by_id["api-ping"]["points"]
+    assert {by_id[f"api-{name}"]["groupIds"][0] for name in SERVICE_IDS} == {"api"}
+    assert {by_id[f"db/{name}"]["groupIds"][0] for name in SERVICE_IDS} == {"db"}
+
+    assert by_id["db/box"]["strokeColor"] == "#c92a2a"
+    assert by_id["db/label"]["strokeColor"] == "#1e1e1e"
+    assert by_id["api-box"]["strokeColor"] == "#1e1e1e"
+
+    # The outer arrow binds to the translated instance boxes.
+    assert (by_id["calls"]["x"], by_id["calls"]["y"]) == (120, 40)
+    assert (by_id["calls"]["width"], by_id["calls"]["height"]) == (180, 200)
+
+
+def test_templates_compile_once(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls = []
+    render_shape = renderer.render_shape
+
+    def counting_render_shape(element, state):
+        calls.append(element.id)
+        return render_shape(element, state)
+
+    monkeypatch.setattr(renderer, "render_shape", counting_render_shape)
+    data = _diagram()
+    data["elements"] += [
+        {"type": "instance", "component": "service", "x": index * 200, "y": 600}
+        for index in range(10)
+    ]
+
+    elements = render_dsl(data)["elements"]
+
+    assert calls == ["box", "label", "health"]
+    assert len(elements) == 12 * 4 + 1
+    assert len({el["id"] for el in elements}) == len(elements)
+
+
+def test_unknown_component() -> None:
+    with pytest.raises(ValueError, match="Unknown component 'missing'"):
+        render_dsl({"elements": [{"type": "instance", "component": "missing"}]})
+
+
+@pytest.mark.parametrize("position", [{"x": "10"}, {"y": None}, {"x": True}])
+def test_instance_position_must_be_numeric(position: dict) -> None:
+    instance = {"type": "instance", "component": "service", **position}
+    with pytest.raises(ValueError, match="must be numbers"):
+        render_dsl({**_diagram(), "elements": [instance]})
+
+
+def test_components_cannot_nest() -> None:
+    nested = {"elements": [{"type": "instance", "component": "service"}]}
+    with pytest.raises(ValueError, match="cannot contain instances"):
+        render_dsl({"components": {"outer": nested}, "elements": []})
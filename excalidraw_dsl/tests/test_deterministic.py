@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import copy
+import json
+
+from excalidraw_dsl import Diagram, mermaid_to_scene, render_dsl
+
+DSL = {
+    "grid": 10,
+    "elements": [
+        {"id": "a", "type": "box", "x": 0, "y": 0, "w": 100, "h": 60},
+        {"id": "b", "type": "box", "x": 200, "y": 0, "w": 100, "h": 60},
+        {"type": "arrow", "from": {"ref": "a"}, "to": {"ref": "b"}},
+    ],
+}
+
+
+def test_same_dsl_compiles_to_identical_json() -> None:
+    first = render_dsl(DSL, deterministic=True)
+    second = render_dsl(Diagram.from_dict({**DSL, "deterministic": True}))
+
+    assert json.dumps(first) == json.dumps(second)
+    assert len(first["contentHash"]) == 64
+    assert "contentHash" not in render_dsl(DSL)
+
+
+def test_runtime_fields_follow_element_content() -> None:
+    moved = copy.deepcopy(DSL)
+    moved["elements"][1]["x"] = 400
+
+    before = render_dsl(DSL, deterministic=True)
+    after = render_dsl(moved, deterministic=True)
+
+    assert before["contentHash"] != after["contentHash"]
+    fields, moved_fields = (
+        [(el["seed"], el["versionNonce"], el["updated"]) for el in scene["elements"]]
+        for scene in (before, after)
+    )
+    assert fields[0] == moved_fields[0]
+    assert fields[1] != moved_fields[1]
+    assert fields[2] != moved_fields[2]
+
+
+def test_mermaid_scene_is_deterministic() -> None:
+    text = "graph LR; A-->B"
+    assert mermaid_to_scene(text, deterministic=True) == mermaid_to_scene(
+        text, deterministic=True
+    )
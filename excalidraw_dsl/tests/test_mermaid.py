@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import pytest
+
+from excalidraw_dsl import Arrow, Diamond, Ellipse, Text, mermaid_to_scene, parse_mermaid
+
+
+def test_parse_flowchart_shapes_and_edges() -> None:
+    diagram = parse_mermaid(
+        """
+        flowchart TD
+          A[Start] --> B{Decision}
+          B -->|Yes| C((Done))
+          B -- No --> A
+        """
+    )
+
+    by_id = {element.id: element for element in diagram.elements}
+    assert isinstance(by_id["B"], Diamond)
+    assert isinstance(by_id["C"], Ellipse)
+    assert isinstance(by_id["edge-2__label"], Text)
+    assert by_id["edge-2__label"].text == "Yes"
+    arrows = [element for element in diagram.elements if isinstance(element, Arrow)]
+    assert [(a.from_.ref, a.to.ref) for a in arrows] == [
+        ("A", "B"),
+        ("B", "C"),
+        ("B", "A"),
+    ]
+    # Ranks grow downwards for TD; the back edge to A does not pull it down.
+    assert by_id["A"].y < by_id["B"].y < by_id["C"].y
+
+
+def test_mermaid_to_scene_compiles_all_elements() -> None:
+    scene = mermaid_to_scene("graph LR; A-->B; B-.->C")
+
+    types = [element["type"] for element in scene["elements"]]
+    assert types.count("rectangle") == 3
+    assert types.count("arrow") == 2
+    dotted = next(el for el in scene["elements"] if el["id"] == "edge-2")
+    assert dotted["strokeStyle"] == "dashed"
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "sequenceDiagram\n  A->>B: hi",
+        "graph TD\n  A --- B",
+        "graph TD\n  subgraph one\n  A --> B\n  end",
+        "graph TD\n  A --> A",
+        "graph TD\n  A[(db)] --> B",
+        "graph TD\n  A[/in/] --> B",
+        "graph TD\n  A[\\out\\] --> B",
+        "graph TD\n  A>flag] --> B",
+        "graph TD\n  A[[sub]] --> B",
+        "graph TD\n  A{{hex}} --> B",
+        "graph TD\n  A(((stop))) --> B",
+    ],
+)
+def test_unsupported_syntax_raises(source: str) -> None:
+    with pytest.raises(ValueError):
+        parse_mermaid(source)
@@ -1,5 +1,44 @@
 """Utilities for rendering Excalidraw scenes via the local API."""
 
-from .client import render_mermaid, render_png
+from __future__ import annotations
 
-__all__ = ["render_mermaid", "render_png"]
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .balancer import EndpointPool
+    from .client import render_diagram, render_frames, render_mermaid, render_png
+    from .session import RenderSession
+
+# Names are imported from their modules on first access, so ``import
+# excalidraw_renderer`` stays cheap for command-line startup.
+_EXPORTS = {
+    "EndpointPool": "balancer",
+    "RenderSession": "session",
+    "render_diagram": "client",
+    "render_frames": "client",
+    "render_mermaid": "client",
+    "render_png": "client",
+}
+
+__all__ = [
+    "EndpointPool",
+    "RenderSession",
+    "render_diagram",
+    "render_frames",
+    "render_mermaid",
+    "render_png",
+]
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted([*globals(), *__all__])
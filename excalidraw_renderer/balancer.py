@@ -0,0 +1,242 @@
+"""Spread render requests across several render servers.
+
+An ``EndpointPool`` can be passed anywhere an ``endpoint`` URL is accepted.
+Each request goes to the healthy endpoint with the fewest requests in
+flight. An endpoint that fails ``eject_after`` times in a row is taken out
+of rotation for ``eject_for`` seconds; while the pool is running, a
+background thread probes every server's ``/api/health`` route, ejecting
+servers that stop answering and keeping them out until they answer again.
+A healthy probe never cuts an ejection short: a server can pass its health
+check while its renders keep failing.
+"""
+
+from __future__ import annotations
+
+import http.client
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from dataclasses import dataclass
+from typing import Callable, Iterable, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class EndpointStats:
+    url: str
+    healthy: bool
+    outstanding: int
+    requests: int
+    failures: int
+    bytes: int
+    busy: float
+    throughput: float
+
+
+class _Endpoint:
+    def __init__(self, url: str) -> None:
+        self.url = url
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.bytes = 0
+        self.busy = 0.0
+        self.picked = 0
+
+
+class EndpointPool:
+    """Least-outstanding-requests balancing over several endpoint URLs.
+
+    All URLs should point at the same route (e.g. ``/api/render``) on
+    different servers. Use the pool as a context manager, or call
+    ``start``/``close``, to run health checks every ``health_interval``
+    seconds; either way, ejected endpoints return after ``eject_for``
+    seconds at the earliest.
+    """
+
+    def __init__(
+        self,
+        endpoints: Iterable[str],
+        *,
+        eject_after: int = 3,
+        eject_for: float = 30.0,
+        health_interval: float = 5.0,
+        health_path: str = "/api/health",
+        health_timeout: float = 2.0,
+    ) -> None:
+        self._endpoints = [_Endpoint(url) for url in dict.fromkeys(endpoints)]
+        if not self._endpoints:
+            raise ValueError("EndpointPool needs at least one endpoint")
+        self.eject_after = eject_after
+        self.eject_for = eject_for
+        self.health_interval = health_interval
+        self.health_path = health_path
+        self.health_timeout = health_timeout
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._started = time.monotonic()
+        self._picks = 0
+
+    @property
+    def urls(self) -> list[str]:
+        return [endpoint.url for endpoint in self._endpoints]
+
+    def __enter__(self) -> "EndpointPool":
+        return self.start()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def start(self) -> "EndpointPool":
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._health_loop, daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def call(
+        self,
+        func: Callable[[str, float | None], T],
+        *,
+        size: Callable[[T], int],
+        timeout: float | None = None,
+    ) -> T:
+        """Run ``func(url, timeout)`` on the least loaded endpoint.
+
+        Retryable ``RenderError``s (connection failures, timeouts, ``429``
+        and ``5xx``) count against the endpoint and the request moves on to
+        the next endpoint it has not tried yet. Other errors, such as a
+        ``400`` for a bad scene, say nothing about the server's health: they
+        are raised directly without counting towards ejection.
+
+        ``timeout`` bounds the whole call: each attempt gets what is left of
+        it, and no endpoint is tried once it has run out.
+        """
+        from .client import RenderError
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        tried: set[str] = set()
+        while True:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            endpoint = self._acquire(tried)
+            tried.add(endpoint.url)
+            start = time.perf_counter()
+            try:
+                result = func(endpoint.url, remaining)
+            except RenderError as exc:
+                ok = False if exc.retryable else None
+                self._release(endpoint, time.perf_counter() - start, 0, ok=ok)
+                if not exc.retryable or len(tried) == len(self._endpoints):
+                    raise
+                if deadline is not None and deadline <= time.monotonic():
+                    raise
+                continue
+            except BaseException:
+                self._release(endpoint, time.perf_counter() - start, 0, ok=None)
+                raise
+            self._release(endpoint, time.perf_counter() - start, size(result), ok=True)
+            return result
+
+    def stats(self) -> list[EndpointStats]:
+        now = time.monotonic()
+        elapsed = max(now - self._started, 1e-9)
+        with self._lock:
+            return [
+                EndpointStats(
+                    url=endpoint.url,
+                    healthy=endpoint.ejected_until <= now,
+                    outstanding=endpoint.outstanding,
+                    requests=endpoint.requests,
+                    failures=endpoint.failures,
+                    bytes=endpoint.bytes,
+                    busy=endpoint.busy,
+                    throughput=(endpoint.requests - endpoint.failures) / elapsed,
+                )
+                for endpoint in self._endpoints
+            ]
+
+    def report(self) -> str:
+        lines = [
+            f"{'endpoint':<44}{'state':>9}{'requests':>10}{'failed':>8}"
+            f"{'req/s':>9}{'mean ms':>9}"
+        ]
+        for item in self.stats():
+            mean = item.busy / item.requests * 1000 if item.requests else 0.0
+            lines.append(
+                f"{item.url:<44}{'up' if item.healthy else 'ejected':>9}"
+                f"{item.requests:>10}{item.failures:>8}"
+                f"{item.throughput:>9.2f}{mean:>9.1f}"
+            )
+        return "\n".join(lines)
+
+    def _acquire(self, tried: set[str]) -> _Endpoint:
+        now = time.monotonic()
+        with self._lock:
+            candidates = [e for e in self._endpoints if e.url not in tried]
+            healthy = [e for e in candidates if e.ejected_until <= now]
+            if healthy:
+                endpoint = min(healthy, key=lambda e: (e.outstanding, e.picked))
+            else:
+                # Everything is ejected: try whichever comes back first.
+                endpoint = min(candidates, key=lambda e: e.ejected_until)
+            self._picks += 1
+            endpoint.picked = self._picks
+            endpoint.outstanding += 1
+            return endpoint
+
+    def _release(
+        self, endpoint: _Endpoint, seconds: float, nbytes: int, *, ok: bool | None
+    ) -> None:
+        # ``ok=None`` completes the request without judging the endpoint.
+        with self._lock:
+            endpoint.outstanding -= 1
+            endpoint.requests += 1
+            endpoint.busy += seconds
+            endpoint.bytes += nbytes
+            if ok is None:
+                return
+            if ok:
+                endpoint.consecutive_failures = 0
+                return
+            endpoint.failures += 1
+            self._failed(endpoint)
+
+    def _failed(self, endpoint: _Endpoint) -> None:
+        endpoint.consecutive_failures += 1
+        if endpoint.consecutive_failures >= self.eject_after:
+            endpoint.ejected_until = time.monotonic() + self.eject_for
+
+    def _health_loop(self) -> None:
+        while not self._stop.wait(self.health_interval):
+            for endpoint in self._endpoints:
+                healthy = self._probe(endpoint.url)
+                with self._lock:
+                    if not healthy:
+                        self._failed(endpoint)
+                    elif endpoint.ejected_until <= time.monotonic():
+                        endpoint.consecutive_failures = 0
+
+    def _probe(self, url: str) -> bool:
+        parts = urllib.parse.urlsplit(url)
+        health_url = urllib.parse.urlunsplit(
+            (parts.scheme, parts.netloc, self.health_path, "", "")
+        )
+        try:
+            with urllib.request.urlopen(
+                health_url, timeout=self.health_timeout
+            ) as response:
+                return response.status == 200
+        except (urllib.error.URLError, http.client.HTTPException, OSError):
+            return False
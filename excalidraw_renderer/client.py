@@ -1,72 +1,140 @@
 from __future__ import annotations
 
+import base64
+import hashlib
+import http.client
 import json
-import urllib.request
+import re
+import socket
 from pathlib import Path
-from typing import Any
+from typing import IO, TYPE_CHECKING, Any, Union
+
+from .metrics import RequestTiming, parse_server_timing
+from .session import Response
+
+if TYPE_CHECKING:
+    from excalidraw_dsl import Diagram
+
+    from .balancer import EndpointPool
+    from .concurrency import AdaptiveLimiter
+    from .metrics import RenderMetrics
+    from .optimize import PngOptimizer
+    from .policy import RequestPolicy
+    from .session import RenderSession
+
+# A scene is a path to Excalidraw JSON, the JSON itself as bytes or a binary
+# stream, a loaded dict, or an ``excalidraw_dsl.Diagram`` compiled on the fly.
+SceneInput = Union[str, Path, bytes, IO[bytes], dict[str, Any], "Diagram"]
+# Outputs are written to a path or a writable binary stream; ``None`` makes
+# the render functions return the PNG bytes instead.
+Output = Union[str, Path, IO[bytes], None]
+# Before Python 3.10, socket.timeout is not a subclass of TimeoutError.
+_TIMEOUT_ERRORS = (TimeoutError, socket.timeout)
+
+
+class RenderError(RuntimeError):
+    """A render request was rejected by the server or could not be sent.
+
+    ``status`` is the HTTP status code, or ``None`` when the server could not
+    be reached at all. ``retry_after`` is the server's ``Retry-After`` hint
+    in seconds, if it sent one.
+    """
+
+    def __init__(
+        self,
+        message: str,
+        *,
+        status: int | None = None,
+        retry_after: float | None = None,
+    ) -> None:
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        return self.status is None or self.status == 429 or self.status >= 500
 
 
 def render_png(
-    input_path: str | Path,
-    output_path: str | Path,
+    input_path: SceneInput,
+    output_path: Output = None,
     *,
-    endpoint: str = "http://localhost:3000/api/render",
+    endpoint: str | EndpointPool = "http://localhost:3000/api/render",
     export_scale: float | None = None,
     export_padding: float | None = None,
     max_size: float | None = None,
     quality: float | None = None,
     background_color: str | None = None,
     dark_mode: bool = False,
-) -> None:
-    """Render an Excalidraw JSON file to PNG using the local render API."""
+    session: RenderSession | None = None,
+    metrics: RenderMetrics | None = None,
+    skip_unchanged: bool = False,
+    timeout: float | None = None,
+    policy: RequestPolicy | None = None,
+    limiter: AdaptiveLimiter | None = None,
+    optimizer: PngOptimizer | None = None,
+) -> bytes | None:
+    """Render an Excalidraw scene to PNG.
 
-    input_path = Path(input_path)
-    output_path = Path(output_path)
+    ``input_path`` may be a file path, JSON bytes, a binary stream, a scene
+    dict or an ``excalidraw_dsl.Diagram``. The PNG is written to
+    ``output_path`` (a path or writable binary stream); when it is ``None``
+    the PNG bytes are returned instead. ``endpoint`` is a URL or an
+    ``EndpointPool`` spreading requests over several servers.
 
-    with input_path.open("r", encoding="utf-8") as handle:
-        payload: dict[str, Any] = json.load(handle)
+    With ``metrics``, per-stage durations and byte counts are recorded. With
+    ``skip_unchanged``, the ETag of the previous render is sent along and an
+    existing output file is kept when the server answers ``304 Not Modified``.
+    Deterministically compiled scenes carry a ``contentHash``; when it and
+    the export options match the previous render, no request is sent.
+    ``timeout`` bounds the request in seconds; a shared ``RequestPolicy``
+    adds a batch deadline, retries and hedging, and a shared
+    ``AdaptiveLimiter`` caps how many requests are in flight at once. With a
+    ``PngOptimizer``, the PNG is re-encoded losslessly in its process pool.
+    """
 
-    if export_scale is not None:
-        payload["exportScale"] = export_scale
-    if export_padding is not None:
-        payload["exportPadding"] = export_padding
-    if max_size is not None:
-        payload["maxSize"] = max_size
-    if quality is not None:
-        payload["quality"] = quality
-    if background_color is not None:
-        payload["backgroundColor"] = background_color
-    if dark_mode:
-        payload["darkMode"] = True
+    timing = RequestTiming(
+        str(input_path) if isinstance(input_path, (str, Path)) else "<scene>"
+    )
+    payload, content_hash = _scene_request(
+        input_path,
+        timing=timing,
+        export_scale=export_scale,
+        export_padding=export_padding,
+        max_size=max_size,
+        quality=quality,
+        background_color=background_color,
+        dark_mode=dark_mode,
+    )
 
-    data = json.dumps(payload).encode("utf-8")
-    request = urllib.request.Request(
+    png_bytes = _post_to_output(
         endpoint,
-        data=data,
-        headers={"Content-Type": "application/json"},
-        method="POST",
+        payload,
+        output_path,
+        session,
+        timing,
+        skip_unchanged,
+        content_key=(
+            _content_key(content_hash, payload)
+            if skip_unchanged and content_hash is not None
+            else None
+        ),
+        timeout=timeout,
+        policy=policy,
+        limiter=limiter,
+        optimizer=optimizer,
     )
-
-    try:
-        with urllib.request.urlopen(request) as response:
-            if response.status != 200:
-                raise RuntimeError(f"Render failed with status {response.status}")
-            png_bytes = response.read()
-    except urllib.error.HTTPError as exc:  # pyright: ignore[reportAttributeAccessIssue]
-        detail = exc.read().decode("utf-8")
-        raise RuntimeError(f"Render failed: {detail}") from exc
-    except urllib.error.URLError as exc:  # pyright: ignore[reportAttributeAccessIssue]
-        raise RuntimeError(f"Could not reach renderer: {exc}") from exc
-
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    output_path.write_bytes(png_bytes)
+    if metrics is not None:
+        metrics.record(timing)
+    return png_bytes
 
 
 def render_mermaid(
-    mermaid: str | Path,
-    output_path: str | Path,
+    mermaid: str | Path | bytes | IO[bytes],
+    output_path: Output = None,
     *,
-    endpoint: str = "http://localhost:3000/api/render-mermaid",
+    endpoint: str | EndpointPool = "http://localhost:3000/api/render-mermaid",
     config: dict[str, Any] | None = None,
     export_scale: float | None = None,
     export_padding: float | None = None,
@@ -74,19 +142,351 @@ def render_mermaid(
     quality: float | None = None,
     background_color: str | None = None,
     dark_mode: bool = False,
-) -> None:
-    """Render a Mermaid diagram to PNG using the local render API."""
+    session: RenderSession | None = None,
+    metrics: RenderMetrics | None = None,
+    skip_unchanged: bool = False,
+    timeout: float | None = None,
+    policy: RequestPolicy | None = None,
+    limiter: AdaptiveLimiter | None = None,
+    optimizer: PngOptimizer | None = None,
+) -> bytes | None:
+    """Render a Mermaid diagram to PNG using the local render API.
+
+    ``mermaid`` is a file path, the diagram text (as ``str`` or ``bytes``) or
+    a binary stream. Outputs are handled as in ``render_png``.
+    """
 
-    if isinstance(mermaid, Path) or Path(str(mermaid)).exists():
-        mermaid_text = Path(mermaid).read_text(encoding="utf-8")
+    timing = RequestTiming(str(mermaid) if isinstance(mermaid, Path) else "<mermaid>")
+    payload = _mermaid_payload(
+        mermaid,
+        timing=timing,
+        config=config,
+        export_scale=export_scale,
+        export_padding=export_padding,
+        max_size=max_size,
+        quality=quality,
+        background_color=background_color,
+        dark_mode=dark_mode,
+    )
+
+    png_bytes = _post_to_output(
+        endpoint,
+        payload,
+        output_path,
+        session,
+        timing,
+        skip_unchanged,
+        timeout=timeout,
+        policy=policy,
+        limiter=limiter,
+        optimizer=optimizer,
+    )
+    if metrics is not None:
+        metrics.record(timing)
+    return png_bytes
+
+
+def render_diagram(
+    diagram: Diagram | dict[str, Any],
+    output_path: Output = None,
+    **options: Any,
+) -> bytes | None:
+    """Compile an ``excalidraw_dsl`` diagram (or DSL dict) and render it.
+
+    Nothing touches the disk unless ``output_path`` is a file path; by
+    default the PNG bytes are returned. ``options`` are passed to
+    ``render_png``.
+    """
+    from excalidraw_dsl import Diagram
+
+    if isinstance(diagram, dict):
+        diagram = Diagram.from_dict(diagram)
+    return render_png(diagram, output_path, **options)
+
+
+def render_frames(
+    input_path: SceneInput,
+    output_dir: str | Path | None = None,
+    *,
+    stem: str | None = None,
+    endpoint: str | EndpointPool = "http://localhost:3000/api/render",
+    export_scale: float | None = None,
+    export_padding: float | None = None,
+    max_size: float | None = None,
+    quality: float | None = None,
+    background_color: str | None = None,
+    dark_mode: bool = False,
+    session: RenderSession | None = None,
+    metrics: RenderMetrics | None = None,
+    timeout: float | None = None,
+    policy: RequestPolicy | None = None,
+    limiter: AdaptiveLimiter | None = None,
+    optimizer: PngOptimizer | None = None,
+) -> dict[str, bytes]:
+    """Render every Excalidraw frame of a scene to its own PNG.
+
+    The scene is sent once; the server loads it into one page and exports
+    each frame with the elements whose ``frameId`` points at it. Returns the
+    PNGs keyed by frame name, made file-safe and unique (unnamed frames use
+    their id). With ``output_dir``, each is also written to
+    ``<stem>-<frame-name>.png``; ``stem`` defaults to the input file's stem.
+    """
+    timing = RequestTiming(
+        str(input_path) if isinstance(input_path, (str, Path)) else "<scene>"
+    )
+    payload = _scene_payload(
+        input_path,
+        timing=timing,
+        export_scale=export_scale,
+        export_padding=export_padding,
+        max_size=max_size,
+        quality=quality,
+        background_color=background_color,
+        dark_mode=dark_mode,
+    )
+    payload["frames"] = True
+    response = _post_json(
+        endpoint,
+        payload,
+        session,
+        timing,
+        timeout=timeout,
+        policy=policy,
+        limiter=limiter,
+    )
+    frames = _frame_pngs(json.loads(response.body)["frames"])
+    timing.lap("decode")
+
+    if output_dir is None:
+        if optimizer is not None:
+            frames = {name: optimizer.optimize(png) for name, png in frames.items()}
     else:
-        mermaid_text = str(mermaid)
+        if stem is None:
+            is_path = isinstance(input_path, (str, Path))
+            stem = Path(input_path).stem if is_path else "scene"
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        for name, png in frames.items():
+            path = output_dir / f"{stem}-{name}.png"
+            path.write_bytes(png)
+            timing.lap("write", len(png))
+            if optimizer is not None:
+                optimizer.submit(path)
+    if metrics is not None:
+        metrics.record(timing)
+    return frames
+
+
+_UNSAFE_NAME = re.compile(r"[^\w.-]+")
+
+
+def _frame_pngs(frames: list[dict[str, Any]]) -> dict[str, bytes]:
+    pngs: dict[str, bytes] = {}
+    for frame in frames:
+        base = _UNSAFE_NAME.sub("-", frame.get("name") or "").strip("-.")
+        base = base or _UNSAFE_NAME.sub("-", frame["id"]).strip("-.") or "frame"
+        name, suffix = base, 1
+        while name in pngs:
+            suffix += 1
+            name = f"{base}-{suffix}"
+        pngs[name] = base64.b64decode(frame["png"])
+    return pngs
 
-    output_path = Path(output_path)
-    payload: dict[str, Any] = {"mermaid": mermaid_text}
 
+def _etag_path(output_path: Path) -> Path:
+    return output_path.with_name(output_path.name + ".etag")
+
+
+# The ETag sidecar holds the server's ETag and, for scenes with a
+# ``contentHash``, a second line with the content key of that render.
+def _read_etag(etag_path: Path) -> tuple[str, str | None] | None:
+    if not etag_path.exists():
+        return None
+    lines = etag_path.read_text(encoding="utf-8").splitlines()
+    if not lines:
+        return None
+    return lines[0].strip(), lines[1].strip() if len(lines) > 1 else None
+
+
+def _write_etag(etag_path: Path, etag: str, content_key: str | None) -> None:
+    text = etag if content_key is None else f"{etag}\n{content_key}"
+    etag_path.write_text(text, encoding="utf-8")
+
+
+def _content_key(content_hash: str, payload: dict[str, Any]) -> str:
+    """Identify a render by the scene's content hash and everything else sent."""
+    rest = {key: value for key, value in payload.items() if key != "elements"}
+    options = json.dumps(rest, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(f"{content_hash}\n{options}".encode("utf-8")).hexdigest()
+
+
+def _post_to_output(
+    endpoint: str | EndpointPool,
+    payload: dict[str, Any],
+    output: Output,
+    session: RenderSession | None,
+    timing: RequestTiming,
+    skip_unchanged: bool,
+    *,
+    content_key: str | None = None,
+    timeout: float | None = None,
+    policy: RequestPolicy | None = None,
+    limiter: AdaptiveLimiter | None = None,
+    optimizer: PngOptimizer | None = None,
+) -> bytes | None:
+    if output is None or not isinstance(output, (str, Path)):
+        response = _post_json(
+            endpoint,
+            payload,
+            session,
+            timing,
+            timeout=timeout,
+            policy=policy,
+            limiter=limiter,
+        )
+        body = response.body if optimizer is None else optimizer.optimize(response.body)
+        if output is None:
+            return body
+        output.write(body)
+        timing.lap("write", len(body))
+        return None
+
+    output_path = Path(output)
+    etag_path = _etag_path(output_path)
+    headers = {}
+    cached = _read_etag(etag_path) if skip_unchanged and output_path.exists() else None
+    if cached is not None:
+        if content_key is not None and cached[1] == content_key:
+            return None
+        headers["If-None-Match"] = cached[0]
+
+    response = _post_json(
+        endpoint,
+        payload,
+        session,
+        timing,
+        headers=headers,
+        timeout=timeout,
+        policy=policy,
+        limiter=limiter,
+    )
+    if response.status == 304:
+        if cached is not None and content_key is not None:
+            _write_etag(etag_path, cached[0], content_key)
+        return None
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_bytes(response.body)
+    etag = response.headers.get("etag")
+    if skip_unchanged and etag:
+        _write_etag(etag_path, etag, content_key)
+    elif etag_path.exists():
+        etag_path.unlink()
+    timing.lap("write", len(response.body))
+    if optimizer is not None:
+        optimizer.submit(output_path)
+    return None
+
+
+def _scene_payload(
+    scene: SceneInput,
+    *,
+    timing: RequestTiming | None = None,
+    **options: Any,
+) -> dict[str, Any]:
+    return _scene_request(scene, timing=timing, **options)[0]
+
+
+def _scene_request(
+    scene: SceneInput,
+    *,
+    timing: RequestTiming | None = None,
+    **options: Any,
+) -> tuple[dict[str, Any], str | None]:
+    """Build the request body and split off the scene's ``contentHash``."""
+    if isinstance(scene, dict):
+        payload: dict[str, Any] = dict(scene)
+    elif isinstance(scene, (str, Path, bytes)) or hasattr(scene, "read"):
+        raw = _read_input(scene)
+        if timing is not None:
+            timing.lap("read", len(raw))
+        payload = json.loads(raw)
+        if timing is not None:
+            timing.lap("decode")
+    else:
+        payload = _compile_diagram(scene)
+        if timing is not None:
+            timing.lap("compile")
+
+    content_hash = payload.pop("contentHash", None)
+    _apply_options(payload, **options)
+    return payload, content_hash
+
+
+def _mermaid_payload(
+    mermaid: str | Path | bytes | IO[bytes],
+    *,
+    config: dict[str, Any] | None = None,
+    timing: RequestTiming | None = None,
+    **options: Any,
+) -> dict[str, Any]:
+    if isinstance(mermaid, str) and _is_mermaid_text(mermaid):
+        mermaid_text = mermaid
+    else:
+        mermaid_text = _read_input(mermaid).decode("utf-8")
+        if timing is not None:
+            timing.lap("read", len(mermaid_text))
+
+    payload: dict[str, Any] = {"mermaid": mermaid_text}
     if config is not None:
         payload["config"] = config
+    _apply_options(payload, **options)
+    return payload
+
+
+def _is_mermaid_text(value: str) -> bool:
+    # Multi-line diagrams are never paths; probing them can raise ENAMETOOLONG.
+    if "\n" in value:
+        return True
+    try:
+        return not Path(value).exists()
+    except (OSError, ValueError):
+        return True
+
+
+def _read_input(source: str | Path | bytes | IO[bytes]) -> bytes:
+    if isinstance(source, bytes):
+        return source
+    if isinstance(source, (str, Path)):
+        return Path(source).read_bytes()
+    data = source.read()
+    return data.encode("utf-8") if isinstance(data, str) else data
+
+
+def _compile_diagram(diagram: Any) -> dict[str, Any]:
+    try:
+        from excalidraw_dsl import Diagram, render_dsl
+    except ImportError as exc:
+        raise TypeError(
+            f"Unsupported scene input: {type(diagram).__name__}"
+        ) from exc
+    if not isinstance(diagram, Diagram):
+        raise TypeError(f"Unsupported scene input: {type(diagram).__name__}")
+    # Deterministic output keeps the payload, and so the server's ETag,
+    # stable across compiles of the same diagram.
+    return render_dsl(diagram, deterministic=True)
+
+
+def _apply_options(
+    payload: dict[str, Any],
+    *,
+    export_scale: float | None = None,
+    export_padding: float | None = None,
+    max_size: float | None = None,
+    quality: float | None = None,
+    background_color: str | None = None,
+    dark_mode: bool = False,
+) -> None:
     if export_scale is not None:
         payload["exportScale"] = export_scale
     if export_padding is not None:
@@ -100,24 +500,158 @@ def render_mermaid(
     if dark_mode:
         payload["darkMode"] = True
 
+
+def _post_json(
+    endpoint: str | EndpointPool,
+    payload: dict[str, Any],
+    session: RenderSession | None = None,
+    timing: RequestTiming | None = None,
+    *,
+    headers: dict[str, str] | None = None,
+    timeout: float | None = None,
+    policy: RequestPolicy | None = None,
+    limiter: AdaptiveLimiter | None = None,
+) -> Response:
     data = json.dumps(payload).encode("utf-8")
+    if timing is not None:
+        timing.lap("encode", len(data))
+
+    response = _post_bytes(
+        endpoint,
+        data,
+        session,
+        headers=headers,
+        timeout=timeout,
+        policy=policy,
+        limiter=limiter,
+    )
+
+    if timing is not None:
+        timing.lap("network", len(data) + len(response.body))
+        for name, seconds in parse_server_timing(
+            response.headers.get("server-timing")
+        ).items():
+            timing.add(f"server.{name}", seconds)
+    return response
+
+
+def _post_bytes(
+    endpoint: str | EndpointPool,
+    data: bytes,
+    session: RenderSession | None = None,
+    *,
+    headers: dict[str, str] | None = None,
+    timeout: float | None = None,
+    policy: RequestPolicy | None = None,
+    limiter: AdaptiveLimiter | None = None,
+) -> Response:
+    """POST ``data`` and return the response.
+
+    Anything other than ``200`` raises ``RenderError``, except ``304`` when
+    the request carried ``If-None-Match``.
+    """
+    if policy is not None:
+        return policy.execute(
+            lambda attempt_timeout: _post_bytes(
+                endpoint,
+                data,
+                session,
+                headers=headers,
+                timeout=attempt_timeout,
+                limiter=limiter,
+            ),
+            timeout=timeout,
+        )
+    if limiter is not None:
+        return limiter.call(
+            lambda: _post_bytes(
+                endpoint, data, session, headers=headers, timeout=timeout
+            )
+        )
+    if not isinstance(endpoint, str):
+        if not hasattr(endpoint, "call"):
+            kind = type(endpoint).__name__
+            raise TypeError(f"endpoint must be a URL or an EndpointPool, not {kind}")
+        return endpoint.call(
+            lambda url, attempt_timeout: _post_bytes(
+                url, data, session, headers=headers, timeout=attempt_timeout
+            ),
+            size=lambda response: len(response.body),
+            timeout=timeout,
+        )
+    conditional = bool(headers and "If-None-Match" in headers)
+    headers = {"Content-Type": "application/json", **(headers or {})}
+
+    if session is not None:
+        try:
+            response = session.post(endpoint, data, headers, timeout=timeout)
+        except _TIMEOUT_ERRORS as exc:
+            raise _timed_out(timeout) from exc
+        except (OSError, http.client.HTTPException) as exc:
+            raise RenderError(f"Could not reach renderer: {exc}") from exc
+        if response.status == 304 and conditional:
+            return response
+        if response.status != 200:
+            detail = response.body.decode("utf-8", errors="replace")
+            raise RenderError(
+                f"Render failed: {detail}",
+                status=response.status,
+                retry_after=_retry_after(response.headers.get("retry-after")),
+            )
+        return response
+
+    # Only session-less callers need urllib; keep it off the CLI's import path.
+    import urllib.request
+
     request = urllib.request.Request(
         endpoint,
         data=data,
-        headers={"Content-Type": "application/json"},
+        headers=headers,
         method="POST",
     )
 
     try:
-        with urllib.request.urlopen(request) as response:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
             if response.status != 200:
-                raise RuntimeError(f"Render failed with status {response.status}")
-            png_bytes = response.read()
+                raise RenderError(
+                    f"Render failed with status {response.status}",
+                    status=response.status,
+                )
+            return Response(
+                status=response.status,
+                headers={name.lower(): value for name, value in response.getheaders()},
+                body=response.read(),
+            )
     except urllib.error.HTTPError as exc:  # pyright: ignore[reportAttributeAccessIssue]
+        if exc.code == 304 and conditional:
+            return Response(
+                status=304,
+                headers={name.lower(): value for name, value in exc.headers.items()},
+                body=b"",
+            )
         detail = exc.read().decode("utf-8")
-        raise RuntimeError(f"Render failed: {detail}") from exc
+        raise RenderError(
+            f"Render failed: {detail}",
+            status=exc.code,
+            retry_after=_retry_after(exc.headers.get("Retry-After")),
+        ) from exc
+    except _TIMEOUT_ERRORS as exc:
+        raise _timed_out(timeout) from exc
     except urllib.error.URLError as exc:  # pyright: ignore[reportAttributeAccessIssue]
-        raise RuntimeError(f"Could not reach renderer: {exc}") from exc
+        if isinstance(exc.reason, _TIMEOUT_ERRORS):
+            raise _timed_out(timeout) from exc
+        raise RenderError(f"Could not reach renderer: {exc}") from exc
 
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    output_path.write_bytes(png_bytes)
+
+def _timed_out(timeout: float | None) -> RenderError:
+    if timeout is None:
+        return RenderError("Render timed out")
+    return RenderError(f"Render timed out after {timeout:g}s")
+
+
+def _retry_after(value: str | None) -> float | None:
+    # Only the delay-seconds form is used by the render routes.
+    try:
+        return max(0.0, float(value)) if value else None
+    except ValueError:
+        return None
@@ -0,0 +1,147 @@
+"""Adaptive limit on in-flight render requests.
+
+The right concurrency depends on how many Chromium pages the servers can
+run. ``AdaptiveLimiter`` finds it with AIMD: while latency stays close to
+the best recently observed, the limit grows by about one per round of
+requests; when latency rises past ``tolerance`` times that baseline or a
+server answers ``429``/``503``, the limit is multiplied by ``backoff``.
+Share one limiter between the threads of a batch (``limiter=``).
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable
+
+if TYPE_CHECKING:
+    from .session import Response
+
+_OVERLOADED = {429, 503}
+
+
+@dataclass(frozen=True)
+class LimiterStats:
+    limit: float
+    inflight: int
+    waiting: int
+    server_queue: int | None
+    baseline: float | None
+    increases: int
+    decreases: int
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit driven by latency and server overload signals.
+
+    ``server_queue`` reports the queue depth from the render server's
+    ``X-Render-Queue`` header on the latest response.
+    """
+
+    def __init__(
+        self,
+        *,
+        initial: int = 2,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        backoff: float = 0.5,
+        tolerance: float = 2.0,
+    ) -> None:
+        if not 0 < backoff < 1:
+            raise ValueError("backoff must be between 0 and 1")
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.tolerance = tolerance
+        self._limit = float(min(max(initial, min_limit), max_limit))
+        self._inflight = 0
+        self._waiting = 0
+        self._baseline: float | None = None
+        self._server_queue: int | None = None
+        self._last_decrease = 0.0
+        self._increases = 0
+        self._decreases = 0
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def call(self, func: Callable[[], Response]) -> Response:
+        """Run ``func`` once a slot is free and adjust the limit afterwards."""
+        from .client import RenderError
+
+        started = self._acquire()
+        try:
+            response = func()
+        except RenderError as exc:
+            self._release(started, None, overloaded=exc.status in _OVERLOADED)
+            raise
+        except BaseException:
+            self._release(started, None, overloaded=False)
+            raise
+        queue_depth = response.headers.get("x-render-queue")
+        if queue_depth is not None and queue_depth.isdigit():
+            self._server_queue = int(queue_depth)
+        self._release(started, time.monotonic() - started, overloaded=False)
+        return response
+
+    def stats(self) -> LimiterStats:
+        with self._condition:
+            return LimiterStats(
+                limit=self._limit,
+                inflight=self._inflight,
+                waiting=self._waiting,
+                server_queue=self._server_queue,
+                baseline=self._baseline,
+                increases=self._increases,
+                decreases=self._decreases,
+            )
+
+    def report(self) -> str:
+        stats = self.stats()
+        server_queue = "-" if stats.server_queue is None else stats.server_queue
+        return (
+            f"concurrency limit {stats.limit:.1f} ({stats.increases} increases,"
+            f" {stats.decreases} decreases), {stats.inflight} in flight,"
+            f" {stats.waiting} waiting, server queue {server_queue}"
+        )
+
+    def _acquire(self) -> float:
+        with self._condition:
+            self._waiting += 1
+            while self._inflight >= int(self._limit):
+                self._condition.wait()
+            self._waiting -= 1
+            self._inflight += 1
+            return time.monotonic()
+
+    def _release(
+        self, started: float, latency: float | None, *, overloaded: bool
+    ) -> None:
+        with self._condition:
+            saturated = self._inflight >= int(self._limit)
+            self._inflight -= 1
+            if latency is not None:
+                if self._baseline is None or latency < self._baseline:
+                    self._baseline = latency
+                else:
+                    # Let the baseline drift up slowly so a permanently slower
+                    # server does not pin the limit at its minimum.
+                    self._baseline += 0.01 * (latency - self._baseline)
+                overloaded = latency > self.tolerance * self._baseline
+
+            if overloaded:
+                # One decrease per round: requests already in flight when the
+                # limit was cut report the same congestion.
+                if started >= self._last_decrease:
+                    self._limit = max(self.min_limit, self._limit * self.backoff)
+                    self._last_decrease = time.monotonic()
+                    self._decreases += 1
+            elif latency is not None and saturated:
+                new_limit = min(self.max_limit, self._limit + 1 / self._limit)
+                if int(new_limit) > int(self._limit):
+                    self._increases += 1
+                self._limit = new_limit
+            self._condition.notify_all()
@@ -0,0 +1,491 @@
+"""Durable render job queue backed by SQLite.
+
+Jobs survive process restarts and render server outages: producers
+``submit`` payloads, and one or more worker processes drain the queue
+against the render server, retrying transient failures with jittered
+exponential backoff. Identical payloads sent to the same endpoint are
+deduplicated into a single job.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import multiprocessing
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterator
+
+from .client import (
+    RenderError,
+    SceneInput,
+    _mermaid_payload,
+    _post_bytes,
+    _scene_payload,
+)
+from .policy import backoff_delay
+from .session import RenderSession
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    endpoint TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    lease_until REAL,
+    result BLOB,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, priority DESC, created_at);
+CREATE TABLE IF NOT EXISTS job_outputs (
+    job_id TEXT NOT NULL REFERENCES jobs (id),
+    path TEXT NOT NULL,
+    PRIMARY KEY (job_id, path)
+);
+"""
+
+
+@dataclass(frozen=True)
+class Job:
+    id: str
+    endpoint: str
+    status: str
+    priority: int
+    attempts: int
+    max_attempts: int
+    error: str | None
+    created_at: float
+    updated_at: float
+
+
+@dataclass(frozen=True)
+class ClaimedJob:
+    id: str
+    endpoint: str
+    payload: bytes
+    attempts: int
+
+
+class JobQueue:
+    """SQLite-backed queue of render jobs.
+
+    Each process (or thread) should open its own ``JobQueue`` on the same
+    database file; SQLite's locking keeps claims exclusive.
+    """
+
+    def __init__(self, path: str | Path, *, timeout: float = 30.0) -> None:
+        self.path = Path(path)
+        self._db = sqlite3.connect(self.path, timeout=timeout, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> "JobQueue":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def submit_scene(
+        self,
+        scene: SceneInput,
+        *,
+        endpoint: str = "http://localhost:3000/api/render",
+        priority: int = 0,
+        output_path: str | Path | None = None,
+        max_attempts: int = 5,
+        **options: Any,
+    ) -> str:
+        """Queue an Excalidraw scene (see ``render_png``) and return its job id."""
+        payload = _scene_payload(scene, **options)
+        return self.submit(
+            endpoint,
+            payload,
+            priority=priority,
+            output_path=output_path,
+            max_attempts=max_attempts,
+        )
+
+    def submit_mermaid(
+        self,
+        mermaid: str | Path,
+        *,
+        endpoint: str = "http://localhost:3000/api/render-mermaid",
+        config: dict[str, Any] | None = None,
+        priority: int = 0,
+        output_path: str | Path | None = None,
+        max_attempts: int = 5,
+        **options: Any,
+    ) -> str:
+        """Queue a Mermaid diagram (file path or text) and return its job id."""
+        payload = _mermaid_payload(mermaid, config=config, **options)
+        return self.submit(
+            endpoint,
+            payload,
+            priority=priority,
+            output_path=output_path,
+            max_attempts=max_attempts,
+        )
+
+    def submit(
+        self,
+        endpoint: str,
+        payload: dict[str, Any],
+        *,
+        priority: int = 0,
+        output_path: str | Path | None = None,
+        max_attempts: int = 5,
+    ) -> str:
+        """Queue a raw request body for ``endpoint``.
+
+        Resubmitting an identical payload returns the existing job id. A
+        higher priority is kept, and a previously failed job is re-queued.
+        """
+        body = json.dumps(payload, sort_keys=True, separators=(",", ":")).encode(
+            "utf-8"
+        )
+        job_id = hashlib.sha256(endpoint.encode("utf-8") + b"\n" + body).hexdigest()
+        now = time.time()
+
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            self._db.execute(
+                "INSERT OR IGNORE INTO jobs (id, endpoint, payload, priority, status,"
+                " max_attempts, available_at, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, endpoint, body, priority, QUEUED, max_attempts, now, now, now),
+            )
+            self._db.execute(
+                "UPDATE jobs SET priority = MAX(priority, ?) WHERE id = ?",
+                (priority, job_id),
+            )
+            self._db.execute(
+                "UPDATE jobs SET status = ?, attempts = 0, error = NULL,"
+                " available_at = ?, max_attempts = ?, updated_at = ?"
+                " WHERE id = ? AND status = ?",
+                (QUEUED, now, max_attempts, now, job_id, FAILED),
+            )
+            if output_path is not None:
+                self._db.execute(
+                    "INSERT OR IGNORE INTO job_outputs (job_id, path) VALUES (?, ?)",
+                    (job_id, str(output_path)),
+                )
+            row = self._db.execute(
+                "SELECT status, result FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+
+        if output_path is not None and row[0] == DONE:
+            _write_output(Path(output_path), row[1])
+        return job_id
+
+    def status(self, job_id: str) -> Job:
+        row = self._db.execute(
+            "SELECT id, endpoint, status, priority, attempts, max_attempts, error,"
+            " created_at, updated_at FROM jobs WHERE id = ?",
+            (job_id,),
+        ).fetchone()
+        if row is None:
+            raise KeyError(job_id)
+        return Job(*row)
+
+    def result(self, job_id: str) -> bytes:
+        """Return the rendered bytes of a finished job."""
+        row = self._db.execute(
+            "SELECT status, result, error FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(job_id)
+        status, result, error = row
+        if status == FAILED:
+            raise RenderError(error or "Render failed")
+        if status != DONE:
+            raise RuntimeError(f"Job {job_id} is still {status}")
+        return result
+
+    def wait(
+        self, job_id: str, *, timeout: float | None = None, poll_interval: float = 0.1
+    ) -> bytes:
+        """Block until a job finishes and return its rendered bytes."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            status = self.status(job_id).status
+            if status in {DONE, FAILED}:
+                return self.result(job_id)
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"Job {job_id} did not finish in time")
+            time.sleep(poll_interval)
+
+    def counts(self) -> dict[str, int]:
+        counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        for status, count in self._db.execute(
+            "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+        ):
+            counts[status] = count
+        return counts
+
+    def pending(self) -> int:
+        counts = self.counts()
+        return counts[QUEUED] + counts[RUNNING]
+
+    def claim(self, *, lease: float = 300.0) -> ClaimedJob | None:
+        """Take the highest-priority runnable job, or None if there is none.
+
+        Running jobs whose lease has expired (their worker died) are
+        claimable again until they run out of attempts; then they fail.
+        """
+        now = time.time()
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, error = ?, lease_until = NULL,"
+                " updated_at = ?"
+                " WHERE status = ? AND lease_until < ? AND attempts >= max_attempts",
+                (FAILED, "Worker lease expired on the last attempt", now, RUNNING, now),
+            )
+            row = self._db.execute(
+                "SELECT id, endpoint, payload, attempts FROM jobs"
+                " WHERE (status = ? AND available_at <= ?)"
+                " OR (status = ? AND lease_until < ? AND attempts < max_attempts)"
+                " ORDER BY priority DESC, created_at LIMIT 1",
+                (QUEUED, now, RUNNING, now),
+            ).fetchone()
+            if row is not None:
+                self._db.execute(
+                    "UPDATE jobs SET status = ?, attempts = attempts + 1,"
+                    " lease_until = ?, updated_at = ? WHERE id = ?",
+                    (RUNNING, now + lease, now, row[0]),
+                )
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        if row is None:
+            return None
+        return ClaimedJob(
+            id=row[0], endpoint=row[1], payload=row[2], attempts=row[3] + 1
+        )
+
+    def complete(
+        self, job_id: str, result: bytes, *, attempt: int | None = None
+    ) -> bool:
+        """Store a claimed job's result and write its output files.
+
+        Returns False, writing nothing, when the caller's lease has expired
+        or, given the claim's ``attempt``, the job has been claimed again
+        since. Outputs are written before the job is marked done; if one
+        cannot be written the attempt fails.
+        """
+        now = time.time()
+        owned, params = _owned(job_id, now, attempt)
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = self._db.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = NULL,"
+                " lease_until = NULL, updated_at = ?" + owned,
+                (DONE, result, now, *params),
+            )
+            if cursor.rowcount:
+                for (path,) in self._db.execute(
+                    "SELECT path FROM job_outputs WHERE job_id = ?", (job_id,)
+                ).fetchall():
+                    _write_output(Path(path), result)
+                self._db.execute("COMMIT")
+            else:
+                self._db.execute("ROLLBACK")
+        except OSError as exc:
+            self._db.execute("ROLLBACK")
+            self.fail(
+                job_id, f"Could not write output: {exc}", retry_in=None, attempt=attempt
+            )
+            return False
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        return bool(cursor.rowcount)
+
+    def fail(
+        self,
+        job_id: str,
+        error: str,
+        *,
+        retry_in: float | None,
+        attempt: int | None = None,
+    ) -> bool:
+        """Record a failed attempt; ``retry_in`` re-queues it unless exhausted.
+
+        Like ``complete``, returns False without changing anything when the
+        caller no longer holds the job.
+        """
+        now = time.time()
+        owned, params = _owned(job_id, now, attempt)
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            updated = 0
+            if retry_in is not None:
+                updated = self._db.execute(
+                    "UPDATE jobs SET status = ?, error = ?, available_at = ?,"
+                    " lease_until = NULL, updated_at = ?"
+                    + owned
+                    + " AND attempts < max_attempts",
+                    (QUEUED, error, now + retry_in, now, *params),
+                ).rowcount
+            if not updated:
+                updated = self._db.execute(
+                    "UPDATE jobs SET status = ?, error = ?, lease_until = NULL,"
+                    " updated_at = ?" + owned,
+                    (FAILED, error, now, *params),
+                ).rowcount
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        return bool(updated)
+
+    def renew(
+        self, job_id: str, *, lease: float, attempt: int | None = None
+    ) -> bool:
+        """Extend a claimed job's lease; False if the caller no longer holds it."""
+        now = time.time()
+        owned, params = _owned(job_id, now, attempt)
+        cursor = self._db.execute(
+            "UPDATE jobs SET lease_until = ?, updated_at = ?" + owned,
+            (now + lease, now, *params),
+        )
+        return bool(cursor.rowcount)
+
+
+def _owned(job_id: str, now: float, attempt: int | None) -> tuple[str, tuple]:
+    """WHERE clause matching a running job whose lease has not expired.
+
+    The attempt number acts as a fencing token: a reclaimed job has a new
+    one, so a worker that lost its lease cannot touch the new claim.
+    """
+    clause = " WHERE id = ? AND status = ? AND lease_until >= ?"
+    params: tuple = (job_id, RUNNING, now)
+    if attempt is not None:
+        clause += " AND attempts = ?"
+        params += (attempt,)
+    return clause, params
+
+
+def _write_output(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+
+
+@contextmanager
+def _renewing(db_path: Path, job: ClaimedJob, lease: float) -> Iterator[None]:
+    """Renew ``job``'s lease every third of ``lease`` until the block exits."""
+    stop = threading.Event()
+
+    def renew() -> None:
+        with JobQueue(db_path) as queue:
+            while not stop.wait(lease / 3):
+                if not queue.renew(job.id, lease=lease, attempt=job.attempts):
+                    return
+
+    thread = threading.Thread(target=renew, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run_worker(
+    db_path: str | Path,
+    *,
+    stop_when_empty: bool = False,
+    poll_interval: float = 0.5,
+    lease: float = 300.0,
+    timeout: float | None = None,
+    backoff_base: float = 0.5,
+    backoff_cap: float = 30.0,
+) -> int:
+    """Drain jobs from the queue in this process; return how many were done.
+
+    With ``stop_when_empty`` the worker exits once nothing is queued or
+    running; otherwise it polls forever. The lease is renewed while a
+    request is in flight; ``timeout`` (default: ``lease``) bounds how long
+    the server may stall without sending anything.
+    """
+    processed = 0
+    with JobQueue(db_path) as queue, RenderSession() as session:
+        while True:
+            job = queue.claim(lease=lease)
+            if job is None:
+                if stop_when_empty and queue.pending() == 0:
+                    return processed
+                time.sleep(poll_interval)
+                continue
+
+            try:
+                # The socket timeout only bounds each read, so a slow render
+                # could outlive the lease; keep renewing it while we wait.
+                with _renewing(queue.path, job, lease):
+                    body = _post_bytes(
+                        job.endpoint, job.payload, session, timeout=timeout or lease
+                    ).body
+            except RenderError as exc:
+                retry_in = (
+                    backoff_delay(job.attempts, base=backoff_base, cap=backoff_cap)
+                    if exc.retryable
+                    else None
+                )
+                queue.fail(job.id, str(exc), retry_in=retry_in, attempt=job.attempts)
+                continue
+            except Exception as exc:
+                # Not a render failure, so retrying will not help; fail the
+                # job now instead of leaving it leased to a dead worker.
+                error = f"{type(exc).__name__}: {exc}"
+                queue.fail(job.id, error, retry_in=None, attempt=job.attempts)
+                continue
+            if queue.complete(job.id, body, attempt=job.attempts):
+                processed += 1
+
+
+def run_workers(db_path: str | Path, processes: int = 2, **worker_kwargs: Any) -> None:
+    """Run ``processes`` worker processes until they exit or are interrupted."""
+    workers = [
+        multiprocessing.Process(
+            target=run_worker,
+            args=(str(db_path),),
+            kwargs=worker_kwargs,
+            name=f"render-worker-{index}",
+        )
+        for index in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.join()
+        raise
@@ -0,0 +1,146 @@
+"""Per-stage timing for render requests.
+
+Pass a ``RenderMetrics`` to ``render_png``/``render_mermaid`` (``metrics=``)
+to collect how long each request spent reading, decoding and encoding JSON,
+compiling DSL diagrams, on the network, inside the server (from its
+``Server-Timing`` header) and writing the output, together with the bytes
+handled by each stage.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+# Client-side stages in pipeline order; server stages sort after "network".
+STAGE_ORDER = ("read", "decode", "compile", "encode", "network", "write")
+
+
+class RequestTiming:
+    """Stage durations (seconds) and byte counts for a single request."""
+
+    def __init__(self, label: str) -> None:
+        self.label = label
+        self.stages: dict[str, float] = {}
+        self.bytes: dict[str, int] = {}
+        self._last = time.perf_counter()
+
+    def lap(self, stage: str, nbytes: int | None = None) -> None:
+        """Attribute the time since the previous lap to ``stage``."""
+        now = time.perf_counter()
+        self.add(stage, now - self._last, nbytes)
+        self._last = now
+
+    def add(self, stage: str, seconds: float, nbytes: int | None = None) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+        if nbytes is not None:
+            self.bytes[stage] = self.bytes.get(stage, 0) + nbytes
+
+    @property
+    def total(self) -> float:
+        return sum(
+            seconds for stage, seconds in self.stages.items() if "." not in stage
+        )
+
+
+@dataclass(frozen=True)
+class StageSummary:
+    count: int
+    p50: float
+    p95: float
+    p99: float
+    total: float
+    bytes: int
+
+
+def _percentile(ordered: list[float], fraction: float) -> float:
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _stage_key(stage: str) -> tuple[int, str]:
+    if stage in STAGE_ORDER:
+        return STAGE_ORDER.index(stage) * 2, stage
+    if stage.startswith("server."):
+        return STAGE_ORDER.index("network") * 2 + 1, stage
+    return len(STAGE_ORDER) * 2, stage
+
+
+class RenderMetrics:
+    """Thread-safe collector of ``RequestTiming`` records.
+
+    ``on_request`` is called with every finished request, e.g. to forward
+    timings to an external metrics system.
+    """
+
+    def __init__(
+        self, on_request: Callable[[RequestTiming], None] | None = None
+    ) -> None:
+        self.on_request = on_request
+        self.requests = 0
+        self._samples: dict[str, list[float]] = {}
+        self._bytes: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, timing: RequestTiming) -> None:
+        with self._lock:
+            self.requests += 1
+            for stage, seconds in timing.stages.items():
+                self._samples.setdefault(stage, []).append(seconds)
+            self._samples.setdefault("total", []).append(timing.total)
+            for stage, nbytes in timing.bytes.items():
+                self._bytes[stage] = self._bytes.get(stage, 0) + nbytes
+        if self.on_request is not None:
+            self.on_request(timing)
+
+    def summary(self) -> dict[str, StageSummary]:
+        with self._lock:
+            samples = {stage: sorted(values) for stage, values in self._samples.items()}
+            nbytes = dict(self._bytes)
+        return {
+            stage: StageSummary(
+                count=len(values),
+                p50=_percentile(values, 0.5),
+                p95=_percentile(values, 0.95),
+                p99=_percentile(values, 0.99),
+                total=sum(values),
+                bytes=nbytes.get(stage, 0),
+            )
+            for stage, values in sorted(
+                samples.items(), key=lambda item: _stage_key(item[0])
+            )
+        }
+
+    def report(self) -> str:
+        lines = [
+            f"{'stage':<20}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}"
+            f"{'p99 ms':>10}{'total s':>10}{'bytes':>14}"
+        ]
+        for stage, item in self.summary().items():
+            lines.append(
+                f"{stage:<20}{item.count:>7}{item.p50 * 1000:>10.2f}"
+                f"{item.p95 * 1000:>10.2f}{item.p99 * 1000:>10.2f}"
+                f"{item.total:>10.2f}{item.bytes or '':>14}"
+            )
+        return "\n".join(lines)
+
+
+def parse_server_timing(header: str | None) -> dict[str, float]:
+    """Parse a ``Server-Timing`` header into ``{name: seconds}``."""
+    timings: dict[str, float] = {}
+    if not header:
+        return timings
+    for entry in header.split(","):
+        name, *params = (part.strip() for part in entry.split(";"))
+        if not name:
+            continue
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "dur":
+                try:
+                    timings[name] = float(value.strip('"')) / 1000
+                except ValueError:
+                    pass
+    return timings
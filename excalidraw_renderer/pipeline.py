@@ -0,0 +1,226 @@
+"""Overlapped compile and render pipeline for DSL files.
+
+``render_dsl_files`` compiles ``.dsl.json`` files with ``render_dsl`` in a
+process pool and streams the scenes to a pool of render threads, so
+CPU-bound compiling overlaps with network-bound rendering. Both hand-offs
+are bounded: at most ``max_pending`` files are compiling and at most
+``max_pending`` compiled scenes wait for a render thread, so a slow server
+stalls compilation instead of filling memory. The returned
+``PipelineStats`` reports each stage's throughput and how long it waited
+on the other.
+"""
+
+from __future__ import annotations
+
+import json
+import multiprocessing
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+from .client import render_png
+
+
+@dataclass(frozen=True)
+class StageStats:
+    """Work done by one pipeline stage.
+
+    ``busy`` is summed over workers; ``span`` runs from the stage's first
+    start to its last finish. ``waiting`` is time the compile stage was
+    blocked on a full queue, or render threads sat idle on an empty one.
+    """
+
+    items: int
+    busy: float
+    span: float
+    waiting: float
+
+    @property
+    def throughput(self) -> float:
+        return self.items / self.span if self.span > 0 else 0.0
+
+
+@dataclass(frozen=True)
+class PipelineStats:
+    compile: StageStats
+    render: StageStats
+    elapsed: float
+    max_queue: int
+
+    def report(self) -> str:
+        compile_, render = self.compile, self.render
+        total = compile_.items / self.elapsed if self.elapsed > 0 else 0.0
+        return "\n".join(
+            [
+                f"compile: {compile_.items} file(s) in {compile_.span:.2f} s"
+                f" ({compile_.throughput:.1f} files/s), busy {compile_.busy:.2f} s,"
+                f" blocked {compile_.waiting:.2f} s on a full queue",
+                f"render: {render.items} file(s) in {render.span:.2f} s"
+                f" ({render.throughput:.1f} files/s), busy {render.busy:.2f} s,"
+                f" idle {render.waiting:.2f} s waiting for scenes",
+                f"pipeline: {compile_.items} file(s) in {self.elapsed:.2f} s"
+                f" ({total:.1f} files/s), deepest queue {self.max_queue}",
+            ]
+        )
+
+
+class _StageClock:
+    def __init__(self) -> None:
+        self.items = 0
+        self.busy = 0.0
+        self.waiting = 0.0
+        self.first_start: float | None = None
+        self.last_end: float | None = None
+        self._lock = threading.Lock()
+
+    def record(self, started: float, finished: float) -> None:
+        with self._lock:
+            self.items += 1
+            self.busy += finished - started
+            if self.first_start is None or started < self.first_start:
+                self.first_start = started
+            if self.last_end is None or finished > self.last_end:
+                self.last_end = finished
+
+    def wait(self, seconds: float) -> None:
+        with self._lock:
+            self.waiting += seconds
+
+    def stats(self) -> StageStats:
+        span = 0.0
+        if self.first_start is not None and self.last_end is not None:
+            span = self.last_end - self.first_start
+        return StageStats(self.items, self.busy, span, self.waiting)
+
+
+def _compile_file(path: Path) -> tuple[dict[str, Any], float, float]:
+    # Wall-clock times so spans line up across processes.
+    started = time.time()
+    from excalidraw_dsl import render_dsl
+
+    try:
+        scene = render_dsl(json.loads(path.read_bytes()), deterministic=True)
+    except (ValueError, KeyError, TypeError) as exc:
+        raise RuntimeError(f"Invalid DSL: {exc}") from exc
+    return scene, started, time.time()
+
+
+def _process_context() -> Any:
+    # Render threads are already running when the pool starts its workers,
+    # and forking a threaded process is unsafe; forkserver and spawn start
+    # workers from a clean process instead.
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context(
+        "forkserver" if "forkserver" in methods else "spawn"
+    )
+
+
+def render_dsl_files(
+    jobs: Iterable[tuple[Path, Path]],
+    *,
+    processes: int | None = None,
+    concurrency: int = 4,
+    max_pending: int | None = None,
+    on_rendered: Callable[[Path, Path], None] | None = None,
+    **render_kwargs: Any,
+) -> PipelineStats:
+    """Compile and render ``(dsl_path, png_path)`` pairs.
+
+    ``processes`` compile in parallel (default: one per CPU) while
+    ``concurrency`` threads send the compiled scenes to ``render_png`` with
+    ``render_kwargs``. ``max_pending`` (default ``2 * concurrency``) bounds
+    both the files being compiled and the scenes waiting to be rendered.
+    The first failure stops the pipeline and is raised as a
+    ``RuntimeError`` naming the file once in-flight work has finished.
+    """
+    max_pending = max_pending or 2 * concurrency
+    scenes: queue.Queue[tuple[Path, Path, dict[str, Any]] | None] = queue.Queue(
+        maxsize=max_pending
+    )
+    compile_clock = _StageClock()
+    render_clock = _StageClock()
+    stop = threading.Event()
+    errors: list[RuntimeError] = []
+
+    def fail(source: Path, exc: BaseException) -> None:
+        errors.append(RuntimeError(f"{source.name}: {exc}"))
+        stop.set()
+
+    def render_worker() -> None:
+        while True:
+            waited = time.perf_counter()
+            item = scenes.get()
+            render_clock.wait(time.perf_counter() - waited)
+            if item is None:
+                return
+            if stop.is_set():
+                continue
+            source, target, scene = item
+            started = time.time()
+            try:
+                render_png(scene, target, **render_kwargs)
+            except Exception as exc:
+                fail(source, exc)
+                continue
+            render_clock.record(started, time.time())
+            if on_rendered is not None:
+                try:
+                    on_rendered(source, target)
+                except Exception as exc:
+                    fail(source, exc)
+
+    max_queue = 0
+
+    def hand_off(source: Path, target: Path, future: Future) -> None:
+        nonlocal max_queue
+        try:
+            scene, started, finished = future.result()
+        except Exception as exc:
+            fail(source, exc)
+            return
+        compile_clock.record(started, finished)
+        waited = time.perf_counter()
+        scenes.put((source, target, scene))
+        compile_clock.wait(time.perf_counter() - waited)
+        max_queue = max(max_queue, scenes.qsize())
+
+    start = time.perf_counter()
+    workers = [
+        threading.Thread(target=render_worker, name=f"render-{index}", daemon=True)
+        for index in range(concurrency)
+    ]
+    for worker in workers:
+        worker.start()
+    try:
+        with ProcessPoolExecutor(processes, mp_context=_process_context()) as executor:
+            pending: deque[tuple[Path, Path, Future]] = deque()
+            for source, target in jobs:
+                if stop.is_set():
+                    break
+                future = executor.submit(_compile_file, source)
+                pending.append((source, target, future))
+                if len(pending) >= max_pending:
+                    hand_off(*pending.popleft())
+            while pending and not stop.is_set():
+                hand_off(*pending.popleft())
+            for _, _, future in pending:
+                future.cancel()
+    finally:
+        for _ in workers:
+            scenes.put(None)
+        for worker in workers:
+            worker.join()
+
+    if errors:
+        raise errors[0]
+    return PipelineStats(
+        compile=compile_clock.stats(),
+        render=render_clock.stats(),
+        elapsed=time.perf_counter() - start,
+        max_queue=max_queue,
+    )
@@ -0,0 +1,158 @@
+"""Timeouts, deadlines, retries and hedging for render requests.
+
+A ``RequestPolicy`` is shared by every request of a batch (pass it as
+``policy=`` to ``render_png``/``render_mermaid``). It bounds each request
+by ``timeout`` and the whole batch by ``deadline``, retries retryable
+failures (connection errors, timeouts, ``429`` and ``5xx``) with jittered
+exponential backoff, waiting at least as long as the server's
+``Retry-After``, and can hedge: once a request has been running longer than
+the ``hedge_percentile`` of recent latencies, a duplicate is sent and
+whichever answer arrives first wins. With an ``EndpointPool`` the duplicate
+goes to another server; otherwise it uses another connection.
+"""
+
+from __future__ import annotations
+
+import queue
+import random
+import threading
+import time
+from collections import deque
+from typing import Callable, TypeVar
+
+T = TypeVar("T")
+
+
+def backoff_delay(attempt: int, *, base: float = 0.5, cap: float = 30.0) -> float:
+    """Exponential backoff with full jitter for the given attempt number."""
+    return random.uniform(0, min(cap, base * 2 ** max(0, attempt - 1)))
+
+
+class RequestPolicy:
+    """Shared timeout, deadline, retry and hedging settings for a batch.
+
+    ``deadline`` is in seconds from when the policy is created. Hedging is
+    off until ``hedge_percentile`` is set and ``hedge_min_samples`` requests
+    have completed; the delay then tracks the last ``window`` latencies.
+    """
+
+    def __init__(
+        self,
+        *,
+        timeout: float | None = None,
+        deadline: float | None = None,
+        retries: int = 0,
+        backoff_base: float = 0.2,
+        backoff_cap: float = 5.0,
+        hedge_percentile: float | None = None,
+        hedge_min_samples: int = 20,
+        window: int = 256,
+    ) -> None:
+        if hedge_percentile is not None and not 0 < hedge_percentile < 1:
+            raise ValueError("hedge_percentile must be between 0 and 1")
+        self.timeout = timeout
+        self.deadline = None if deadline is None else time.monotonic() + deadline
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.retried = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def remaining(self) -> float | None:
+        """Seconds left before the deadline, or ``None`` without one."""
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+
+    def request_timeout(self, timeout: float | None = None) -> float | None:
+        """Timeout for the next request, capped by the time left."""
+        from .client import RenderError
+
+        limits = [value for value in (timeout, self.timeout) if value is not None]
+        remaining = self.remaining()
+        if remaining is not None:
+            if remaining <= 0:
+                raise RenderError("Deadline exceeded before the request was sent")
+            limits.append(remaining)
+        return min(limits) if limits else None
+
+    def hedge_delay(self) -> float | None:
+        """Latency after which a duplicate request is sent, if hedging."""
+        if self.hedge_percentile is None:
+            return None
+        with self._lock:
+            if len(self._latencies) < self.hedge_min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(self.hedge_percentile * len(ordered)))]
+
+    def execute(
+        self, send: Callable[[float | None], T], *, timeout: float | None = None
+    ) -> T:
+        """Call ``send(timeout)`` under this policy and return its result."""
+        from .client import RenderError
+
+        attempt = 0
+        while True:
+            attempt += 1
+            request_timeout = self.request_timeout(timeout)
+            start = time.perf_counter()
+            try:
+                result = self._send(send, request_timeout)
+            except RenderError as exc:
+                if not exc.retryable or attempt > self.retries:
+                    raise
+                delay = backoff_delay(
+                    attempt, base=self.backoff_base, cap=self.backoff_cap
+                )
+                delay = max(delay, exc.retry_after or 0.0)
+                remaining = self.remaining()
+                if remaining is not None and delay >= remaining:
+                    raise
+                with self._lock:
+                    self.retried += 1
+                time.sleep(delay)
+                continue
+            with self._lock:
+                self._latencies.append(time.perf_counter() - start)
+            return result
+
+    def _send(self, send: Callable[[float | None], T], timeout: float | None) -> T:
+        delay = self.hedge_delay()
+        if delay is None or (timeout is not None and delay >= timeout):
+            return send(timeout)
+
+        results: queue.Queue[tuple[int, bool, object]] = queue.Queue()
+
+        def attempt(index: int, attempt_timeout: float | None) -> None:
+            try:
+                results.put((index, True, send(attempt_timeout)))
+            except BaseException as exc:
+                results.put((index, False, exc))
+
+        threading.Thread(target=attempt, args=(0, timeout), daemon=True).start()
+        try:
+            outcomes = [results.get(timeout=delay)]
+        except queue.Empty:
+            with self._lock:
+                self.hedged += 1
+            hedge_timeout = None if timeout is None else timeout - delay
+            threading.Thread(
+                target=attempt, args=(1, hedge_timeout), daemon=True
+            ).start()
+            outcomes = [results.get()]
+            if not outcomes[0][1]:
+                outcomes.append(results.get())
+
+        for index, ok, value in outcomes:
+            if ok:
+                if index == 1:
+                    with self._lock:
+                        self.hedge_wins += 1
+                return value  # type: ignore[return-value]
+        raise outcomes[0][2]  # type: ignore[misc]
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import http.client
+import threading
+import urllib.parse
+from dataclasses import dataclass, field
+
+_Key = tuple[str, str, int]
+
+# Errors that mean a pooled keep-alive connection was closed by the server
+# between requests; the request is retried once on a fresh connection.
+_STALE_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    BrokenPipeError,
+    ConnectionResetError,
+)
+
+
+@dataclass
+class Response:
+    status: int
+    headers: dict[str, str] = field(default_factory=dict)
+    body: bytes = b""
+
+
+class RenderSession:
+    """Keep-alive HTTP connections to render servers, reused across requests.
+
+    A session is safe to share between threads; each request checks a
+    connection out of the idle pool and returns it afterwards.
+    """
+
+    def __init__(self) -> None:
+        self._idle: dict[_Key, list[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def __enter__(self) -> "RenderSession":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def post(
+        self,
+        url: str,
+        body: bytes,
+        headers: dict[str, str],
+        *,
+        timeout: float | None = None,
+    ) -> Response:
+        return self.request("POST", url, body=body, headers=headers, timeout=timeout)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        body: bytes | None = None,
+        headers: dict[str, str] | None = None,
+        timeout: float | None = None,
+    ) -> Response:
+        """Send a request; ``timeout`` bounds each socket operation."""
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme not in {"http", "https"} or not parts.hostname:
+            raise ValueError(f"Unsupported endpoint URL '{url}'")
+        key = (
+            parts.scheme,
+            parts.hostname,
+            parts.port or (443 if parts.scheme == "https" else 80),
+        )
+        target = parts.path or "/"
+        if parts.query:
+            target = f"{target}?{parts.query}"
+
+        conn, reused = self._checkout(key)
+        try:
+            try:
+                response = self._send(conn, method, target, body, headers, timeout)
+            except _STALE_ERRORS:
+                conn.close()
+                if not reused:
+                    raise
+                conn = self._connect(key)
+                response = self._send(conn, method, target, body, headers, timeout)
+        except BaseException:
+            conn.close()
+            raise
+
+        if response.headers.get("connection", "").lower() == "close":
+            conn.close()
+        else:
+            self._checkin(key, conn)
+        return response
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+    def _send(
+        self,
+        conn: http.client.HTTPConnection,
+        method: str,
+        target: str,
+        body: bytes | None,
+        headers: dict[str, str] | None,
+        timeout: float | None,
+    ) -> Response:
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        conn.request(method, target, body=body, headers=headers or {})
+        raw = conn.getresponse()
+        payload = raw.read()
+        return Response(
+            status=raw.status,
+            headers={name.lower(): value for name, value in raw.getheaders()},
+            body=payload,
+        )
+
+    def _checkout(self, key: _Key) -> tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("RenderSession is closed")
+            pool = self._idle.get(key)
+            if pool:
+                return pool.pop(), True
+        return self._connect(key), False
+
+    def _checkin(self, key: _Key, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            if not self._closed:
+                self._idle.setdefault(key, []).append(conn)
+                return
+        conn.close()
+
+    def _connect(self, key: _Key) -> http.client.HTTPConnection:
+        scheme, host, port = key
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port)
+        return http.client.HTTPConnection(host, port)
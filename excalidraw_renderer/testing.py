@@ -0,0 +1,260 @@
+"""A local stand-in for the render server, for tests and benchmarks.
+
+``StubRenderServer`` speaks the same HTTP contract as the Next.js routes
+(``POST /api/render`` and ``POST /api/render-mermaid`` returning PNG bytes,
+``GET /api/health``) without launching a browser. Latency, response size
+and transient failures are configurable. Like the real routes, successful
+responses carry a strong ``ETag`` derived from the request body and
+``If-None-Match`` is answered with ``304 Not Modified``. A render request
+with ``"frames": true`` gets the JSON list of per-frame PNGs, one for each
+``frame`` element in the scene.
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import http.server
+import json
+import socket
+import struct
+import threading
+import time
+import zlib
+from typing import Any
+
+
+def make_png(width: int, height: int, *, level: int = 0) -> bytes:
+    """Build a valid RGBA PNG with a simple gradient."""
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body))
+
+    rows = bytearray()
+    for y in range(height):
+        rows.append(0)
+        for x in range(width):
+            rows += bytes((x * 7 & 0xFF, y * 5 & 0xFF, 0x80, 0xFF))
+    header = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(bytes(rows), level))
+        + chunk(b"IEND", b"")
+    )
+
+
+def _png_of_size(size: int) -> bytes:
+    # Uncompressed RGBA rows are 4 * width + 1 bytes; pick a square-ish image
+    # whose stored size is close to the requested response size.
+    side = max(1, int((max(size, 64) / 4) ** 0.5))
+    return make_png(side, side)
+
+
+class StubRenderServer:
+    """Threaded HTTP server that answers render requests with PNG bytes.
+
+    ``fail_first`` requests are answered with ``fail_status`` before the
+    server starts succeeding, which is useful for exercising retries. With
+    ``max_concurrency``, at most that many requests are served at once and
+    up to ``max_queue`` more wait; the rest get ``429`` with ``Retry-After``,
+    like the real routes.
+    """
+
+    def __init__(
+        self,
+        *,
+        latency: float = 0.0,
+        response_size: int = 4096,
+        fail_first: int = 0,
+        fail_status: int = 503,
+        max_concurrency: int | None = None,
+        max_queue: int = 0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        self.latency = latency
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.body = _png_of_size(response_size)
+        self.requests: list[tuple[str, dict[str, Any]]] = []
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.rejected = 0
+        self._not_modified = 0
+        self._connections: set[socket.socket] = set()
+        self.connections = 0
+        self._active = 0
+        self._slots = threading.Semaphore(max_concurrency or 1)
+        self._lock = threading.Lock()
+        self._server = http.server.ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def endpoint(self, path: str = "/api/render") -> str:
+        return f"{self.url}{path}"
+
+    @property
+    def request_count(self) -> int:
+        with self._lock:
+            return len(self.requests)
+
+    def start(self) -> "StubRenderServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "StubRenderServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
+
+    def drop_connections(self) -> None:
+        """Close every open client connection, like a server's idle timeout."""
+        with self._lock:
+            open_connections = list(self._connections)
+        for connection in open_connections:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def _record(self, path: str, payload: dict[str, Any]) -> int:
+        with self._lock:
+            self.requests.append((path, payload))
+            return len(self.requests)
+
+    @property
+    def not_modified_count(self) -> int:
+        with self._lock:
+            return self._not_modified
+
+    def respond(
+        self, path: str, payload: dict[str, Any]
+    ) -> tuple[int, dict[str, str], bytes]:
+        """Build the response for one request; override to customise."""
+        count = self._record(path, payload)
+        if self.latency:
+            time.sleep(self.latency)
+        if count <= self.fail_first:
+            error = json.dumps({"error": "stub failure"}).encode("utf-8")
+            return self.fail_status, {"Content-Type": "application/json"}, error
+        headers = {
+            "Content-Type": "image/png",
+            "Cache-Control": "no-cache",
+            "Server-Timing": f"export;dur={self.latency * 1000:.1f}",
+        }
+        if payload.get("frames"):
+            png = base64.b64encode(self.body).decode("ascii")
+            frames = [
+                {"id": element["id"], "name": element.get("name"), "png": png}
+                for element in payload.get("elements", [])
+                if element.get("type") == "frame"
+            ]
+            headers["Content-Type"] = "application/json"
+            return 200, headers, json.dumps({"frames": frames}).encode("utf-8")
+        return 200, headers, self.body
+
+    def _respond_limited(
+        self, path: str, payload: dict[str, Any]
+    ) -> tuple[int, dict[str, str], bytes]:
+        if self.max_concurrency is None:
+            return self.respond(path, payload)
+        with self._lock:
+            queued = max(0, self._active - self.max_concurrency)
+            if queued >= self.max_queue and self._active >= self.max_concurrency:
+                self.rejected += 1
+                error = json.dumps({"error": "Render queue is full"}).encode("utf-8")
+                headers = {
+                    "Content-Type": "application/json",
+                    "Retry-After": "1",
+                    "X-Render-Queue": str(queued),
+                }
+                return 429, headers, error
+            self._active += 1
+        try:
+            with self._slots:
+                status, headers, body = self.respond(path, payload)
+        finally:
+            with self._lock:
+                self._active -= 1
+                queued = max(0, self._active - self.max_concurrency)
+        return status, {**headers, "X-Render-Queue": str(queued)}, body
+
+    def _handler(self) -> type[http.server.BaseHTTPRequestHandler]:
+        stub = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def setup(self) -> None:
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+                    stub._connections.add(self.connection)
+
+            def finish(self) -> None:
+                with stub._lock:
+                    stub._connections.discard(self.connection)
+                super().finish()
+
+            def do_GET(self) -> None:
+                if self.path != "/api/health":
+                    self._send(404, {"Content-Type": "application/json"}, b"{}")
+                    return
+                body = json.dumps({"status": "ok"}).encode("utf-8")
+                self._send(200, {"Content-Type": "application/json"}, body)
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length)
+                try:
+                    payload = json.loads(raw or b"{}")
+                except ValueError:
+                    self._send(400, {"Content-Type": "application/json"}, b"{}")
+                    return
+                etag = '"' + hashlib.sha256(
+                    self.path.encode("utf-8") + b"\n" + raw
+                ).hexdigest() + '"'
+                if_none_match = self.headers.get("If-None-Match") or ""
+                if etag in (tag.strip() for tag in if_none_match.split(",")):
+                    with stub._lock:
+                        stub._not_modified += 1
+                    self._send(304, {"ETag": etag, "Cache-Control": "no-cache"}, b"")
+                    return
+                status, headers, body = stub._respond_limited(self.path, payload)
+                if status == 200:
+                    headers = {**headers, "ETag": etag}
+                self._send(status, headers, body)
+
+            def _send(self, status: int, headers: dict[str, str], body: bytes) -> None:
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                if status != 304:
+                    self.send_header("Content-Length", str(len(body)))
+                try:
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client gave up (timeout or hedged duplicate).
+                    self.close_connection = True
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        return Handler
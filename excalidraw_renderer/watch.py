@@ -0,0 +1,199 @@
+"""Directory watching with debounced change batches.
+
+On Linux the watcher uses inotify through ``ctypes``; elsewhere (or when
+inotify is unavailable) it falls back to polling file modification times.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import fnmatch
+import os
+import select
+import struct
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, Sequence
+
+# inotify event masks (see inotify(7)).
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_WATCH_MASK = (
+    _IN_MODIFY
+    | _IN_CLOSE_WRITE
+    | _IN_MOVED_FROM
+    | _IN_MOVED_TO
+    | _IN_CREATE
+    | _IN_DELETE
+    | _IN_DELETE_SELF
+    | _IN_MOVE_SELF
+)
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+@dataclass
+class ChangeBatch:
+    changed: list[Path] = field(default_factory=list)
+    deleted: list[Path] = field(default_factory=list)
+
+
+class _PollingBackend:
+    def __init__(self, directory: Path, interval: float) -> None:
+        self.directory = directory
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self) -> dict[str, tuple[int, int]]:
+        snapshot: dict[str, tuple[int, int]] = {}
+        try:
+            entries = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return snapshot
+        for entry in entries:
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            snapshot[entry.name] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def wait(self, timeout: float | None) -> set[str]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            current = self._scan()
+            names = {
+                name
+                for name in current.keys() | self._snapshot.keys()
+                if current.get(name) != self._snapshot.get(name)
+            }
+            self._snapshot = current
+            if names:
+                return names
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            delay = self.interval
+            if deadline is not None:
+                delay = min(delay, max(0.0, deadline - time.monotonic()))
+            time.sleep(delay)
+
+    def close(self) -> None:
+        pass
+
+
+class _InotifyBackend:
+    def __init__(self, directory: Path) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        if libc.inotify_add_watch(fd, os.fsencode(directory), _WATCH_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(fd)
+            raise OSError(errno, f"inotify_add_watch failed for {directory}")
+        self.fd = fd
+
+    def wait(self, timeout: float | None) -> set[str]:
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        names: set[str] = set()
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            _wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            raw_name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            if mask & (_IN_DELETE_SELF | _IN_MOVE_SELF):
+                raise RuntimeError("Watched directory was removed")
+            if raw_name:
+                names.add(os.fsdecode(raw_name))
+        return names
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class DirectoryWatcher:
+    """Yield debounced batches of changed and deleted files in a directory.
+
+    Events for the same burst of saves are coalesced: a batch is emitted only
+    once ``debounce`` seconds pass without any further event. Only direct
+    children matching one of ``patterns`` are reported.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        patterns: Sequence[str],
+        *,
+        debounce: float = 0.3,
+        poll_interval: float = 0.5,
+        force_polling: bool = False,
+    ) -> None:
+        self.directory = Path(directory)
+        self.patterns = tuple(patterns)
+        self.debounce = debounce
+        self._backend: _InotifyBackend | _PollingBackend
+        if not force_polling and sys.platform.startswith("linux"):
+            try:
+                self._backend = _InotifyBackend(self.directory)
+            except (OSError, AttributeError):
+                self._backend = _PollingBackend(self.directory, poll_interval)
+        else:
+            self._backend = _PollingBackend(self.directory, poll_interval)
+
+    @property
+    def backend(self) -> str:
+        return "inotify" if isinstance(self._backend, _InotifyBackend) else "polling"
+
+    def matches(self, name: str) -> bool:
+        return any(fnmatch.fnmatch(name, pattern) for pattern in self.patterns)
+
+    def __enter__(self) -> "DirectoryWatcher":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._backend.close()
+
+    def next_batch(self, timeout: float | None = None) -> ChangeBatch | None:
+        """Block until a debounced batch is ready, or return None on timeout."""
+        pending = {name for name in self._backend.wait(timeout) if self.matches(name)}
+        if not pending:
+            return None
+        while True:
+            more = self._backend.wait(self.debounce)
+            if not more:
+                break
+            pending.update(name for name in more if self.matches(name))
+
+        batch = ChangeBatch()
+        for name in sorted(pending):
+            path = self.directory / name
+            if path.is_file():
+                batch.changed.append(path)
+            elif not path.exists():
+                batch.deleted.append(path)
+        return batch
+
+    def __iter__(self) -> Iterator[ChangeBatch]:
+        while True:
+            batch = self.next_batch()
+            if batch is not None and (batch.changed or batch.deleted):
+                yield batch
@@ -1,11 +1,28 @@
 from __future__ import annotations
 
+import json
+import time
+from contextlib import contextmanager
 from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, TypeVar
 
 import click
-from tqdm import tqdm
-from typing import Callable
-from excalidraw_renderer.client import render_mermaid, render_png
+
+# Git hooks and editors start this CLI once per file, so everything beyond
+# click is imported by the command that needs it: tqdm only for directory
+# runs, the SQLite queue only for ``queue``, and so on. ``tests/test_startup.py``
+# holds the resulting startup budget.
+if TYPE_CHECKING:
+    from excalidraw_renderer.balancer import EndpointPool
+    from excalidraw_renderer.concurrency import AdaptiveLimiter
+    from excalidraw_renderer.metrics import RenderMetrics
+    from excalidraw_renderer.optimize import PngOptimizer
+    from excalidraw_renderer.policy import RequestPolicy
+
+F = TypeVar("F", bound=Callable[..., object])
+
+DSL_SUFFIX = ".dsl.json"
+ADAPTIVE_MAX_CONCURRENCY = 32
 
 
 def _render_files(
@@ -15,6 +32,7 @@ def _render_files(
     pattern: str,
     render: Callable,
     render_kwargs: dict[str, object],
+    concurrency: int = 1,
 ) -> None:
     if input_path.is_dir():
         if output_path.exists() and output_path.is_file():
@@ -31,14 +49,23 @@ def _render_files(
         if not files:
             raise click.ClickException(f"No {pattern} files found in input directory")
 
-        for file_path in tqdm(files, desc="Rendering", unit="file"):
-            out_path = output_path / f"{file_path.stem}.png"
-            try:
-                render(file_path, out_path, **render_kwargs)
-            except RuntimeError as exc:
-                raise click.ClickException(f"{file_path.name}: {exc}") from exc
+        if concurrency <= 1:
+            from tqdm import tqdm
+
+            written = 0
+            for file_path in tqdm(files, desc="Rendering", unit="file"):
+                out_path = output_path / f"{file_path.stem}.png"
+                try:
+                    result = render(file_path, out_path, **render_kwargs)
+                except RuntimeError as exc:
+                    raise click.ClickException(f"{file_path.name}: {exc}") from exc
+                written += len(_written(result, out_path))
+        else:
+            written = _render_concurrently(
+                files, output_path, render, render_kwargs, concurrency
+            )
 
-        click.echo(f"Wrote {len(files)} file(s) to {output_path}")
+        click.echo(f"Wrote {written} file(s) to {output_path}")
         return
 
     if output_path.exists() and output_path.is_dir():
@@ -47,11 +74,296 @@ def _render_files(
         out_file = output_path
 
     try:
-        render(input_path, out_file, **render_kwargs)
+        result = render(input_path, out_file, **render_kwargs)
     except RuntimeError as exc:
         raise click.ClickException(str(exc)) from exc
 
-    click.echo(f"Wrote {out_file}")
+    for path in _written(result, out_file):
+        click.echo(f"Wrote {path}")
+
+
+def _written(result: object, out_path: Path) -> list[Path]:
+    """Files a render wrote: the paths it returned, or else ``out_path``."""
+    return result if isinstance(result, list) else [out_path]
+
+
+def _render_concurrently(
+    files: list[Path],
+    output_path: Path,
+    render: Callable,
+    render_kwargs: dict[str, object],
+    concurrency: int,
+) -> int:
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    from tqdm import tqdm
+
+    with ThreadPoolExecutor(concurrency) as executor, tqdm(
+        total=len(files), desc="Rendering", unit="file"
+    ) as progress:
+        futures = {
+            executor.submit(
+                render,
+                file_path,
+                output_path / f"{file_path.stem}.png",
+                **render_kwargs,
+            ): file_path
+            for file_path in files
+        }
+        written = 0
+        for future in as_completed(futures):
+            file_path = futures[future]
+            try:
+                result = future.result()
+            except RuntimeError as exc:
+                for pending in futures:
+                    pending.cancel()
+                raise click.ClickException(f"{file_path.name}: {exc}") from exc
+            written += len(_written(result, output_path / f"{file_path.stem}.png"))
+            progress.update()
+    return written
+
+
+def _worker_count(
+    concurrency: int | None, endpoints: int, limiter: AdaptiveLimiter | None
+) -> int:
+    # With an adaptive limiter, threads only bound the limit; the limiter
+    # decides how many requests are actually in flight.
+    if limiter is not None:
+        return limiter.max_limit
+    return concurrency or endpoints
+
+
+@contextmanager
+def _endpoints(urls: tuple[str, ...]) -> Iterator[str | EndpointPool]:
+    """Yield a single URL as-is, or a health-checked pool for several."""
+    if len(urls) == 1:
+        yield urls[0]
+        return
+    from excalidraw_renderer.balancer import EndpointPool
+
+    with EndpointPool(urls) as pool:
+        yield pool
+    click.echo(pool.report())
+
+
+@contextmanager
+def _optimizer(optimize: bool, quantize: bool) -> Iterator[PngOptimizer | None]:
+    """Yield a PNG optimizer when requested and report the savings at the end."""
+    if not (optimize or quantize):
+        yield None
+        return
+    from excalidraw_renderer.optimize import PngOptimizer
+
+    with PngOptimizer(quantize=quantize) as optimizer:
+        yield optimizer
+    click.echo(optimizer.report())
+
+
+def _request_controls(
+    *,
+    profile: bool,
+    timeout: float,
+    deadline: float | None,
+    retries: int,
+    hedge: float | None,
+    adaptive: bool,
+    concurrency: int | None,
+) -> tuple[RenderMetrics | None, RequestPolicy, AdaptiveLimiter | None]:
+    """Build the metrics, retry policy and limiter shared by render commands."""
+    from excalidraw_renderer.policy import RequestPolicy
+
+    metrics = None
+    if profile:
+        from excalidraw_renderer.metrics import RenderMetrics
+
+        metrics = RenderMetrics()
+    policy = RequestPolicy(
+        timeout=timeout, deadline=deadline, retries=retries, hedge_percentile=hedge
+    )
+    limiter = None
+    if adaptive:
+        from excalidraw_renderer.concurrency import AdaptiveLimiter
+
+        limiter = AdaptiveLimiter(max_limit=concurrency or ADAPTIVE_MAX_CONCURRENCY)
+    return metrics, policy, limiter
+
+
+def _compile_mermaid(text: str) -> dict[str, object] | None:
+    """Compile a Mermaid flowchart in-process, or return None to use the server."""
+    try:
+        from excalidraw_dsl import mermaid_to_scene
+    except ImportError:
+        return None
+    try:
+        return mermaid_to_scene(text, deterministic=True)
+    except ValueError:
+        return None
+
+
+def _render_mermaid_native(
+    input_path: Path,
+    output_path: Path,
+    *,
+    endpoint: str,
+    render_endpoint: str,
+    **render_kwargs: object,
+) -> None:
+    from excalidraw_renderer.client import render_mermaid, render_png
+
+    scene = _compile_mermaid(input_path.read_text(encoding="utf-8"))
+    if scene is None:
+        render_mermaid(input_path, output_path, endpoint=endpoint, **render_kwargs)
+    else:
+        render_png(scene, output_path, endpoint=render_endpoint, **render_kwargs)
+
+
+def _render_dsl_file(
+    input_path: Path, output_path: Path, **render_kwargs: object
+) -> None:
+    try:
+        from excalidraw_dsl import render_dsl
+    except ImportError as exc:
+        raise RuntimeError("Rendering DSL files requires excalidraw-dsl") from exc
+
+    data = json.loads(input_path.read_text(encoding="utf-8"))
+    try:
+        scene = render_dsl(data, deterministic=True)
+    except (ValueError, KeyError, TypeError) as exc:
+        raise RuntimeError(f"Invalid DSL: {exc}") from exc
+    from excalidraw_renderer.client import render_png
+
+    render_png(scene, output_path, **render_kwargs)
+
+
+def _render_frames_file(
+    input_path: Path, output_path: Path, **render_kwargs: object
+) -> list[Path]:
+    from excalidraw_renderer.client import render_frames
+
+    # Frames go next to where the single PNG would have been written.
+    frames = render_frames(
+        input_path, output_path.parent, stem=output_path.stem, **render_kwargs
+    )
+    if not frames:
+        raise RuntimeError("Scene has no frames")
+    return [output_path.with_name(f"{output_path.stem}-{name}.png") for name in frames]
+
+
+def _remove_output(out_file: Path) -> None:
+    """Delete a rendered PNG and its ETag sidecar after its source is removed."""
+    from excalidraw_renderer.client import _etag_path
+
+    etag_file = _etag_path(out_file)
+    if etag_file.exists():
+        etag_file.unlink()
+    if out_file.exists():
+        out_file.unlink()
+        click.echo(f"Removed {out_file}")
+
+
+def _mtimes(paths: Iterable[Path]) -> dict[Path, int]:
+    return {path: path.stat().st_mtime_ns for path in paths if path.exists()}
+
+
+def _count_unchanged(previous: dict[Path, int]) -> int:
+    """Count outputs that --skip-unchanged kept instead of rewriting."""
+    return sum(
+        1 for path, mtime in previous.items() if _mtimes([path]).get(path) == mtime
+    )
+
+
+def _output_file(input_path: Path, output_dir: Path) -> Path:
+    name = input_path.name
+    if name.endswith(DSL_SUFFIX):
+        return output_dir / f"{name[: -len(DSL_SUFFIX)]}.png"
+    return output_dir / f"{input_path.stem}.png"
+
+
+def _options(*decorators: Callable[[F], F]) -> Callable[[F], F]:
+    """Combine click options into one decorator, keeping their --help order."""
+
+    def apply(func: F) -> F:
+        for decorator in reversed(decorators):
+            func = decorator(func)
+        return func
+
+    return apply
+
+
+_timeout_option = click.option(
+    "--timeout",
+    type=float,
+    default=120.0,
+    show_default=True,
+    help="Seconds before a single render request is abandoned",
+)
+_retries_option = click.option(
+    "--retries",
+    type=click.IntRange(min=0),
+    default=2,
+    show_default=True,
+    help="Retries for connection errors, timeouts, 429 and 5xx responses",
+)
+
+# Request, retry and output handling options shared by render, mermaid and dsl.
+_request_options = _options(
+    click.option(
+        "--adaptive",
+        is_flag=True,
+        help="Adjust the number of in-flight requests to server load (AIMD)",
+    ),
+    _timeout_option,
+    click.option("--deadline", type=float, help="Seconds allowed for the whole run"),
+    _retries_option,
+    click.option(
+        "--hedge",
+        type=click.FloatRange(min=0, max=1, min_open=True, max_open=True),
+        help="Send a duplicate request once one is slower than this latency "
+        "percentile of recent requests (e.g. 0.95)",
+    ),
+    click.option(
+        "--profile",
+        is_flag=True,
+        help="Print per-stage timing percentiles after the run",
+    ),
+    click.option(
+        "--skip-unchanged",
+        is_flag=True,
+        help="Keep existing outputs the server reports as unchanged (ETag/304)",
+    ),
+    click.option(
+        "--optimize",
+        is_flag=True,
+        help="Re-encode PNGs losslessly in a process pool to shrink them",
+    ),
+    click.option(
+        "--quantize",
+        is_flag=True,
+        help="Also reduce PNGs to a 256-colour palette (lossy; implies --optimize)",
+    ),
+)
+
+# Export settings sent with every render request.
+_export_options = _options(
+    click.option("--scale", type=float, help="PNG scale factor (e.g. 2 for 2x)"),
+    click.option("--padding", type=float, help="Padding around the drawing in pixels"),
+    click.option(
+        "--max-size",
+        type=float,
+        help="Maximum width or height of the output image in pixels",
+    ),
+    click.option(
+        "--quality",
+        type=float,
+        help="Image quality (0-1, primarily for lossy formats)",
+    ),
+    click.option(
+        "--background",
+        help="Background color (e.g. #ffffff or transparent)",
+    ),
+    click.option("--dark", is_flag=True, help="Export with dark mode enabled"),
+)
 
 
 @click.group(context_settings={"help_option_names": ["-h", "--help"]})
@@ -64,57 +376,103 @@ def main() -> None:
 @click.argument("output", type=click.Path(path_type=Path))
 @click.option(
     "--endpoint",
-    default="http://localhost:3000/api/render",
+    "endpoints",
+    multiple=True,
+    default=["http://localhost:3000/api/render"],
     show_default=True,
-    help="Render API endpoint",
+    help="Render API endpoint; repeat to balance across several servers",
 )
-@click.option("--scale", type=float, help="PNG scale factor (e.g. 2 for 2x)")
-@click.option("--padding", type=float, help="Padding around the drawing in pixels")
 @click.option(
-    "--max-size",
-    type=float,
-    help="Maximum width or height of the output image in pixels",
-)
-@click.option(
-    "--quality",
-    type=float,
-    help="Image quality (0-1, primarily for lossy formats)",
+    "--concurrency",
+    type=click.IntRange(min=1),
+    help="Files rendered in parallel (default: one per endpoint); "
+    "the upper bound with --adaptive",
 )
 @click.option(
-    "--background",
-    help="Background color (e.g. #ffffff or transparent)",
+    "--frames",
+    is_flag=True,
+    help="Write each Excalidraw frame to its own <name>-<frame>.png from one "
+    "render request",
 )
-@click.option("--dark", is_flag=True, help="Export with dark mode enabled")
+@_request_options
+@_export_options
 def render_command(
     input: Path,
     output: Path,
-    endpoint: str,
+    endpoints: tuple[str, ...],
+    concurrency: int | None,
+    adaptive: bool,
+    timeout: float,
+    deadline: float | None,
+    retries: int,
+    hedge: float | None,
     scale: float | None,
     padding: float | None,
     max_size: float | None,
     quality: float | None,
     background: str | None,
     dark: bool,
+    profile: bool,
+    skip_unchanged: bool,
+    frames: bool,
+    optimize: bool,
+    quantize: bool,
 ) -> None:
-    """Render Excalidraw JSON file(s) to PNG via the local render API."""
+    """Render Excalidraw JSON file(s) to PNG via the local render API.
 
-    render_kwargs = {
-        "endpoint": endpoint,
-        "export_scale": scale,
-        "export_padding": padding,
-        "max_size": max_size,
-        "quality": quality,
-        "background_color": background,
-        "dark_mode": dark,
-    }
+    With --frames, every frame in a scene becomes its own PNG named after
+    the output stem and the frame name.
+    """
+    if frames and skip_unchanged:
+        raise click.UsageError("--skip-unchanged cannot be combined with --frames")
+    from excalidraw_renderer.client import render_png
+    from excalidraw_renderer.session import RenderSession
 
-    _render_files(
-        input_path=input,
-        output_path=output,
-        pattern="*.json",
-        render=render_png,
-        render_kwargs=render_kwargs,
+    metrics, policy, limiter = _request_controls(
+        profile=profile,
+        timeout=timeout,
+        deadline=deadline,
+        retries=retries,
+        hedge=hedge,
+        adaptive=adaptive,
+        concurrency=concurrency,
     )
+    with _endpoints(endpoints) as endpoint, RenderSession() as session, _optimizer(
+        optimize, quantize
+    ) as optimizer:
+        render_kwargs: dict[str, object] = {
+            "endpoint": endpoint,
+            "export_scale": scale,
+            "export_padding": padding,
+            "max_size": max_size,
+            "quality": quality,
+            "background_color": background,
+            "dark_mode": dark,
+            "session": session,
+            "metrics": metrics,
+            "policy": policy,
+            "limiter": limiter,
+            "optimizer": optimizer,
+        }
+        if not frames:
+            render_kwargs["skip_unchanged"] = skip_unchanged
+
+        _render_files(
+            input_path=input,
+            output_path=output,
+            pattern="*.json",
+            render=_render_frames_file if frames else render_png,
+            render_kwargs=render_kwargs,
+            concurrency=_worker_count(concurrency, len(endpoints), limiter),
+        )
+    if metrics is not None:
+        click.echo(metrics.report())
+        click.echo(
+            f"retried {policy.retried}, hedged {policy.hedged}"
+            f" ({policy.hedge_wins} won)"
+        )
+    if limiter is not None:
+        click.echo(limiter.report())
 
 
 @main.command("mermaid")
@@ -122,31 +480,301 @@ def render_command(
 @click.argument("output", type=click.Path(path_type=Path))
 @click.option(
     "--endpoint",
+    "endpoints",
+    multiple=True,
+    default=["http://localhost:3000/api/render-mermaid"],
+    show_default=True,
+    help="Mermaid render API endpoint; repeat to balance across several servers",
+)
+@click.option(
+    "--render-endpoint",
+    "render_endpoints",
+    multiple=True,
+    default=["http://localhost:3000/api/render"],
+    show_default=True,
+    help="Scene render API endpoint used for natively compiled flowcharts",
+)
+@click.option(
+    "--concurrency",
+    type=click.IntRange(min=1),
+    help="Files rendered in parallel (default: one per endpoint); "
+    "the upper bound with --adaptive",
+)
+@click.option(
+    "--native/--no-native",
+    default=True,
+    show_default=True,
+    help="Compile flowcharts in Python; other diagrams still use the server",
+)
+@_request_options
+@_export_options
+def mermaid_command(
+    input: Path,
+    output: Path,
+    endpoints: tuple[str, ...],
+    render_endpoints: tuple[str, ...],
+    concurrency: int | None,
+    adaptive: bool,
+    timeout: float,
+    deadline: float | None,
+    retries: int,
+    hedge: float | None,
+    native: bool,
+    scale: float | None,
+    padding: float | None,
+    max_size: float | None,
+    quality: float | None,
+    background: str | None,
+    dark: bool,
+    profile: bool,
+    skip_unchanged: bool,
+    optimize: bool,
+    quantize: bool,
+) -> None:
+    """Render a Mermaid diagram text file to PNG via the local render API."""
+    from excalidraw_renderer.client import render_mermaid
+    from excalidraw_renderer.session import RenderSession
+
+    metrics, policy, limiter = _request_controls(
+        profile=profile,
+        timeout=timeout,
+        deadline=deadline,
+        retries=retries,
+        hedge=hedge,
+        adaptive=adaptive,
+        concurrency=concurrency,
+    )
+    with _endpoints(endpoints) as endpoint, _endpoints(
+        render_endpoints
+    ) as render_endpoint, RenderSession() as session, _optimizer(
+        optimize, quantize
+    ) as optimizer:
+        render_kwargs: dict[str, object] = {
+            "endpoint": endpoint,
+            "export_scale": scale,
+            "export_padding": padding,
+            "max_size": max_size,
+            "quality": quality,
+            "background_color": background,
+            "dark_mode": dark,
+            "session": session,
+            "metrics": metrics,
+            "skip_unchanged": skip_unchanged,
+            "policy": policy,
+            "limiter": limiter,
+            "optimizer": optimizer,
+        }
+
+        render: Callable = render_mermaid
+        if native:
+            render = _render_mermaid_native
+            render_kwargs["render_endpoint"] = render_endpoint
+
+        _render_files(
+            input_path=input,
+            output_path=output,
+            pattern="*.mmd",
+            render=render,
+            render_kwargs=render_kwargs,
+            concurrency=_worker_count(
+                concurrency,
+                max(len(endpoints), len(render_endpoints) if native else 1),
+                limiter,
+            ),
+        )
+    if metrics is not None:
+        click.echo(metrics.report())
+        click.echo(
+            f"retried {policy.retried}, hedged {policy.hedged}"
+            f" ({policy.hedge_wins} won)"
+        )
+    if limiter is not None:
+        click.echo(limiter.report())
+
+
+@main.command("dsl")
+@click.argument(
+    "input", type=click.Path(exists=True, file_okay=False, path_type=Path)
+)
+@click.argument("output", type=click.Path(file_okay=False, path_type=Path))
+@click.option(
+    "--endpoint",
+    "endpoints",
+    multiple=True,
+    default=["http://localhost:3000/api/render"],
+    show_default=True,
+    help="Render API endpoint; repeat to balance across several servers",
+)
+@click.option(
+    "--processes",
+    type=click.IntRange(min=1),
+    help="Processes compiling DSL files (default: one per CPU)",
+)
+@click.option(
+    "--concurrency",
+    type=click.IntRange(min=1),
+    help="Render requests in flight (default: one per endpoint); "
+    "the upper bound with --adaptive",
+)
+@click.option(
+    "--queue-size",
+    type=click.IntRange(min=1),
+    help="Compiled scenes (and files compiling) allowed to wait for a render "
+    "slot before compiling pauses (default: twice the concurrency)",
+)
+@_request_options
+@_export_options
+def dsl_command(
+    input: Path,
+    output: Path,
+    endpoints: tuple[str, ...],
+    processes: int | None,
+    concurrency: int | None,
+    queue_size: int | None,
+    adaptive: bool,
+    timeout: float,
+    deadline: float | None,
+    retries: int,
+    hedge: float | None,
+    scale: float | None,
+    padding: float | None,
+    max_size: float | None,
+    quality: float | None,
+    background: str | None,
+    dark: bool,
+    profile: bool,
+    skip_unchanged: bool,
+    optimize: bool,
+    quantize: bool,
+) -> None:
+    """Compile a directory of .dsl.json files and render them to PNG.
+
+    Files are compiled in a process pool while earlier ones are already
+    being rendered; per-stage throughput is printed at the end.
+    """
+    try:
+        import excalidraw_dsl  # noqa: F401
+    except ImportError as exc:
+        raise click.ClickException(
+            "Rendering DSL files requires excalidraw-dsl"
+        ) from exc
+    if output.exists() and output.is_file():
+        raise click.ClickException("Output must be a directory")
+    files = sorted(input.glob(f"*{DSL_SUFFIX}"))
+    if not files:
+        raise click.ClickException(f"No *{DSL_SUFFIX} files found in input directory")
+    output.mkdir(parents=True, exist_ok=True)
+    jobs = [(path, _output_file(path, output)) for path in files]
+    previous = _mtimes(target for _, target in jobs) if skip_unchanged else {}
+    from tqdm import tqdm
+
+    from excalidraw_renderer.pipeline import render_dsl_files
+    from excalidraw_renderer.session import RenderSession
+
+    metrics, policy, limiter = _request_controls(
+        profile=profile,
+        timeout=timeout,
+        deadline=deadline,
+        retries=retries,
+        hedge=hedge,
+        adaptive=adaptive,
+        concurrency=concurrency,
+    )
+    with _endpoints(endpoints) as endpoint, RenderSession() as session, _optimizer(
+        optimize, quantize
+    ) as optimizer, tqdm(total=len(files), desc="Rendering", unit="file") as progress:
+        try:
+            stats = render_dsl_files(
+                jobs,
+                processes=processes,
+                concurrency=_worker_count(concurrency, len(endpoints), limiter),
+                max_pending=queue_size,
+                on_rendered=lambda source, target: progress.update(),
+                endpoint=endpoint,
+                export_scale=scale,
+                export_padding=padding,
+                max_size=max_size,
+                quality=quality,
+                background_color=background,
+                dark_mode=dark,
+                session=session,
+                metrics=metrics,
+                skip_unchanged=skip_unchanged,
+                policy=policy,
+                limiter=limiter,
+                optimizer=optimizer,
+            )
+        except RuntimeError as exc:
+            raise click.ClickException(str(exc)) from exc
+
+    kept = _count_unchanged(previous)
+    summary = f"Wrote {len(files) - kept} file(s) to {output}"
+    click.echo(f"{summary}, kept {kept} unchanged" if kept else summary)
+    click.echo(stats.report())
+    if metrics is not None:
+        click.echo(metrics.report())
+        click.echo(
+            f"retried {policy.retried}, hedged {policy.hedged}"
+            f" ({policy.hedge_wins} won)"
+        )
+    if limiter is not None:
+        click.echo(limiter.report())
+
+
+@main.command("watch")
+@click.argument(
+    "input", type=click.Path(exists=True, file_okay=False, path_type=Path)
+)
+@click.argument("output", type=click.Path(file_okay=False, path_type=Path))
+@click.option(
+    "--endpoint",
+    default="http://localhost:3000/api/render",
+    show_default=True,
+    help="Render API endpoint for JSON, DSL and native Mermaid scenes",
+)
+@click.option(
+    "--mermaid-endpoint",
     default="http://localhost:3000/api/render-mermaid",
     show_default=True,
     help="Mermaid render API endpoint",
 )
-@click.option("--scale", type=float, help="PNG scale factor (e.g. 2 for 2x)")
-@click.option("--padding", type=float, help="Padding around the drawing in pixels")
 @click.option(
-    "--max-size",
-    type=float,
-    help="Maximum width or height of the output image in pixels",
+    "--native/--no-native",
+    default=True,
+    show_default=True,
+    help="Compile Mermaid flowcharts in Python",
 )
 @click.option(
-    "--quality",
+    "--debounce",
     type=float,
-    help="Image quality (0-1, primarily for lossy formats)",
+    default=0.3,
+    show_default=True,
+    help="Seconds without changes before a burst of saves is re-rendered",
 )
 @click.option(
-    "--background",
-    help="Background color (e.g. #ffffff or transparent)",
+    "--poll",
+    is_flag=True,
+    help="Poll for changes instead of using inotify",
 )
-@click.option("--dark", is_flag=True, help="Export with dark mode enabled")
-def mermaid_command(
+@_timeout_option
+@click.option(
+    "--deadline",
+    type=float,
+    help="Seconds allowed for each re-render, retries included",
+)
+@_retries_option
+@_export_options
+def watch_command(
     input: Path,
     output: Path,
     endpoint: str,
+    mermaid_endpoint: str,
+    native: bool,
+    debounce: float,
+    poll: bool,
+    timeout: float,
+    deadline: float | None,
+    retries: int,
     scale: float | None,
     padding: float | None,
     max_size: float | None,
@@ -154,24 +782,242 @@ def mermaid_command(
     background: str | None,
     dark: bool,
 ) -> None:
-    """Render a Mermaid diagram text file to PNG via the local render API."""
-    render_kwargs = {
-        "endpoint": endpoint,
+    """Watch a directory and re-render JSON, Mermaid and DSL files on change.
+
+    Files ending in .dsl.json are compiled with excalidraw_dsl first.
+    """
+    if output.exists() and output.is_file():
+        raise click.ClickException("Output must be a directory")
+    output.mkdir(parents=True, exist_ok=True)
+    from excalidraw_renderer.client import render_mermaid, render_png
+    from excalidraw_renderer.session import RenderSession
+    from excalidraw_renderer.watch import DirectoryWatcher
+
+    session = RenderSession()
+    render_kwargs: dict[str, object] = {
         "export_scale": scale,
         "export_padding": padding,
         "max_size": max_size,
         "quality": quality,
         "background_color": background,
         "dark_mode": dark,
+        "session": session,
     }
 
-    _render_files(
-        input_path=input,
-        output_path=output,
-        pattern="*.mmd",
-        render=render_mermaid,
-        render_kwargs=render_kwargs,
+    def render_one(path: Path) -> None:
+        out_file = _output_file(path, output)
+        # A fresh policy per file, so the deadline bounds each re-render.
+        _, policy, _ = _request_controls(
+            profile=False,
+            timeout=timeout,
+            deadline=deadline,
+            retries=retries,
+            hedge=None,
+            adaptive=False,
+            concurrency=None,
+        )
+        render_kwargs["policy"] = policy
+        start = time.perf_counter()
+        try:
+            if path.name.endswith(DSL_SUFFIX):
+                _render_dsl_file(path, out_file, endpoint=endpoint, **render_kwargs)
+            elif path.suffix == ".mmd" and native:
+                _render_mermaid_native(
+                    path,
+                    out_file,
+                    endpoint=mermaid_endpoint,
+                    render_endpoint=endpoint,
+                    **render_kwargs,
+                )
+            elif path.suffix == ".mmd":
+                render_mermaid(
+                    path, out_file, endpoint=mermaid_endpoint, **render_kwargs
+                )
+            else:
+                render_png(path, out_file, endpoint=endpoint, **render_kwargs)
+        except (RuntimeError, OSError, ValueError) as exc:
+            click.echo(f"{path.name}: {exc}", err=True)
+            return
+        elapsed = (time.perf_counter() - start) * 1000
+        click.echo(f"Rendered {path.name} -> {out_file} ({elapsed:.0f} ms)")
+
+    watcher = DirectoryWatcher(
+        input, ("*.json", "*.mmd"), debounce=debounce, force_polling=poll
     )
+    try:
+        stale = [
+            path
+            for path in sorted(input.iterdir())
+            if path.is_file()
+            and watcher.matches(path.name)
+            and (
+                not _output_file(path, output).exists()
+                or _output_file(path, output).stat().st_mtime < path.stat().st_mtime
+            )
+        ]
+        for path in stale:
+            render_one(path)
+
+        click.echo(f"Watching {input} ({watcher.backend}), press Ctrl+C to stop")
+        for batch in watcher:
+            for path in batch.deleted:
+                _remove_output(_output_file(path, output))
+            for path in batch.changed:
+                render_one(path)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+        session.close()
+
+
+@main.group("queue")
+def queue_group() -> None:
+    """Submit render jobs to a durable SQLite queue and run workers."""
+
+
+_db_option = click.option(
+    "--db",
+    "db_path",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=Path("render-jobs.sqlite"),
+    show_default=True,
+    help="Job queue database file",
+)
+
+
+@queue_group.command("submit")
+@click.argument("input", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.argument(
+    "output", type=click.Path(dir_okay=False, path_type=Path), required=False
+)
+@_db_option
+@click.option("--priority", type=int, default=0, show_default=True)
+@click.option(
+    "--endpoint",
+    help="Render API endpoint (defaults to /api/render or /api/render-mermaid)",
+)
+@click.option("--scale", type=float, help="PNG scale factor (e.g. 2 for 2x)")
+@click.option("--padding", type=float, help="Padding around the drawing in pixels")
+@click.option(
+    "--background",
+    help="Background color (e.g. #ffffff or transparent)",
+)
+@click.option("--dark", is_flag=True, help="Export with dark mode enabled")
+def queue_submit_command(
+    input: Path,
+    output: Path | None,
+    db_path: Path,
+    priority: int,
+    endpoint: str | None,
+    scale: float | None,
+    padding: float | None,
+    background: str | None,
+    dark: bool,
+) -> None:
+    """Queue a JSON or Mermaid file and print its job id.
+
+    When OUTPUT is given, the worker that finishes the job writes it there.
+    """
+    options = {
+        "export_scale": scale,
+        "export_padding": padding,
+        "background_color": background,
+        "dark_mode": dark,
+        "priority": priority,
+        "output_path": output.resolve() if output is not None else None,
+    }
+    from excalidraw_renderer.jobs import JobQueue
+
+    with JobQueue(db_path) as queue:
+        if input.suffix == ".mmd":
+            job_id = queue.submit_mermaid(
+                input,
+                endpoint=endpoint or "http://localhost:3000/api/render-mermaid",
+                **options,
+            )
+        else:
+            job_id = queue.submit_scene(
+                input,
+                endpoint=endpoint or "http://localhost:3000/api/render",
+                **options,
+            )
+    click.echo(job_id)
+
+
+@queue_group.command("status")
+@click.argument("job_id", required=False)
+@_db_option
+def queue_status_command(job_id: str | None, db_path: Path) -> None:
+    """Show one job's status, or job counts for the whole queue."""
+    from excalidraw_renderer.jobs import JobQueue
+
+    with JobQueue(db_path) as queue:
+        if job_id is None:
+            for status, count in queue.counts().items():
+                click.echo(f"{status}: {count}")
+            return
+        try:
+            job = queue.status(job_id)
+        except KeyError as exc:
+            raise click.ClickException(f"Unknown job {job_id}") from exc
+    click.echo(f"{job.status} (attempts {job.attempts}/{job.max_attempts})")
+    if job.error:
+        click.echo(job.error)
+
+
+@queue_group.command("result")
+@click.argument("job_id")
+@click.argument("output", type=click.Path(dir_okay=False, path_type=Path))
+@_db_option
+@click.option("--wait", "wait_for", type=float, help="Seconds to wait for the job")
+def queue_result_command(
+    job_id: str, output: Path, db_path: Path, wait_for: float | None
+) -> None:
+    """Write a finished job's PNG to OUTPUT."""
+    from excalidraw_renderer.jobs import JobQueue
+
+    with JobQueue(db_path) as queue:
+        try:
+            if wait_for is not None:
+                data = queue.wait(job_id, timeout=wait_for)
+            else:
+                data = queue.result(job_id)
+        except KeyError as exc:
+            raise click.ClickException(f"Unknown job {job_id}") from exc
+        except (RuntimeError, TimeoutError) as exc:
+            raise click.ClickException(str(exc)) from exc
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_bytes(data)
+    click.echo(f"Wrote {output}")
+
+
+@queue_group.command("worker")
+@_db_option
+@click.option("--processes", type=int, default=2, show_default=True)
+@click.option(
+    "--exit-when-empty",
+    is_flag=True,
+    help="Stop once no jobs are queued or running",
+)
+@click.option("--poll-interval", type=float, default=0.5, show_default=True)
+def queue_worker_command(
+    db_path: Path, processes: int, exit_when_empty: bool, poll_interval: float
+) -> None:
+    """Run worker processes that drain the job queue."""
+    from excalidraw_renderer.jobs import JobQueue, run_workers
+
+    # Create the schema before workers race to do it.
+    JobQueue(db_path).close()
+    try:
+        run_workers(
+            db_path,
+            processes=processes,
+            stop_when_empty=exit_when_empty,
+            poll_interval=poll_interval,
+        )
+    except KeyboardInterrupt:
+        pass
 
 
 if __name__ == "__main__":
@@ -0,0 +1,17 @@
+import { NextResponse } from "next/server";
+import { renderCache } from "@/lib/renderCache";
+import { renderQueue } from "@/lib/renderQueue";
+
+export const runtime = "nodejs";
+export const dynamic = "force-dynamic";
+
+export async function GET() {
+    return NextResponse.json(
+        {
+            status: "ok",
+            cache: { entries: renderCache.size, bytes: renderCache.bytes },
+            queue: { inflight: renderQueue.inflight, depth: renderQueue.depth },
+        },
+        { headers: { "Cache-Control": "no-store" } },
+    );
+}
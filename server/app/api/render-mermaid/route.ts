@@ -3,6 +3,9 @@ import type { Browser } from "playwright";
 import { chromium } from "playwright";
 import path from "path";
 import fs from "fs";
+import { etagMatches, payloadEtag, renderCache } from "@/lib/renderCache";
+import { QueueFullError, renderQueue } from "@/lib/renderQueue";
+import { ServerTiming } from "@/lib/serverTiming";
 
 export const runtime = "nodejs";
 export const dynamic = "force-dynamic";
@@ -67,9 +70,11 @@ const getBrowser = () => {
 };
 
 export async function POST(request: Request) {
+    let rawBody: string;
     let payload: RenderMermaidPayload;
     try {
-        payload = (await request.json()) as RenderMermaidPayload;
+        rawBody = await request.text();
+        payload = JSON.parse(rawBody) as RenderMermaidPayload;
     } catch {
         return NextResponse.json({ error: "Invalid JSON body" }, { status: 400 });
     }
@@ -130,6 +135,56 @@ export async function POST(request: Request) {
         }
     }
 
+    const etag = payloadEtag("render-mermaid", rawBody);
+    if (etagMatches(request.headers.get("if-none-match"), etag)) {
+        return new NextResponse(null, {
+            status: 304,
+            headers: { ETag: etag, "Cache-Control": "no-cache" },
+        });
+    }
+
+    const timing = new ServerTiming();
+    try {
+        const { body, hit } = await renderCache.getOrRender(etag, () =>
+            renderQueue.run(() => {
+                timing.mark("queue");
+                return renderMermaid(payload, timing);
+            }),
+        );
+        if (hit) {
+            timing.mark("cache");
+        }
+
+        return new NextResponse(body, {
+            status: 200,
+            headers: {
+                "Content-Type": "image/png",
+                "Cache-Control": "no-cache",
+                ETag: etag,
+                "X-Render-Cache": hit ? "hit" : "miss",
+                "X-Render-Queue": String(renderQueue.depth),
+                "Server-Timing": timing.header(),
+            },
+        });
+    } catch (error) {
+        if (error instanceof QueueFullError) {
+            return NextResponse.json(
+                { error: error.message },
+                {
+                    status: 429,
+                    headers: {
+                        "Retry-After": String(error.retryAfter),
+                        "X-Render-Queue": String(renderQueue.depth),
+                    },
+                },
+            );
+        }
+        const message = error instanceof Error ? error.message : "Render failed";
+        return NextResponse.json({ error: message }, { status: 500 });
+    }
+}
+
+async function renderMermaid(payload: RenderMermaidPayload, timing: ServerTiming) {
     const browser = await getBrowser();
     const page = await browser.newPage({ viewport: { width: 1200, height: 900 } });
     const pageErrors: string[] = [];
@@ -142,6 +197,7 @@ export async function POST(request: Request) {
             "<!doctype html><html><head><meta charset=\"utf-8\" /></head><body><div id=\"root\"></div></body></html>",
             { waitUntil: "domcontentloaded" },
         );
+        timing.mark("page");
         await page.addScriptTag({ content: fs.readFileSync(reactPath, "utf-8") });
         await page.evaluate(() => {
             if (!(window as any).React) {
@@ -190,8 +246,10 @@ export async function POST(request: Request) {
         await page.waitForFunction(
             () => typeof (window as any).__parseMermaidToExcalidraw === "function",
         );
+        timing.mark("script");
 
-        const bytes = await page.evaluate(
+        const evaluateStart = performance.now();
+        const result = await page.evaluate(
             async (data) => {
                 const lib = (window as unknown as { ExcalidrawLib?: any }).ExcalidrawLib;
                 if (!lib?.exportToBlob) {
@@ -230,16 +288,18 @@ export async function POST(request: Request) {
                     },
                 };
 
-                const result = await parseMermaidToExcalidraw(
+                const parseStart = performance.now();
+                const parsed = await parseMermaidToExcalidraw(
                     data.mermaid,
                     mergedConfig,
                 );
 
                 const elements = lib.convertToExcalidrawElements(
-                    result.elements ?? [],
+                    parsed.elements ?? [],
                     { regenerateIds: true },
                 );
-                const files = result.files ?? {};
+                const files = parsed.files ?? {};
+                const parseMs = performance.now() - parseStart;
 
                 const exportOptions: Record<string, unknown> = {
                     elements,
@@ -272,9 +332,11 @@ export async function POST(request: Request) {
                     exportOptions.exportPadding = data.exportPadding;
                 }
 
+                const exportStart = performance.now();
                 const blob = await lib.exportToBlob(exportOptions);
                 const buffer = await blob.arrayBuffer();
-                return Array.from(new Uint8Array(buffer));
+                const exportMs = performance.now() - exportStart;
+                return { bytes: Array.from(new Uint8Array(buffer)), parseMs, exportMs };
             },
             {
                 mermaid: payload.mermaid,
@@ -288,17 +350,19 @@ export async function POST(request: Request) {
             },
         );
 
-        return new NextResponse(Buffer.from(bytes), {
-            status: 200,
-            headers: {
-                "Content-Type": "image/png",
-                "Cache-Control": "no-store",
-            },
-        });
+        const body = Buffer.from(result.bytes);
+        timing.add("parse", result.parseMs);
+        timing.add("export", result.exportMs);
+        timing.add(
+            "transfer",
+            performance.now() - evaluateStart - result.parseMs - result.exportMs,
+        );
+
+        return body;
     } catch (error) {
         const message = error instanceof Error ? error.message : "Render failed";
         const detail = pageErrors.length > 0 ? ` | Page errors: ${pageErrors.join(" | ")}` : "";
-        return NextResponse.json({ error: `${message}${detail}` }, { status: 500 });
+        throw new Error(`${message}${detail}`);
     } finally {
         await page.close();
     }
@@ -3,6 +3,9 @@ import type { Browser } from "playwright";
 import { chromium } from "playwright";
 import path from "path";
 import fs from "fs";
+import { etagMatches, payloadEtag, renderCache } from "@/lib/renderCache";
+import { QueueFullError, renderQueue } from "@/lib/renderQueue";
+import { ServerTiming } from "@/lib/serverTiming";
 
 export const runtime = "nodejs";
 export const dynamic = "force-dynamic";
@@ -54,8 +57,11 @@ type RenderPayload = {
     quality?: number;
     backgroundColor?: string;
     darkMode?: boolean;
+    frames?: boolean;
 };
 
+type FrameExport = { id: string; name: string | null; bytes: number[] };
+
 let browserPromise: Promise<Browser> | null = null;
 
 const getBrowser = () => {
@@ -68,9 +74,11 @@ const getBrowser = () => {
 };
 
 export async function POST(request: Request) {
+    let rawBody: string;
     let payload: RenderPayload;
     try {
-        payload = (await request.json()) as RenderPayload;
+        rawBody = await request.text();
+        payload = JSON.parse(rawBody) as RenderPayload;
     } catch {
         return NextResponse.json(
             { error: "Invalid JSON body" },
@@ -134,6 +142,63 @@ export async function POST(request: Request) {
         }
     }
 
+    if (payload.frames !== undefined && typeof payload.frames !== "boolean") {
+        return NextResponse.json(
+            { error: "frames must be a boolean" },
+            { status: 400 },
+        );
+    }
+
+    const etag = payloadEtag("render", rawBody);
+    if (etagMatches(request.headers.get("if-none-match"), etag)) {
+        return new NextResponse(null, {
+            status: 304,
+            headers: { ETag: etag, "Cache-Control": "no-cache" },
+        });
+    }
+
+    const timing = new ServerTiming();
+    try {
+        const { body, hit } = await renderCache.getOrRender(etag, () =>
+            renderQueue.run(() => {
+                timing.mark("queue");
+                return renderScene(payload, timing);
+            }),
+        );
+        if (hit) {
+            timing.mark("cache");
+        }
+
+        return new NextResponse(body, {
+            status: 200,
+            headers: {
+                "Content-Type": payload.frames ? "application/json" : "image/png",
+                "Cache-Control": "no-cache",
+                ETag: etag,
+                "X-Render-Cache": hit ? "hit" : "miss",
+                "X-Render-Queue": String(renderQueue.depth),
+                "Server-Timing": timing.header(),
+            },
+        });
+    } catch (error) {
+        if (error instanceof QueueFullError) {
+            return NextResponse.json(
+                { error: error.message },
+                {
+                    status: 429,
+                    headers: {
+                        "Retry-After": String(error.retryAfter),
+                        "X-Render-Queue": String(renderQueue.depth),
+                    },
+                },
+            );
+        }
+        const message = error instanceof Error ? error.message : "Render failed";
+        return NextResponse.json({ error: message }, { status: 500 });
+    }
+}
+
+async function renderScene(payload: RenderPayload, timing: ServerTiming) {
     const browser = await getBrowser();
     const page = await browser.newPage({ viewport: { width: 1200, height: 900 } });
     const pageErrors: string[] = [];
@@ -146,6 +211,7 @@ export async function POST(request: Request) {
             "<!doctype html><html><head><meta charset=\"utf-8\" /></head><body><div id=\"root\"></div></body></html>",
             { waitUntil: "domcontentloaded" },
         );
+        timing.mark("page");
         await page.addScriptTag({ content: fs.readFileSync(reactPath, "utf-8") });
         await page.evaluate(() => {
             if (!(window as any).React) {
@@ -182,15 +248,16 @@ export async function POST(request: Request) {
                 throw new Error("ExcalidrawLib global not available");
             }
         });
+        timing.mark("script");
 
-        const bytes = await page.evaluate(async (data) => {
+        const evaluateStart = performance.now();
+        const result = await page.evaluate(async (data) => {
             const lib = (window as unknown as { ExcalidrawLib?: any }).ExcalidrawLib;
             if (!lib?.exportToBlob) {
                 throw new Error("Excalidraw export library not available");
             }
 
-            const exportOptions: Record<string, unknown> = {
-                elements: data.elements,
+            const baseOptions: Record<string, unknown> = {
                 appState: {
                     exportWithDarkMode: data.darkMode ?? false,
                     viewBackgroundColor: data.backgroundColor ?? "#ffffff",
@@ -201,16 +268,16 @@ export async function POST(request: Request) {
             };
 
             if (data.maxSize !== undefined) {
-                exportOptions.maxWidthOrHeight = data.maxSize;
+                baseOptions.maxWidthOrHeight = data.maxSize;
             }
 
             if (data.quality !== undefined) {
-                exportOptions.quality = data.quality;
+                baseOptions.quality = data.quality;
             }
 
             if (data.exportScale !== undefined) {
                 const scale = data.exportScale;
-                exportOptions.getDimensions = (width: number, height: number) => ({
+                baseOptions.getDimensions = (width: number, height: number) => ({
                     width: width * scale,
                     height: height * scale,
                     scale,
@@ -218,26 +285,56 @@ export async function POST(request: Request) {
             }
 
             if (data.exportPadding !== undefined) {
-                exportOptions.exportPadding = data.exportPadding;
+                baseOptions.exportPadding = data.exportPadding;
             }
 
-            const blob = await lib.exportToBlob(exportOptions);
+            const exportBytes = async (options: Record<string, unknown>) => {
+                const blob = await lib.exportToBlob({ ...baseOptions, ...options });
+                return Array.from(new Uint8Array(await blob.arrayBuffer()));
+            };
+
+            const exportStart = performance.now();
+            if (!data.frames) {
+                const bytes = await exportBytes({ elements: data.elements });
+                return { bytes, frames: [], exportMs: performance.now() - exportStart };
+            }
 
-            const buffer = await blob.arrayBuffer();
-            return Array.from(new Uint8Array(buffer));
+            // Every frame is exported from the scene already loaded in this
+            // page, with only the elements that belong to it.
+            const elements = data.elements as any[];
+            const frames = elements.filter(
+                (element) => !element.isDeleted
+                    && (element.type === "frame" || element.type === "magicframe"),
+            );
+            const exported: FrameExport[] = [];
+            for (const frame of frames) {
+                const members = elements.filter(
+                    (element) => element.id === frame.id || element.frameId === frame.id,
+                );
+                exported.push({
+                    id: frame.id as string,
+                    name: (frame.name as string | null) ?? null,
+                    bytes: await exportBytes({ elements: members, exportingFrame: frame }),
+                });
+            }
+            return { bytes: [], frames: exported, exportMs: performance.now() - exportStart };
         }, payload);
+        timing.add("export", result.exportMs);
+        timing.add("transfer", performance.now() - evaluateStart - result.exportMs);
 
-        return new NextResponse(Buffer.from(bytes), {
-            status: 200,
-            headers: {
-                "Content-Type": "image/png",
-                "Cache-Control": "no-store",
-            },
-        });
+        if (payload.frames) {
+            const frames = result.frames.map((frame: FrameExport) => ({
+                id: frame.id,
+                name: frame.name,
+                png: Buffer.from(frame.bytes).toString("base64"),
+            }));
+            return Buffer.from(JSON.stringify({ frames }));
+        }
+        return Buffer.from(result.bytes);
     } catch (error) {
         const message = error instanceof Error ? error.message : "Render failed";
         const detail = pageErrors.length > 0 ? ` | Page errors: ${pageErrors.join(" | ")}` : "";
-        return NextResponse.json({ error: `${message}${detail}` }, { status: 500 });
+        throw new Error(`${message}${detail}`);
     } finally {
         await page.close();
     }
@@ -0,0 +1,96 @@
+import { createHash } from "crypto";
+
+/**
+ * Bounded in-memory LRU of rendered outputs keyed by payload hash.
+ *
+ * Concurrent requests for the same key share a single render.
+ */
+export class RenderCache {
+    private readonly entries = new Map<string, Buffer>();
+    private readonly inflight = new Map<string, Promise<Buffer>>();
+    private totalBytes = 0;
+
+    constructor(
+        private readonly maxBytes: number,
+        private readonly maxEntries: number,
+    ) {}
+
+    get size() {
+        return this.entries.size;
+    }
+
+    get bytes() {
+        return this.totalBytes;
+    }
+
+    get(key: string) {
+        const value = this.entries.get(key);
+        if (value) {
+            this.entries.delete(key);
+            this.entries.set(key, value);
+        }
+        return value;
+    }
+
+    set(key: string, value: Buffer) {
+        if (value.length > this.maxBytes || this.maxEntries <= 0) {
+            return;
+        }
+        const previous = this.entries.get(key);
+        if (previous) {
+            this.totalBytes -= previous.length;
+            this.entries.delete(key);
+        }
+        this.entries.set(key, value);
+        this.totalBytes += value.length;
+
+        while (this.totalBytes > this.maxBytes || this.entries.size > this.maxEntries) {
+            const oldest = this.entries.keys().next().value as string;
+            this.totalBytes -= this.entries.get(oldest)?.length ?? 0;
+            this.entries.delete(oldest);
+        }
+    }
+
+    async getOrRender(key: string, render: () => Promise<Buffer>) {
+        const cached = this.get(key);
+        if (cached) {
+            return { body: cached, hit: true };
+        }
+
+        const pending = this.inflight.get(key);
+        if (pending) {
+            return { body: await pending, hit: true };
+        }
+
+        const task = render()
+            .then((body) => {
+                this.set(key, body);
+                return body;
+            })
+            .finally(() => {
+                this.inflight.delete(key);
+            });
+        this.inflight.set(key, task);
+        return { body: await task, hit: false };
+    }
+}
+
+// Route modules can be bundled separately; keep one cache per process.
+const globalCache = globalThis as typeof globalThis & { __renderCache?: RenderCache };
+
+export const renderCache =
+    globalCache.__renderCache
+    ?? (globalCache.__renderCache = new RenderCache(
+        Number(process.env.RENDER_CACHE_MAX_BYTES ?? 256 * 1024 * 1024),
+        Number(process.env.RENDER_CACHE_MAX_ENTRIES ?? 1000),
+    ));
+
+/** Strong ETag for a request body sent to `route`. */
+export const payloadEtag = (route: string, body: string) =>
+    `"${createHash("sha256").update(route).update("\n").update(body).digest("hex")}"`;
+
+export const etagMatches = (header: string | null, etag: string) =>
+    (header ?? "")
+        .split(",")
+        .map((tag) => tag.trim())
+        .some((tag) => tag === etag || tag === "*");
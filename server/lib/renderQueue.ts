@@ -0,0 +1,71 @@
+/** Raised when the render queue is full; `retryAfter` is in seconds. */
+export class QueueFullError extends Error {
+    constructor(readonly retryAfter: number) {
+        super("Render queue is full");
+    }
+}
+
+/**
+ * Limits how many renders run at once (one Chromium page each) and how many
+ * may wait for a slot. Requests beyond that are rejected so clients can
+ * back off instead of piling up until pages time out.
+ */
+export class RenderQueue {
+    private active = 0;
+    private readonly waiting: (() => void)[] = [];
+    private averageMs = 1000;
+
+    constructor(
+        private readonly concurrency: number,
+        private readonly maxQueue: number,
+    ) {}
+
+    /** Requests waiting for a render slot. */
+    get depth() {
+        return this.waiting.length;
+    }
+
+    get inflight() {
+        return this.active;
+    }
+
+    /** Estimated seconds until a newly queued request would start. */
+    retryAfter() {
+        const waitMs = ((this.waiting.length + 1) * this.averageMs) / this.concurrency;
+        return Math.max(1, Math.ceil(waitMs / 1000));
+    }
+
+    async run<T>(task: () => Promise<T>) {
+        if (this.active < this.concurrency) {
+            this.active += 1;
+        } else if (this.waiting.length >= this.maxQueue) {
+            throw new QueueFullError(this.retryAfter());
+        } else {
+            // The finishing render hands its slot over without releasing it.
+            await new Promise<void>((resolve) => this.waiting.push(resolve));
+        }
+
+        const start = performance.now();
+        try {
+            return await task();
+        } finally {
+            this.averageMs = 0.8 * this.averageMs + 0.2 * (performance.now() - start);
+            const next = this.waiting.shift();
+            if (next) {
+                next();
+            } else {
+                this.active -= 1;
+            }
+        }
+    }
+}
+
+// Route modules can be bundled separately; keep one queue per process.
+const globalQueue = globalThis as typeof globalThis & { __renderQueue?: RenderQueue };
+
+export const renderQueue =
+    globalQueue.__renderQueue
+    ?? (globalQueue.__renderQueue = new RenderQueue(
+        Number(process.env.RENDER_MAX_CONCURRENCY ?? 4),
+        Number(process.env.RENDER_MAX_QUEUE ?? 32),
+    ));
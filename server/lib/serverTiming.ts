@@ -0,0 +1,26 @@
+/**
+ * Collects named stage durations and formats them as a `Server-Timing`
+ * header (https://www.w3.org/TR/server-timing/).
+ */
+export class ServerTiming {
+    private readonly entries: [string, number][] = [];
+    private last = performance.now();
+
+    /** Attribute the time since the previous mark to `name`. */
+    mark(name: string) {
+        const now = performance.now();
+        this.add(name, now - this.last);
+        this.last = now;
+    }
+
+    /** Record a duration measured elsewhere, in milliseconds. */
+    add(name: string, duration: number) {
+        this.entries.push([name, Math.max(0, duration)]);
+    }
+
+    header() {
+        return this.entries
+            .map(([name, duration]) => `${name};dur=${duration.toFixed(1)}`)
+            .join(", ");
+    }
+}
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from excalidraw_renderer.balancer import EndpointPool
+from excalidraw_renderer.client import RenderError, render_png
+from excalidraw_renderer.testing import StubRenderServer
+from main import main as cli
+
+
+def test_pool_spreads_load_and_ejects_failing_endpoint() -> None:
+    scene = {"elements": []}
+    with StubRenderServer(latency=0.01) as fast, StubRenderServer(
+        fail_first=1000
+    ) as broken:
+        pool = EndpointPool(
+            [fast.endpoint(), broken.endpoint()], eject_after=2, eject_for=60
+        )
+        for _ in range(10):
+            assert render_png(scene, endpoint=pool) == fast.body
+
+    stats = {item.url: item for item in pool.stats()}
+    assert broken.request_count == 2
+    assert not stats[broken.endpoint()].healthy
+    assert stats[fast.endpoint()].requests == 10
+    assert stats[fast.endpoint()].failures == 0
+
+
+def test_client_errors_do_not_eject_endpoints() -> None:
+    with StubRenderServer(fail_first=5, fail_status=400) as server:
+        pool = EndpointPool([server.endpoint()], eject_after=2, eject_for=60)
+        for _ in range(5):
+            with pytest.raises(RenderError) as raised:
+                render_png({"elements": []}, endpoint=pool)
+            assert raised.value.status == 400
+        assert render_png({"elements": []}, endpoint=pool) == server.body
+
+    (stats,) = pool.stats()
+    assert stats.healthy
+    assert stats.failures == 0
+    assert pool._endpoints[0].consecutive_failures == 0
+
+
+def test_failover_only_gets_the_time_left() -> None:
+    with StubRenderServer(latency=0.3, fail_first=1000) as failing, StubRenderServer(
+        latency=0.5
+    ) as slow:
+        pool = EndpointPool([failing.endpoint(), slow.endpoint()])
+        start = time.monotonic()
+        with pytest.raises(RenderError, match="timed out"):
+            render_png({"elements": []}, endpoint=pool, timeout=0.5)
+        elapsed = time.monotonic() - start
+
+    # A full timeout for the second attempt would have let it succeed at 0.8s.
+    assert failing.request_count == slow.request_count == 1
+    assert elapsed < 0.7
+
+
+def test_least_outstanding_and_health_recovery() -> None:
+    with StubRenderServer(latency=0.05) as first, StubRenderServer(
+        latency=0.05
+    ) as second:
+        pool = EndpointPool([first.endpoint(), second.endpoint()])
+        with ThreadPoolExecutor(4) as executor:
+            list(
+                executor.map(
+                    lambda _: render_png({"elements": []}, endpoint=pool), range(8)
+                )
+            )
+        assert first.request_count == second.request_count == 4
+
+        pool._endpoints[1].consecutive_failures = pool.eject_after
+        pool._endpoints[1].ejected_until = time.monotonic() + 0.3
+        pool.health_interval = 0.01
+        with pool:
+            # Passing health checks do not end the ejection early...
+            time.sleep(0.15)
+            assert not pool.stats()[1].healthy
+            assert pool._endpoints[1].consecutive_failures == pool.eject_after
+            # ...but once it runs out, the next healthy probe resets it.
+            deadline = time.monotonic() + 2
+            while (
+                pool._endpoints[1].consecutive_failures
+                and time.monotonic() < deadline
+            ):
+                time.sleep(0.01)
+        assert pool.stats()[1].healthy
+        assert pool._endpoints[1].consecutive_failures == 0
+        assert "req/s" in pool.report()
+
+
+def test_cli_renders_across_endpoints(tmp_path: Path) -> None:
+    input_dir = tmp_path / "in"
+    input_dir.mkdir()
+    for index in range(6):
+        (input_dir / f"scene{index}.json").write_text(json.dumps({"elements": []}))
+
+    with StubRenderServer(latency=0.02) as first, StubRenderServer(
+        latency=0.02
+    ) as second:
+        result = CliRunner().invoke(
+            cli,
+            [
+                "render",
+                str(input_dir),
+                str(tmp_path / "out"),
+                "--endpoint",
+                first.endpoint(),
+                "--endpoint",
+                second.endpoint(),
+            ],
+        )
+
+    assert result.exit_code == 0, result.output
+    assert len(list((tmp_path / "out").glob("*.png"))) == 6
+    assert first.request_count + second.request_count == 6
+    assert first.request_count and second.request_count
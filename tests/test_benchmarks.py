@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from click.testing import CliRunner
+
+from benchmarks.run import compare_results, main
+
+
+def _result(value: float, better: str) -> dict:
+    return {"value": value, "unit": "s", "better": better}
+
+
+def test_compare_flags_regressions_in_both_directions() -> None:
+    baseline = {
+        "latency": _result(10.0, "lower"),
+        "throughput": _result(100.0, "higher"),
+        "steady": _result(5.0, "lower"),
+    }
+    current = {
+        "latency": _result(12.0, "lower"),
+        "throughput": _result(80.0, "higher"),
+        "steady": _result(5.2, "lower"),
+    }
+
+    regressions = dict(compare_results(baseline, current, 0.1))
+
+    assert set(regressions) == {"latency", "throughput"}
+
+
+def test_quick_dsl_run_writes_comparable_results(tmp_path: Path) -> None:
+    output = tmp_path / "bench.json"
+    runner = CliRunner()
+
+    outcome = runner.invoke(
+        main,
+        ["run", "--quick", "--suite", "dsl", "--sizes", "100", "--output", str(output)],
+    )
+    assert outcome.exit_code == 0, outcome.output
+    results = json.loads(output.read_text())["results"]
+    assert "dsl.compile[100]" in results
+
+    same = runner.invoke(main, ["compare", str(output), str(output)])
+    assert same.exit_code == 0
@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from excalidraw_renderer.client import render_png
+from excalidraw_renderer.session import RenderSession
+from excalidraw_renderer.testing import StubRenderServer
+
+
+@pytest.mark.parametrize("use_session", [False, True])
+def test_skip_unchanged_reuses_output(tmp_path: Path, use_session: bool) -> None:
+    scene = tmp_path / "scene.json"
+    scene.write_text(json.dumps({"elements": []}))
+    out = tmp_path / "out.png"
+
+    with StubRenderServer() as server, RenderSession() as session:
+        kwargs = {
+            "endpoint": server.endpoint(),
+            "skip_unchanged": True,
+            "session": session if use_session else None,
+        }
+        render_png(scene, out, **kwargs)
+        etag = (tmp_path / "out.png.etag").read_text()
+        out.write_bytes(b"kept")
+
+        render_png(scene, out, **kwargs)
+        assert server.not_modified_count == 1
+        assert out.read_bytes() == b"kept"
+
+        render_png(scene, out, export_scale=2, **kwargs)
+        assert server.not_modified_count == 1
+        assert out.read_bytes() == server.body
+        assert (tmp_path / "out.png.etag").read_text() != etag
+
+
+def test_skip_unchanged_for_recompiled_diagrams(tmp_path: Path) -> None:
+    from excalidraw_renderer.client import render_diagram
+
+    dsl = {"elements": [{"id": "a", "type": "box", "x": 0, "y": 0, "w": 80, "h": 40}]}
+    out = tmp_path / "out.png"
+
+    with StubRenderServer() as server:
+        for _ in range(2):
+            render_diagram(dsl, out, endpoint=server.endpoint(), skip_unchanged=True)
+        # The content hash matches the previous render: no request at all.
+        assert server.request_count == 1
+        assert server.not_modified_count == 0
+        assert "contentHash" not in server.requests[0][1]
+
+        render_diagram(
+            dsl, out, endpoint=server.endpoint(), skip_unchanged=True, export_scale=2
+        )
+        dsl["elements"][0]["w"] = 120
+        render_diagram(dsl, out, endpoint=server.endpoint(), skip_unchanged=True)
+        assert server.request_count == 3
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import io
+import json
+from pathlib import Path
+
+import pytest
+
+from excalidraw_dsl import Box, Diagram
+
+from excalidraw_renderer import render_diagram, render_mermaid, render_png
+from excalidraw_renderer.metrics import RenderMetrics
+from excalidraw_renderer.testing import StubRenderServer
+
+
+def test_in_memory_inputs_and_outputs(tmp_path: Path) -> None:
+    scene = {"elements": []}
+    raw = json.dumps(scene).encode("utf-8")
+
+    with StubRenderServer() as server:
+        endpoint = server.endpoint()
+        assert render_png(scene, endpoint=endpoint) == server.body
+        assert render_png(raw, endpoint=endpoint) == server.body
+        assert render_png(io.BytesIO(raw), endpoint=endpoint) == server.body
+
+        stream = io.BytesIO()
+        assert render_png(scene, stream, endpoint=endpoint) is None
+        assert stream.getvalue() == server.body
+
+        mermaid = render_mermaid(
+            b"graph TD; A-->B", endpoint=server.endpoint("/api/render-mermaid")
+        )
+        assert mermaid == server.body
+
+        assert [payload for _, payload in server.requests[:4]] == [scene] * 4
+        assert server.requests[4][1] == {"mermaid": "graph TD; A-->B"}
+        assert not list(tmp_path.iterdir())
+
+
+def test_long_mermaid_text_is_not_mistaken_for_a_path() -> None:
+    one_line = "graph LR; " + "; ".join(f"N{i}-->N{i + 1}" for i in range(60))
+    multi_line = one_line.replace("; ", "\n")
+    assert len(one_line) > 255
+
+    with StubRenderServer() as server:
+        endpoint = server.endpoint("/api/render-mermaid")
+        for text in (one_line, multi_line):
+            assert render_mermaid(text, endpoint=endpoint) == server.body
+
+    assert [payload["mermaid"] for _, payload in server.requests] == [
+        one_line,
+        multi_line,
+    ]
+
+
+def test_endpoint_must_be_a_url_or_a_pool(tmp_path: Path) -> None:
+    for endpoint in (None, tmp_path):
+        with pytest.raises(TypeError, match="URL or an EndpointPool"):
+            render_png({"elements": []}, endpoint=endpoint)  # type: ignore[arg-type]
+
+
+def test_render_diagram_compiles_in_process() -> None:
+    diagram = Diagram(elements=[Box(id="a", x=0, y=0, w=100, h=60)])
+    metrics = RenderMetrics()
+
+    with StubRenderServer() as server:
+        png = render_diagram(diagram, endpoint=server.endpoint(), metrics=metrics)
+
+    assert png == server.body
+    [(_, payload)] = server.requests
+    assert [element["id"] for element in payload["elements"]] == ["a"]
+    assert "compile" in metrics.summary()
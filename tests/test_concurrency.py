@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from excalidraw_renderer.client import RenderError, render_png
+from excalidraw_renderer.concurrency import AdaptiveLimiter
+from excalidraw_renderer.policy import RequestPolicy
+from excalidraw_renderer.session import RenderSession
+from excalidraw_renderer.testing import StubRenderServer
+
+SCENE = {"elements": []}
+
+
+def test_overload_cuts_the_limit_and_reports_retry_after() -> None:
+    limiter = AdaptiveLimiter(initial=8)
+    with StubRenderServer(max_concurrency=1, latency=0.2) as server:
+        with ThreadPoolExecutor(2) as executor:
+            futures = [
+                executor.submit(
+                    render_png, SCENE, endpoint=server.endpoint(), limiter=limiter
+                )
+                for _ in range(2)
+            ]
+            errors = [future.exception() for future in futures]
+
+    [error] = [error for error in errors if error is not None]
+    assert isinstance(error, RenderError)
+    assert (error.status, error.retry_after) == (429, 1.0)
+    assert limiter.stats().limit == 4
+    assert limiter.stats().decreases == 1
+
+
+def test_limit_converges_to_server_capacity() -> None:
+    limiter = AdaptiveLimiter(initial=1, max_limit=16)
+    policy = RequestPolicy(retries=5, backoff_base=0.01)
+    with StubRenderServer(
+        latency=0.01, max_concurrency=4, max_queue=2
+    ) as server, RenderSession() as session, ThreadPoolExecutor(16) as executor:
+        results = list(
+            executor.map(
+                lambda _: render_png(
+                    SCENE,
+                    endpoint=server.endpoint(),
+                    session=session,
+                    limiter=limiter,
+                    policy=policy,
+                ),
+                range(150),
+            )
+        )
+
+    stats = limiter.stats()
+    assert all(result == server.body for result in results)
+    assert stats.increases > 0
+    assert stats.decreases > 0
+    assert 1 <= stats.limit < 16
+    assert stats.server_queue is not None
+    assert (stats.inflight, stats.waiting) == (0, 0)
+
+
+@pytest.mark.parametrize("backoff", [0, 1])
+def test_backoff_must_be_a_fraction(backoff: float) -> None:
+    with pytest.raises(ValueError):
+        AdaptiveLimiter(backoff=backoff)
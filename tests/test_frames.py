@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from click.testing import CliRunner
+
+from excalidraw_renderer.client import render_frames
+from excalidraw_renderer.testing import StubRenderServer
+from main import main as cli
+
+
+def _slides() -> dict:
+    def frame(frame_id: str, name: str | None) -> dict:
+        return {"id": frame_id, "type": "frame", "name": name}
+
+    return {
+        "elements": [
+            frame("f1", "Intro"),
+            {"id": "a", "type": "rectangle", "frameId": "f1"},
+            frame("f2", "Q3 / results"),
+            frame("f3", "Intro"),
+            frame("f4", None),
+            {"id": "b", "type": "rectangle", "frameId": None},
+        ]
+    }
+
+
+def test_render_frames_sends_the_scene_once(tmp_path: Path) -> None:
+    with StubRenderServer() as server:
+        frames = render_frames(
+            _slides(), tmp_path, stem="deck", endpoint=server.endpoint()
+        )
+        assert server.request_count == 1
+        assert server.requests[0][1]["frames"] is True
+
+    assert list(frames) == ["Intro", "Q3-results", "Intro-2", "f4"]
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "deck-Intro-2.png",
+        "deck-Intro.png",
+        "deck-Q3-results.png",
+        "deck-f4.png",
+    ]
+    assert (tmp_path / "deck-Intro.png").read_bytes() == frames["Intro"]
+
+
+def test_cli_frames_flag(tmp_path: Path) -> None:
+    input_dir = tmp_path / "in"
+    input_dir.mkdir()
+    (input_dir / "talk.json").write_text(json.dumps(_slides()))
+
+    with StubRenderServer() as server:
+        result = CliRunner().invoke(
+            cli,
+            [
+                "render",
+                str(input_dir),
+                str(tmp_path / "out"),
+                "--endpoint",
+                server.endpoint(),
+                "--frames",
+            ],
+        )
+
+    assert result.exit_code == 0, result.output
+    assert len(list((tmp_path / "out").glob("talk-*.png"))) == 4
+    assert not (tmp_path / "out" / "talk.png").exists()
+    assert f"Wrote 4 file(s) to {tmp_path / 'out'}" in result.output
+
+
+def test_cli_frames_reports_each_frame_file(tmp_path: Path) -> None:
+    scene = tmp_path / "talk.json"
+    scene.write_text(json.dumps(_slides()))
+    empty = tmp_path / "empty.json"
+    empty.write_text(json.dumps({"elements": [{"id": "a", "type": "rectangle"}]}))
+
+    with StubRenderServer() as server:
+
+        def render(input_path: Path) -> object:
+            return CliRunner().invoke(
+                cli,
+                [
+                    "render",
+                    str(input_path),
+                    str(tmp_path / "out.png"),
+                    "--endpoint",
+                    server.endpoint(),
+                    "--frames",
+                ],
+            )
+
+        result = render(scene)
+        assert result.exit_code == 0, result.output
+        names = ["out-Intro.png", "out-Q3-results.png", "out-Intro-2.png", "out-f4.png"]
+        assert result.output.splitlines() == [f"Wrote {tmp_path / n}" for n in names]
+        assert not (tmp_path / "out.png").exists()
+
+        result = render(empty)
+        assert result.exit_code != 0
+        assert "Scene has no frames" in result.output
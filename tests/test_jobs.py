@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from excalidraw_renderer.client import RenderError
+from excalidraw_renderer.jobs import (
+    DONE,
+    FAILED,
+    QUEUED,
+    RUNNING,
+    JobQueue,
+    run_worker,
+    run_workers,
+)
+from excalidraw_renderer.testing import StubRenderServer
+
+SCENE = {"elements": [{"id": "a", "type": "rectangle", "x": 0, "y": 0}]}
+
+
+def test_identical_payloads_are_deduplicated(tmp_path: Path) -> None:
+    with JobQueue(tmp_path / "jobs.db") as queue:
+        first = queue.submit_scene(SCENE, endpoint="http://stub/api/render")
+        second = queue.submit_scene(
+            SCENE, endpoint="http://stub/api/render", priority=5
+        )
+        other = queue.submit_scene(
+            SCENE, endpoint="http://stub/api/render", export_scale=2
+        )
+
+        assert first == second
+        assert other != first
+        assert queue.status(first).priority == 5
+        assert queue.counts()["queued"] == 2
+
+
+def test_claim_order_follows_priority(tmp_path: Path) -> None:
+    with JobQueue(tmp_path / "jobs.db") as queue:
+        low = queue.submit("http://stub/api/render", {"elements": [], "n": 1})
+        high = queue.submit(
+            "http://stub/api/render", {"elements": [], "n": 2}, priority=3
+        )
+
+        assert queue.claim().id == high
+        assert queue.claim().id == low
+        assert queue.claim() is None
+
+
+def test_abandoned_job_fails_after_max_attempts(tmp_path: Path) -> None:
+    with JobQueue(tmp_path / "jobs.db") as queue:
+        job_id = queue.submit(
+            "http://stub/api/render", {"elements": []}, max_attempts=2
+        )
+
+        # Each claimant "crashes": its lease is already over and it never
+        # calls complete() or fail().
+        assert queue.claim(lease=-1).attempts == 1
+        assert queue.claim(lease=-1).attempts == 2
+        assert queue.claim(lease=-1) is None
+
+        job = queue.status(job_id)
+        assert (job.status, job.attempts) == (FAILED, 2)
+        assert "lease expired" in job.error
+
+
+def test_complete_requires_a_live_lease(tmp_path: Path) -> None:
+    out = tmp_path / "scene.png"
+    with JobQueue(tmp_path / "jobs.db") as queue:
+        job_id = queue.submit(
+            "http://stub/api/render", {"elements": []}, output_path=out
+        )
+        queue.claim(lease=-1)
+        queue.claim()
+
+        assert queue.complete(job_id, b"reclaimed")
+        assert not queue.complete(job_id, b"stale")
+        assert queue.result(job_id) == b"reclaimed"
+        assert out.read_bytes() == b"reclaimed"
+
+
+def test_fail_requires_a_live_lease(tmp_path: Path) -> None:
+    with JobQueue(tmp_path / "jobs.db") as queue:
+        job_id = queue.submit("http://stub/api/render", {"elements": []})
+        stale = queue.claim(lease=-1)
+        assert not queue.fail(job_id, "expired", retry_in=0, attempt=stale.attempts)
+        current = queue.claim()
+
+        assert not queue.fail(job_id, "stale", retry_in=0, attempt=stale.attempts)
+        assert not queue.fail(job_id, "stale", retry_in=None, attempt=stale.attempts)
+        assert not queue.renew(job_id, lease=60, attempt=stale.attempts)
+        assert not queue.complete(job_id, b"stale", attempt=stale.attempts)
+        job = queue.status(job_id)
+        assert (job.status, job.attempts, job.error) == (RUNNING, 2, None)
+
+        assert queue.fail(job_id, "retry", retry_in=0, attempt=current.attempts)
+        assert queue.status(job_id).status == QUEUED
+
+
+def test_unwritable_output_fails_the_job(tmp_path: Path) -> None:
+    (tmp_path / "blocker").write_text("not a directory")
+    with JobQueue(tmp_path / "jobs.db") as queue:
+        job_id = queue.submit(
+            "http://stub/api/render",
+            {"elements": []},
+            output_path=tmp_path / "blocker" / "scene.png",
+        )
+        queue.claim()
+
+        assert not queue.complete(job_id, b"png")
+        job = queue.status(job_id)
+        assert job.status == FAILED
+        assert "Could not write output" in job.error
+
+
+def test_worker_retries_transient_failures(tmp_path: Path) -> None:
+    db = tmp_path / "jobs.db"
+    out = tmp_path / "out" / "scene.png"
+    with StubRenderServer(fail_first=2) as server, JobQueue(db) as queue:
+        job_id = queue.submit_scene(
+            SCENE, endpoint=server.endpoint(), output_path=out
+        )
+
+        processed = run_worker(
+            db, stop_when_empty=True, poll_interval=0.01, backoff_base=0.01
+        )
+
+        assert processed == 1
+        assert server.request_count == 3
+        job = queue.status(job_id)
+        assert (job.status, job.attempts) == (DONE, 3)
+        assert queue.result(job_id) == server.body
+        assert out.read_bytes() == server.body
+
+
+def test_worker_does_not_retry_client_errors(tmp_path: Path) -> None:
+    db = tmp_path / "jobs.db"
+    server = StubRenderServer(fail_first=10, fail_status=400)
+    with server, JobQueue(db) as queue:
+        job_id = queue.submit_scene(SCENE, endpoint=server.endpoint())
+
+        run_worker(db, stop_when_empty=True, poll_interval=0.01)
+
+        assert queue.status(job_id).status == FAILED
+        assert server.request_count == 1
+        with pytest.raises(RenderError):
+            queue.result(job_id)
+
+
+def test_worker_renews_its_lease_during_slow_renders(tmp_path: Path) -> None:
+    db = tmp_path / "jobs.db"
+    with StubRenderServer(latency=0.6) as server, JobQueue(db) as queue:
+        job_id = queue.submit_scene(SCENE, endpoint=server.endpoint())
+
+        processed = run_worker(
+            db, stop_when_empty=True, poll_interval=0.01, lease=0.2, timeout=5
+        )
+
+        assert processed == 1
+        job = queue.status(job_id)
+        assert (job.status, job.attempts) == (DONE, 1)
+        assert server.request_count == 1
+
+
+def test_worker_fails_jobs_on_unexpected_errors(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    def broken(*args: object, **kwargs: object) -> None:
+        raise OSError("disk on fire")
+
+    monkeypatch.setattr("excalidraw_renderer.jobs._post_bytes", broken)
+    db = tmp_path / "jobs.db"
+    with JobQueue(db) as queue:
+        first = queue.submit("http://stub/api/render", {"elements": []})
+        second = queue.submit("http://stub/api/render", {"elements": [1]})
+
+        assert run_worker(db, stop_when_empty=True, poll_interval=0.01) == 0
+
+        for job_id in (first, second):
+            job = queue.status(job_id)
+            assert (job.status, job.attempts) == (FAILED, 1)
+            assert job.error == "OSError: disk on fire"
+
+
+def test_worker_processes_drain_queue(tmp_path: Path) -> None:
+    db = tmp_path / "jobs.db"
+    with StubRenderServer(latency=0.01) as server, JobQueue(db) as queue:
+        job_ids = [
+            queue.submit(server.endpoint(), {"elements": [], "n": n})
+            for n in range(20)
+        ]
+
+        run_workers(db, processes=3, stop_when_empty=True, poll_interval=0.01)
+
+        assert queue.counts()["done"] == 20
+        assert all(queue.wait(job_id, timeout=1) == server.body for job_id in job_ids)
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from excalidraw_renderer.client import render_png
+from excalidraw_renderer.metrics import RenderMetrics, parse_server_timing
+from excalidraw_renderer.testing import StubRenderServer
+
+
+def test_parse_server_timing() -> None:
+    header = 'page;dur=12.5, script;desc="load";dur=30, broken;dur=x, cache'
+
+    assert parse_server_timing(header) == {"page": 0.0125, "script": 0.03}
+    assert parse_server_timing(None) == {}
+
+
+def test_render_png_records_stages(tmp_path: Path) -> None:
+    scene = tmp_path / "scene.json"
+    scene.write_text(json.dumps({"elements": []}))
+    seen = []
+    metrics = RenderMetrics(on_request=seen.append)
+
+    with StubRenderServer(latency=0.002) as server:
+        for _ in range(3):
+            render_png(
+                scene, tmp_path / "out.png", endpoint=server.endpoint(), metrics=metrics
+            )
+
+    summary = metrics.summary()
+    assert metrics.requests == len(seen) == 3
+    assert list(summary) == [
+        "read",
+        "decode",
+        "encode",
+        "network",
+        "server.export",
+        "write",
+        "total",
+    ]
+    assert summary["write"].bytes == 3 * len(server.body)
+    assert summary["network"].p50 >= summary["server.export"].p50 > 0
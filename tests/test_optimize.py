@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import io
+import random
+import struct
+import zlib
+from pathlib import Path
+
+import pytest
+
+from excalidraw_renderer.client import render_png
+from excalidraw_renderer.optimize import (
+    DEFAULT_MAX_PIXELS,
+    PngOptimizer,
+    optimize_png,
+    png_size,
+)
+from excalidraw_renderer.testing import StubRenderServer, make_png
+
+
+def _chunk(kind: bytes, payload: bytes) -> bytes:
+    body = kind + payload
+    return struct.pack(">I", len(payload)) + body + struct.pack(">I", zlib.crc32(body))
+
+
+def _diagram_pixels(width: int = 60, height: int = 40) -> list[bytes]:
+    return [
+        b"\xa5\xd8\xff\xff" if 10 <= x < 50 and 10 <= y < 30 else b"\xff" * 4
+        for y in range(height)
+        for x in range(width)
+    ]
+
+
+def _diagram_png() -> bytes:
+    """An opaque RGBA image with a few flat colours and Paeth-filtered rows."""
+    width, height = 60, 40
+    pixels = _diagram_pixels(width, height)
+    rows = [b"".join(pixels[y * width : (y + 1) * width]) for y in range(height)]
+    previous = [bytes(width * 4)] + rows[:-1]
+    raw = b"".join(
+        b"\x04" + _paeth_filter(row, prev) for row, prev in zip(rows, previous)
+    )
+    header = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + _chunk(b"IHDR", header)
+        + _chunk(b"tEXt", b"Software\0test")
+        + _chunk(b"tEXt", b"application/vnd.excalidraw+json\0{}")
+        + _chunk(b"IDAT", zlib.compress(raw, 1))
+        + _chunk(b"IEND", b"")
+    )
+
+
+def _paeth_filter(row: bytes, prev: bytes) -> bytes:
+    out = bytearray()
+    for i, value in enumerate(row):
+        a = row[i - 4] if i >= 4 else 0
+        b = prev[i]
+        c = prev[i - 4] if i >= 4 else 0
+        p = a + b - c
+        pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+        predictor = a if pa <= pb and pa <= pc else b if pb <= pc else c
+        out.append((value - predictor) & 0xFF)
+    return bytes(out)
+
+
+def _pixels(data: bytes) -> list[bytes]:
+    """Decode an 8-bit, non-interlaced PNG to RGBA pixels, independently of
+    the optimizer's own codec."""
+    offset, idat, palette, alpha = 8, b"", [], b""
+    while offset < len(data):
+        (length,) = struct.unpack(">I", data[offset : offset + 4])
+        kind = data[offset + 4 : offset + 8]
+        payload = data[offset + 8 : offset + 8 + length]
+        offset += 12 + length
+        if kind == b"IHDR":
+            width, height, depth, colour = struct.unpack(">IIBB", payload[:10])
+            assert depth == 8
+        elif kind == b"PLTE":
+            palette = [payload[i : i + 3] for i in range(0, length, 3)]
+        elif kind == b"tRNS":
+            alpha = payload
+        elif kind == b"IDAT":
+            idat += payload
+    channels = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}[colour]
+    stride = width * channels
+    raw = zlib.decompress(idat)
+    previous = bytearray(stride)
+    pixels = []
+    for y in range(height):
+        start = y * (stride + 1)
+        kind, row = raw[start], bytearray(raw[start + 1 : start + 1 + stride])
+        for i in range(stride):
+            a = row[i - channels] if i >= channels else 0
+            b = previous[i]
+            c = previous[i - channels] if i >= channels else 0
+            if kind == 1:
+                row[i] = (row[i] + a) & 0xFF
+            elif kind == 2:
+                row[i] = (row[i] + b) & 0xFF
+            elif kind == 3:
+                row[i] = (row[i] + (a + b) // 2) & 0xFF
+            elif kind == 4:
+                p = a + b - c
+                pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+                predictor = a if pa <= pb and pa <= pc else b if pb <= pc else c
+                row[i] = (row[i] + predictor) & 0xFF
+        previous = row
+        for x in range(width):
+            px = row[x * channels : (x + 1) * channels]
+            if colour == 0:
+                pixels.append(bytes((px[0],) * 3) + b"\xff")
+            elif colour == 2:
+                pixels.append(bytes(px) + b"\xff")
+            elif colour == 3:
+                index = px[0]
+                a = alpha[index] if index < len(alpha) else 255
+                pixels.append(palette[index] + bytes((a,)))
+            elif colour == 4:
+                pixels.append(bytes((px[0],) * 3 + (px[1],)))
+            else:
+                pixels.append(bytes(px))
+    return pixels
+
+
+def test_optimize_png_is_lossless_and_keeps_the_scene() -> None:
+    for original in (_diagram_png(), make_png(40, 30)):
+        optimized = optimize_png(original)
+        assert len(optimized) < len(original)
+        assert _pixels(optimized) == _pixels(original)
+
+    optimized = optimize_png(_diagram_png())
+    assert b"application/vnd.excalidraw+json" in optimized
+    assert b"Software" not in optimized
+    assert b"Software" not in optimize_png(_diagram_png(), keep_scene=False)
+
+
+def test_quantize_limits_the_palette() -> None:
+    width, height = 60, 40
+    pixels = _diagram_pixels(width, height)
+    # Grey anti-aliasing-like speckles push the image past 16 colours.
+    rng = random.Random(1)
+    for _ in range(200):
+        value = rng.randrange(256)
+        pixels[rng.randrange(len(pixels))] = bytes((value, value, value, 255))
+    raw = b"".join(
+        b"\0" + b"".join(pixels[y * width : (y + 1) * width]) for y in range(height)
+    )
+    original = (
+        b"\x89PNG\r\n\x1a\n"
+        + _chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+        + _chunk(b"IDAT", zlib.compress(raw, 1))
+        + _chunk(b"IEND", b"")
+    )
+
+    lossless = optimize_png(original, max_colors=16)
+    quantized = optimize_png(original, quantize=True, max_colors=16)
+
+    assert _pixels(lossless) == pixels
+    assert len(set(_pixels(quantized))) <= 16
+    assert len(quantized) < len(lossless) < len(original)
+
+
+def test_optimizer_reports_bytes_saved(tmp_path: Path) -> None:
+    with StubRenderServer(response_size=64 * 1024) as server:
+        with PngOptimizer(processes=2) as optimizer:
+            for index in range(3):
+                render_png(
+                    {"elements": []},
+                    tmp_path / f"out{index}.png",
+                    endpoint=server.endpoint(),
+                    optimizer=optimizer,
+                )
+            stream = io.BytesIO()
+            render_png(
+                {"elements": []},
+                stream,
+                endpoint=server.endpoint(),
+                optimizer=optimizer,
+            )
+
+    assert optimizer.files == 4
+    assert optimizer.bytes_before == 4 * len(server.body)
+    assert optimizer.saved > 0
+    assert "saved" in optimizer.report()
+    assert (tmp_path / "out0.png").stat().st_size == len(stream.getvalue())
+
+
+def test_optimizer_skips_images_above_the_pixel_budget() -> None:
+    small, large = make_png(20, 20), _diagram_png()
+    with PngOptimizer(processes=1, max_pixels=1000) as optimizer:
+        assert optimizer.optimize(large) == large
+        optimized = optimizer.optimize(small)
+
+    assert len(optimized) < len(small)
+    assert _pixels(optimized) == _pixels(small)
+    assert optimizer.files == 1
+    assert optimizer.skipped == 1
+    assert "skipped 1 above 1000 pixels" in optimizer.report()
+    assert optimize_png(large, max_pixels=1000) == large
+
+
+def test_default_budget_covers_the_example_outputs() -> None:
+    root = Path(__file__).resolve().parent.parent
+    examples = sorted(root.glob("examples*_output/*.png"))
+    assert examples
+    for path in examples:
+        width, height = png_size(path.read_bytes())
+        assert width * height <= DEFAULT_MAX_PIXELS, path.name
+
+
+def test_optimizer_does_not_mask_the_raised_exception(tmp_path: Path) -> None:
+    broken = tmp_path / "broken.png"
+    broken.write_bytes(make_png(8, 8)[:40])
+    with pytest.raises(KeyError):
+        with PngOptimizer(processes=1) as optimizer:
+            optimizer.submit(broken).exception()
+            raise KeyError("render failed")
+
+    with pytest.raises(zlib.error):
+        with PngOptimizer(processes=1) as optimizer:
+            optimizer.submit(broken).exception()
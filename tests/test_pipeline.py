@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from excalidraw_renderer.pipeline import render_dsl_files
+from excalidraw_renderer.testing import StubRenderServer
+from main import main as cli
+
+
+def _write_dsl(directory: Path, count: int) -> list[Path]:
+    directory.mkdir()
+    paths = []
+    for index in range(count):
+        path = directory / f"diagram{index}.dsl.json"
+        box = {"id": "a", "type": "box", "x": index, "y": 0, "w": 80, "h": 40}
+        path.write_text(json.dumps({"elements": [box]}))
+        paths.append(path)
+    return paths
+
+
+def test_pipeline_compiles_and_renders_every_file(tmp_path: Path) -> None:
+    sources = _write_dsl(tmp_path / "in", 12)
+    jobs = [(path, tmp_path / f"{path.stem}.png") for path in sources]
+    rendered = []
+
+    with StubRenderServer(latency=0.02) as server:
+        stats = render_dsl_files(
+            jobs,
+            processes=2,
+            concurrency=3,
+            max_pending=2,
+            on_rendered=lambda source, target: rendered.append(target),
+            endpoint=server.endpoint(),
+        )
+
+    assert server.request_count == 12
+    assert sorted(rendered) == sorted(target for _, target in jobs)
+    assert all(target.read_bytes() == server.body for _, target in jobs)
+    assert (stats.compile.items, stats.render.items) == (12, 12)
+    assert stats.max_queue <= 2
+    assert stats.render.busy >= 12 * 0.02
+    assert "files/s" in stats.report()
+
+
+def test_pipeline_stops_on_invalid_dsl(tmp_path: Path) -> None:
+    sources = _write_dsl(tmp_path / "in", 3)
+    sources[1].write_text(json.dumps({"elements": [{"type": "hexagon"}]}))
+
+    with StubRenderServer() as server:
+        with pytest.raises(RuntimeError, match="diagram1.dsl.json: Invalid DSL"):
+            render_dsl_files(
+                [(path, tmp_path / f"{path.stem}.png") for path in sources],
+                processes=1,
+                concurrency=1,
+                endpoint=server.endpoint(),
+            )
+
+
+def test_pipeline_stops_when_callback_fails(tmp_path: Path) -> None:
+    sources = _write_dsl(tmp_path / "in", 6)
+
+    def on_rendered(source: Path, target: Path) -> None:
+        raise OSError("progress bar closed")
+
+    # With one render thread and a one-slot queue, a thread killed by the
+    # callback would leave the compile stage blocked forever.
+    with StubRenderServer() as server:
+        with pytest.raises(RuntimeError, match="diagram0.dsl.json: progress bar"):
+            render_dsl_files(
+                [(path, tmp_path / f"{path.stem}.png") for path in sources],
+                processes=1,
+                concurrency=1,
+                max_pending=1,
+                on_rendered=on_rendered,
+                endpoint=server.endpoint(),
+            )
+
+
+def test_cli_dsl_command(tmp_path: Path) -> None:
+    _write_dsl(tmp_path / "in", 4)
+
+    with StubRenderServer() as server:
+        result = CliRunner().invoke(
+            cli,
+            [
+                "dsl",
+                str(tmp_path / "in"),
+                str(tmp_path / "out"),
+                "--endpoint",
+                server.endpoint(),
+                "--processes",
+                "2",
+                "--concurrency",
+                "2",
+            ],
+        )
+
+    assert result.exit_code == 0, result.output
+    assert sorted(path.name for path in (tmp_path / "out").glob("*.png")) == [
+        f"diagram{index}.png" for index in range(4)
+    ]
+    assert "pipeline: 4 file(s)" in result.output
+
+
+def test_cli_dsl_reports_kept_outputs(tmp_path: Path) -> None:
+    sources = _write_dsl(tmp_path / "in", 3)
+    args = ["dsl", str(tmp_path / "in"), str(tmp_path / "out"), "--skip-unchanged"]
+
+    with StubRenderServer() as server:
+        args += ["--endpoint", server.endpoint(), "--processes", "1"]
+        first = CliRunner().invoke(cli, args)
+        sources[0].write_text(json.dumps({"elements": []}))
+        second = CliRunner().invoke(cli, args)
+
+    assert first.exit_code == 0, first.output
+    assert f"Wrote 3 file(s) to {tmp_path / 'out'}\n" in first.output
+    assert second.exit_code == 0, second.output
+    assert "Wrote 1 file(s)" in second.output
+    assert "kept 2 unchanged" in second.output
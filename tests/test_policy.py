@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import socket
+import threading
+from typing import Any
+
+import pytest
+
+from excalidraw_renderer.client import RenderError, render_png
+from excalidraw_renderer.policy import RequestPolicy
+from excalidraw_renderer.session import Response, RenderSession
+from excalidraw_renderer.testing import StubRenderServer
+
+SCENE = {"elements": []}
+
+
+class BlockingServer(StubRenderServer):
+    """Hold one request until ``release`` is set."""
+
+    def __init__(self, blocked_request: int) -> None:
+        super().__init__()
+        self.blocked_request = blocked_request
+        self.release = threading.Event()
+
+    def respond(
+        self, path: str, payload: dict[str, Any]
+    ) -> tuple[int, dict[str, str], bytes]:
+        response = super().respond(path, payload)
+        if self.request_count == self.blocked_request:
+            # Bounded only so a broken hedge fails the test instead of hanging.
+            self.release.wait(10)
+        return response
+
+
+class TimeoutSession(RenderSession):
+    def post(
+        self,
+        url: str,
+        body: bytes,
+        headers: dict[str, str],
+        *,
+        timeout: float | None = None,
+    ) -> Response:
+        raise socket.timeout("timed out")
+
+
+@pytest.mark.parametrize("use_session", [False, True])
+def test_timeout_is_retryable(use_session: bool) -> None:
+    with StubRenderServer(latency=0.5) as server, RenderSession() as session:
+        with pytest.raises(RenderError, match="timed out") as info:
+            render_png(
+                SCENE,
+                endpoint=server.endpoint(),
+                timeout=0.05,
+                session=session if use_session else None,
+            )
+    assert info.value.retryable
+
+
+def test_socket_timeout_becomes_render_error() -> None:
+    with pytest.raises(RenderError, match="timed out") as info:
+        render_png(
+            SCENE, endpoint="http://127.0.0.1:1/api/render", session=TimeoutSession()
+        )
+    assert info.value.retryable
+
+
+def test_retries_only_retryable_failures() -> None:
+    with StubRenderServer(fail_first=2) as server:
+        policy = RequestPolicy(retries=2, backoff_base=0.01)
+        assert render_png(SCENE, endpoint=server.endpoint(), policy=policy)
+        assert server.request_count == 3
+        assert policy.retried == 2
+
+    with StubRenderServer(fail_first=5, fail_status=400) as server:
+        with pytest.raises(RenderError):
+            render_png(SCENE, endpoint=server.endpoint(), policy=policy)
+        assert server.request_count == 1
+
+
+def test_deadline_stops_the_batch() -> None:
+    policy = RequestPolicy(deadline=0.1)
+    with StubRenderServer(latency=0.06) as server:
+        render_png(SCENE, endpoint=server.endpoint(), policy=policy)
+        with pytest.raises(RenderError):
+            for _ in range(3):
+                render_png(SCENE, endpoint=server.endpoint(), policy=policy)
+        assert server.request_count <= 3
+
+
+def test_hedges_slow_requests() -> None:
+    policy = RequestPolicy(hedge_percentile=0.5, hedge_min_samples=3)
+    with BlockingServer(blocked_request=4) as server:
+        for _ in range(3):
+            render_png(SCENE, endpoint=server.endpoint(), policy=policy)
+
+        try:
+            # The fourth request is held until released, so only the hedged
+            # duplicate can answer it.
+            assert render_png(SCENE, endpoint=server.endpoint(), policy=policy)
+            assert not server.release.is_set()
+            assert server.request_count == 5
+        finally:
+            server.release.set()
+    assert (policy.hedged, policy.hedge_wins) == (1, 1)
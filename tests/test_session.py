@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from excalidraw_renderer.session import RenderSession
+from excalidraw_renderer.testing import StubRenderServer
+
+BODY = json.dumps({"elements": []}).encode("utf-8")
+HEADERS = {"Content-Type": "application/json"}
+
+
+def test_session_reuses_one_connection() -> None:
+    with StubRenderServer() as server, RenderSession() as session:
+        for _ in range(5):
+            response = session.post(server.endpoint(), BODY, HEADERS)
+            assert response.status == 200
+            assert response.body == server.body
+
+        assert server.request_count == 5
+        assert server.connections == 1
+
+
+def test_session_reconnects_after_server_closes_connection() -> None:
+    with StubRenderServer() as server, RenderSession() as session:
+        assert session.post(server.endpoint(), BODY, HEADERS).status == 200
+        server.drop_connections()
+
+        response = session.post(server.endpoint(), BODY, HEADERS)
+
+        assert response.status == 200
+        assert server.connections == 2
+
+
+def test_closed_session_refuses_requests() -> None:
+    with StubRenderServer() as server:
+        session = RenderSession()
+        session.close()
+        with pytest.raises(RuntimeError):
+            session.post(server.endpoint(), BODY, HEADERS)
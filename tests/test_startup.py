@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from benchmarks.generate import generate_scene
+from benchmarks.run import ROOT, STARTUP_BUDGETS, startup_time
+from excalidraw_renderer.testing import StubRenderServer
+
+# Run the CLI in a fresh interpreter and print the modules it loaded.
+_PROBE = """
+import json, sys
+import main
+try:
+    main.main(sys.argv[1:])
+except SystemExit:
+    pass
+print(json.dumps(sorted(sys.modules)))
+"""
+
+# Only needed for directory runs, the queue, watch mode, DSL input or
+# several endpoints.
+_DEFERRED = (
+    "concurrent.futures",
+    "ctypes",
+    "excalidraw_dsl",
+    "excalidraw_renderer.balancer",
+    "excalidraw_renderer.jobs",
+    "excalidraw_renderer.optimize",
+    "excalidraw_renderer.pipeline",
+    "excalidraw_renderer.watch",
+    "multiprocessing",
+    "sqlite3",
+    "tqdm",
+    "urllib.request",
+)
+
+
+@pytest.fixture()
+def single_render(tmp_path: Path):
+    scene = tmp_path / "scene.json"
+    scene.write_text(json.dumps(generate_scene(200)), encoding="utf-8")
+    with StubRenderServer() as server:
+        yield [
+            "render",
+            str(scene),
+            str(tmp_path / "scene.png"),
+            "--endpoint",
+            server.endpoint(),
+        ]
+
+
+def _loaded_modules(args: list[str]) -> set[str]:
+    outcome = subprocess.run(
+        [sys.executable, "-c", _PROBE, *args],
+        cwd=ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return set(json.loads(outcome.stdout.splitlines()[-1]))
+
+
+def test_help_and_single_render_defer_heavy_imports(single_render: list[str]) -> None:
+    for args in (["--help"], single_render):
+        loaded = _loaded_modules(args)
+        assert not loaded.intersection(_DEFERRED), args
+
+    assert "excalidraw_renderer.client" in _loaded_modules(single_render)
+
+
+# Loaded CI machines are slower than the one the budgets were set on; the
+# import check above catches small regressions, this one large ones.
+_MARGIN = 2.0
+
+
+def test_startup_stays_within_budget(single_render: list[str]) -> None:
+    commands = {"help": ["--help"], "render": single_render}
+    for name, args in commands.items():
+        # Measure bare interpreter startup alongside each command, so load
+        # on the machine slows both.
+        baseline = startup_time(["-c", "pass"], 5)
+        overhead = (startup_time(["main.py", *args], 5) - baseline) * 1000
+        budget = STARTUP_BUDGETS[name] * _MARGIN
+        assert overhead <= budget, f"{name}: {overhead:.0f} ms > {budget:g} ms"
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from excalidraw_renderer.watch import DirectoryWatcher
+from main import _remove_output
+
+
+def _next_batch(watcher: DirectoryWatcher) -> tuple[list[Path], list[Path]]:
+    batch = watcher.next_batch(timeout=5)
+    assert batch is not None
+    return batch.changed, batch.deleted
+
+
+@pytest.mark.parametrize("force_polling", [True, False], ids=["polling", "inotify"])
+def test_watcher_reports_writes_renames_and_deletes(
+    tmp_path: Path, force_polling: bool
+) -> None:
+    with DirectoryWatcher(
+        tmp_path,
+        ["*.json"],
+        debounce=0.05,
+        poll_interval=0.01,
+        force_polling=force_polling,
+    ) as watcher:
+        if not force_polling and watcher.backend != "inotify":
+            pytest.skip("inotify is not available")
+
+        source = tmp_path / "scene.json"
+        source.write_text("{}", encoding="utf-8")
+        (tmp_path / "notes.txt").write_text("ignored", encoding="utf-8")
+        assert _next_batch(watcher) == ([source], [])
+
+        renamed = tmp_path / "renamed.json"
+        source.rename(renamed)
+        assert _next_batch(watcher) == ([renamed], [source])
+
+        renamed.unlink()
+        assert _next_batch(watcher) == ([], [renamed])
+
+        assert watcher.next_batch(timeout=0.1) is None
+
+
+def test_removed_source_deletes_png_and_etag(tmp_path: Path) -> None:
+    png = tmp_path / "scene.png"
+    png.write_bytes(b"png")
+    etag = tmp_path / "scene.png.etag"
+    etag.write_text('"abc"', encoding="utf-8")
+
+    _remove_output(png)
+
+    assert not png.exists()
+    assert not etag.exists()